@@ -0,0 +1,92 @@
+#==========================
+#   ANIMACIONES (LOTTIE)
+#==========================
+# Registro de las animaciones de la carpeta "animations/". Cada archivo se
+# parsea una sola vez por proceso (o cuando cambia en disco) y se guarda en
+# memoria junto con su versión minificada, con un límite total de bytes.
+# Con `decimales` se redondean los números, que es lo que más pesa en un Lottie.
+import os
+import json
+import time
+import operator
+from instrumentacion import instrumentacion
+from cache_lru import CacheLRU
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_ANIMACIONES = os.path.join(BASE_DIR, 'animations')
+
+
+def _redondear(valor, decimales):
+    if isinstance(valor, float):
+        return round(valor, decimales)
+    if isinstance(valor, list):
+        return [_redondear(v, decimales) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _redondear(v, decimales) for k, v in valor.items()}
+    return valor
+
+
+class _Animacion:
+    def __init__(self, firma, datos, texto, tiempo_carga):
+        self.firma = firma
+        self.datos = datos
+        self.texto = texto  # JSON minificado (pre-serializado, bytes)
+        self.tiempo_carga = tiempo_carga
+        self.usos = 0
+
+
+class RegistroAnimaciones:
+    def __init__(self, directorio=DIRECTORIO_ANIMACIONES, limite_bytes=8 * 1024 * 1024, decimales=None):
+        self.directorio = directorio
+        self.limite_bytes = limite_bytes
+        self.decimales = decimales
+        # nombre -> _Animacion; vale mientras la firma del archivo (mtime, tamaño) sea la misma
+        self._animaciones = CacheLRU(max_entradas=None, max_peso=limite_bytes,
+                                     peso=lambda a: len(a.texto), mismo_origen=operator.eq)
+
+    def _obtener_animacion(self, nombre):
+        ruta = os.path.join(self.directorio, nombre)
+        st = os.stat(ruta)
+        firma = (st.st_mtime_ns, st.st_size)
+        animacion = self._animaciones.obtener(nombre, firma)
+        if animacion is not None:
+            animacion.usos += 1
+            return animacion
+
+        inicio = time.perf_counter()
+        with open(ruta, "r") as f:
+            datos = json.load(f)
+        if self.decimales is not None:
+            datos = _redondear(datos, self.decimales)
+        texto = json.dumps(datos, separators=(',', ':'), ensure_ascii=False).encode()
+        animacion = _Animacion(firma, datos, texto, time.perf_counter() - inicio)
+        animacion.usos = 1
+        instrumentacion.registrar('animaciones.carga', animacion.tiempo_carga)
+
+        # Respeta el límite de memoria descartando las menos usadas recientemente
+        self._animaciones.guardar(nombre, animacion, firma)
+        return animacion
+
+    # Devuelve el dict de la animación; lanza FileNotFoundError o json.JSONDecodeError como json.load
+    def obtener(self, nombre):
+        return self._obtener_animacion(nombre).datos
+
+    # JSON minificado en bytes, listo para enviar tal cual
+    def obtener_texto(self, nombre):
+        return self._obtener_animacion(nombre).texto
+
+    def estadisticas(self):
+        return [
+            {
+                'animacion': nombre,
+                'bytes_archivo': a.firma[1],
+                'bytes_minificado': len(a.texto),
+                'tiempo_carga_s': a.tiempo_carga,
+                'usos': a.usos,
+            }
+            for nombre, a in self._animaciones.elementos()
+        ]
+
+
+registro_animaciones = RegistroAnimaciones()
+instrumentacion.registrar_fuente('animaciones', registro_animaciones.estadisticas)
@@ -7,11 +7,41 @@ import streamlit as st
 import plotly.express as px
 from streamlit_lottie import st_lottie
 import streamlit.components.v1 as components
-from modelo_prediccion import predecir_trafico_diario
+from modelo_prediccion import predecir_trafico_diario, predecir_rango, mejores_salidas, COLUMNAS_PROBABILIDAD
+from esquema import RutaDesconocida
+from datos import cargar_datos_trafico, cargar_datos_rutas
+from animaciones import registro_animaciones
+from instrumentacion import Etapas, instrumentacion
+from rutas import COORDENADAS, motor_rutas
+from graficos import cache_figuras, clave_filtros, figura_flujo_hora, figura_promedio_zona
+from tabla import FILAS_POR_PAGINA, cache_vistas, parquet_disponible
 
 api_key = st.secrets["API_KEY"]
 
+# Panel de rendimiento (opcional): se muestra solo con ?debug=1 en la URL
+def mostrar_panel_rendimiento(duraciones):
+    resumen = instrumentacion.resumen()
+    with st.sidebar:
+        st.header("🔧 Rendimiento", anchor=False)
+        st.metric("Render actual", f"{duraciones['total'] * 1000:.0f} ms")
+        st.dataframe(pd.DataFrame({"Etapa": list(duraciones), "ms": [round(d * 1000, 1) for d in duraciones.values()]}), hide_index=True)
+
+        st.subheader("Tramos acumulados", anchor=False)
+        tramos = pd.DataFrame.from_dict(resumen["tramos"], orient="index")
+        if not tramos.empty:
+            tramos = (tramos[["llamadas", "ultimo_s", "promedio_s", "p95_s"]] * [1, 1000, 1000, 1000]).round(2)
+            tramos.columns = ["Llamadas", "Último ms", "Promedio ms", "p95 ms"]
+            st.dataframe(tramos)
+
+        st.subheader("Contadores y cachés", anchor=False)
+        valores = {**resumen["contadores"], **resumen["valores"]}
+        st.dataframe(pd.DataFrame({"Métrica": list(valores), "Valor": [round(v, 4) for v in valores.values()]}), hide_index=True)
+
+        st.download_button("Exportar JSON lines", instrumentacion.a_json_lineas(), file_name="metricas.jsonl", mime="application/x-ndjson")
+        st.download_button("Exportar Prometheus", instrumentacion.a_prometheus(), file_name="metricas.prom", mime="text/plain")
+
 def main():
+    etapas = Etapas("app")
     # Configuración de la página
     st.set_page_config(
     page_title="Web Predicción de Tráfico",
@@ -24,24 +54,12 @@ def main():
         'About': "# Navegación Inteligente para una Lima sin Tráfico\n\nEsta aplicación utiliza modelos predictivos avanzados para optimizar el flujo vehicular en Lima, Perú. Desarrollada por APVD Software Innovators.\n\n## Contacto\nPara más información, visita [tu sitio web](https://www.tusitio.com) o contáctanos a través de nuestras redes sociales."
     })
     
-    # Carga y preprocesamiento del dataset
-    datosTrafico = pd.read_csv("Dataset_limpio.csv")
-    datosTrafico["Fecha"] = pd.to_datetime(datosTrafico["Fecha"], format="%Y-%m-%d")
-    datosTrafico["HoraInicio"] = pd.to_datetime(datosTrafico["HoraInicio"], format="%H:%M").dt.strftime("%H:%M")
-    
-    # Asegúrate de que estas columnas existen en tu CSV o ajústa los nombres
-    if 'Feriado' not in datosTrafico.columns:
-        datosTrafico['Feriado'] = 'No' 
-    if 'Evento' not in datosTrafico.columns:
-        datosTrafico['Evento'] = 'Ninguno' 
-    if 'Congestion' not in datosTrafico.columns:
-        datosTrafico['Congestion'] = pd.cut(datosTrafico['FlujoVehicular'], 
-                                            bins=[0, 100, 500, 1000, datosTrafico['FlujoVehicular'].max()],
-                                            labels=['Baja', 'Media', 'Alta', 'Muy Alta'])
-        datosTrafico['Congestion'] = datosTrafico['Congestion'].astype(str)
-
-    datosTraficoF = pd.read_csv("dataset_trafico_limpio.csv")
-    tablaTrafico = pd.DataFrame(datosTraficoF)
+    # Carga y preprocesamiento del dataset (una vez por proceso, ver datos.py)
+    datos = cargar_datos_trafico()
+    datosTrafico = datos.df
+
+    datosTraficoF = cargar_datos_rutas()
+    etapas.marcar("carga_datos")
 
     # --- ENCABEZADO DE LA PAGINA ---
     st.html("""
@@ -117,49 +135,96 @@ def main():
     st.header("Noticias de Tráfico", False)
     st.info(f_nt,icon="ℹ")
     st.divider()
+    etapas.marcar("encabezado")
 
     # --- SECCION DE PREDICCION ---
     st.header("Predicción de Tráfico 🚧", False)
     inputs1, inputs2 , inputs3 = st.columns(3)
     with inputs1:
-        ubica_pred = st.selectbox("Ubicación de inicio 🏁.",sorted(datosTrafico["Zona"].unique()), key=333, placeholder="Todas", index= None)
+        ubica_pred = st.selectbox("Ubicación de inicio 🏁.",datos.zonas, key=333, placeholder="Todas", index= None)
     with inputs2:
         fecha_pred = st.date_input("Selecciona la fecha de predicción", value="today", min_value=datetime.date(2025, 1, 1), max_value=datetime.date(2025, 12, 31))
     with inputs3:
         feriado = st.selectbox("¿Es feriado?", ["No", "Si"], index=None, key=444, placeholder="Selecciona una opción")
+    # Sin incertidumbre la predicción sale de la tabla precalculada; con ella, de los árboles del modelo
+    incertidumbre = st.toggle("Mostrar incertidumbre (P10 - P90 y probabilidad de congestión)", key=777)
     
     if str(ubica_pred) and str(feriado) == "None":
         st.info("Por favor, selecciona una ubicación de inicio válida.", icon="ℹ")
     else:
-        prediccion = predecir_trafico_diario(str(ubica_pred), str(fecha_pred), str(feriado))
-        st.dataframe(prediccion, hide_index=True)
-        grafico_pre = px.area(prediccion, x="Intervalo", y="FlujoVehicular", color="Ruta", labels={"Intervalo": "Horas", "FlujoVehicular": "Flujo Vehicular"}, title="Flujo Vehicular por Hora por Zona")
-        st.plotly_chart(grafico_pre, use_container_width=True)
-    
+        try:
+            prediccion = predecir_trafico_diario(str(ubica_pred), str(fecha_pred), str(feriado), con_incertidumbre=incertidumbre)
+        except RutaDesconocida:
+            st.warning(f"El modelo no tiene datos de '{ubica_pred}'. Selecciona otra ubicación.")
+        else:
+            # Probabilidad de cada nivel de congestión según los árboles del modelo
+            st.dataframe(prediccion, hide_index=True, column_config={
+                c: st.column_config.ProgressColumn(c.replace("Prob", "P. "), format="percent", min_value=0, max_value=1)
+                for c in COLUMNAS_PROBABILIDAD if c in prediccion})
+            grafico_pre = px.area(prediccion, x="Intervalo", y="FlujoVehicular", color="Ruta", labels={"Intervalo": "Horas", "FlujoVehicular": "Flujo Vehicular"}, title="Flujo Vehicular por Hora por Zona")
+            if incertidumbre:
+                # Banda P10-P90
+                grafico_pre.add_scatter(x=prediccion["Intervalo"], y=prediccion["FlujoP90"], mode="lines", line_width=0, showlegend=False, name="P90")
+                grafico_pre.add_scatter(x=prediccion["Intervalo"], y=prediccion["FlujoP10"], mode="lines", line_width=0, fill="tonexty",
+                                        fillcolor="rgba(255, 165, 0, 0.3)", name="P10 - P90")
+            st.plotly_chart(grafico_pre, use_container_width=True)
+
+    etapas.marcar("prediccion")
+
+    # --- PRONOSTICO POR RANGO (varias rutas x varios dias) ---
+    st.subheader("Pronóstico por rango de fechas 📆", anchor=False)
+    rango1, rango2, rango3 = st.columns(3)
+    with rango1:
+        rutas_rango = st.multiselect("Rutas 🛣️", datos.zonas, default=datos.zonas[:3])
+    with rango2:
+        hoy = min(max(datetime.date.today(), datetime.date(2025, 1, 1)), datetime.date(2025, 12, 31))
+        rango_fechas = st.date_input("Rango de fechas", value=(hoy, min(hoy + datetime.timedelta(days=6), datetime.date(2025, 12, 31))), min_value=datetime.date(2025, 1, 1), max_value=datetime.date(2025, 12, 31))
+    with rango3:
+        franja = st.slider("Franja de salida (horas)", 0, 23, (6, 22))
+
+    if not rutas_rango or len(rango_fechas) != 2:
+        st.info("Selecciona al menos una ruta y un rango de fechas completo.", icon="ℹ")
+    else:
+        dias_rango = pd.date_range(rango_fechas[0], rango_fechas[1], freq="D")
+        feriados_rango = st.multiselect("Días feriados del rango", dias_rango.date, format_func=lambda d: d.strftime("%d/%m/%Y"))
+        try:
+            pronostico = predecir_rango(rutas_rango, rango_fechas[0], rango_fechas[1], feriados_rango)
+        except RutaDesconocida as e:
+            st.warning(f"No se pudo pronosticar: {e}")
+        else:
+            mapa1, mapa2 = st.columns([2, 1])
+            with mapa1:
+                ruta_mapa = st.selectbox("Mapa de calor", ["Promedio de las rutas"] + list(pronostico["Ruta"].unique()))
+                datos_mapa = pronostico if ruta_mapa == "Promedio de las rutas" else pronostico[pronostico["Ruta"] == ruta_mapa]
+                matriz = datos_mapa.pivot_table(index="Intervalo", columns="Fecha", values="FlujoVehicular", aggfunc="mean")
+                dias_semana = datos_mapa.drop_duplicates("Fecha").set_index("Fecha")["DiaSemana"]
+                matriz.columns = [f"{f:%d/%m} {dias_semana[f][:3]}" for f in matriz.columns]
+                grafico_mapa = px.imshow(matriz, aspect="auto", color_continuous_scale="RdYlGn_r", labels={"x": "Día", "y": "Hora", "color": "Flujo Vehicular"}, title="Flujo Vehicular por Hora y Día")
+                st.plotly_chart(grafico_mapa, use_container_width=True)
+            with mapa2:
+                st.markdown("**Mejor hora de salida**")
+                salidas = mejores_salidas(pronostico, *franja)
+                salidas["Fecha"] = salidas["Fecha"].dt.strftime("%d/%m/%Y")
+                st.dataframe(salidas[["Ruta", "Fecha", "DiaSemana", "MejorSalida", "FlujoVehicular", "Congestion"]], hide_index=True, height=430)
+
+    etapas.marcar("pronostico_rango")
+
     # --- SECCION DEL MAPA ---
     cl1, cl2 = st.columns(2)
     with cl1:
         st.subheader("Elige tu ruta deseada 🚘", False)
-        ubi_start = st.selectbox("Ubicación de inicio 🏁.",sorted(datosTrafico["Zona"].unique()), key=111, placeholder="Todas", index= None)
-        ubi_end = st.selectbox("Ubicación de destino 🔚.",sorted(datosTrafico["Zona"].unique()), key=222, placeholder="Todas",index= None)
-
-        # Coordenadas de las zonas para el mapa
-        coordinates = {
-            "Av. Paseo de la Republica": {"lat": -12.113697, "lon": -77.025533}, 
-            "Av. Alfredo Benavides": {"lat": -12.128233, "lon": -77.005189}, 
-            "Av. Universitaria": {"lat": -12.001329, "lon": -77.083796}, 
-            "Av. de la Marina": {"lat": -12.0600, "lon": -77.0800}, 
-            "Av. Abancay": {"lat": -12.050864, "lon": -77.028302}, 
-            "Av. Mexico": {"lat": -12.072974, "lon": -77.015255},  
-            "Av. Argentina": {"lat": -12.050587, "lon": -77.122449}, 
-            "Av. Venezuela": {"lat": -12.060980, "lon": -77.083312},  
-        }
-        zones = datosTrafico["Zona"].unique()
+        ubi_start = st.selectbox("Ubicación de inicio 🏁.",datos.zonas, key=111, placeholder="Todas", index= None)
+        ubi_end = st.selectbox("Ubicación de destino 🔚.",datos.zonas, key=222, placeholder="Todas",index= None)
+
+        hora_ruta = st.selectbox("Hora de salida 🕗", [f"{h:02d}:00" for h in range(24)], index=8, key=555)
+        feriado_ruta = st.toggle("Feriado", key=666)
+
+        zones = [zone for zone in datosTrafico["Zona"].unique() if zone in COORDENADAS]
         map_data = pd.DataFrame(
-            [{"Zona": zone, "lat": coordinates[zone]["lat"], "lon": coordinates[zone]["lon"]} for zone in zones]
+            [{"Zona": zone, "lat": COORDENADAS[zone]["lat"], "lon": COORDENADAS[zone]["lon"]} for zone in zones]
         )
         map_data = map_data.merge(
-            datosTrafico.groupby("Zona")["FlujoVehicular"].mean().reset_index(),
+            datos.cubo.promedio_por_zona(),
             on="Zona",
             how="left"
         )
@@ -192,35 +257,50 @@ def main():
                         height="510" width= "100%"
                     ></iframe>
                 </div>""",height=520)
+
+    # Recomendación local: grafo de rutas.py con el flujo pronosticado para la fecha de predicción
+    if ubi_start in COORDENADAS and ubi_end in COORDENADAS and ubi_start != ubi_end:
+        feriado_ruta = "si" if feriado_ruta else "no"
+        try:
+            ruta = motor_rutas.ruta_optima(ubi_start, ubi_end, fecha_pred, int(hora_ruta[:2]), feriado_ruta)
+            salidas_ruta = motor_rutas.mejores_salidas(ubi_start, ubi_end, fecha_pred, feriado_ruta, 5, 22).head(5)
+        except RutaDesconocida as e:
+            st.warning(f"No se pudo estimar la ruta: {e}")
+        else:
+            st.markdown(f"**Ruta recomendada ({fecha_pred:%d/%m/%Y}):** {' → '.join(ruta['camino'])}")
+            ruta1, ruta2, ruta3 = st.columns(3)
+            ruta1.metric("Tiempo estimado", f"{ruta['minutos']:.0f} min")
+            ruta2.metric("Distancia", f"{ruta['km']} km")
+            ruta3.metric("Llegada", ruta["llegada"])
+            tramos1, tramos2 = st.columns(2)
+            with tramos1:
+                st.dataframe(pd.DataFrame(ruta["tramos"]), hide_index=True)
+            with tramos2:
+                st.dataframe(salidas_ruta.rename(columns={"Salida": "Mejores salidas"}), hide_index=True)
     st.divider()
+    etapas.marcar("mapa")
 
 
     # --- SECCION DE FILTROS Y GRAFICOS (ANCHO COMPLETO) ---
     st.subheader("Análisis de Flujo Vehicular y Congestión", anchor=False)
     
-    opciones_feriado = ["Todas"] + sorted(datosTrafico["Feriado"].astype(str).unique().tolist())
-    opciones_eventos = ["Todas"] + sorted(datosTrafico["Evento"].astype(str).unique().tolist())
-    opciones_congestion = ["Todas"] + sorted(datosTrafico["Congestion"].astype(str).unique().tolist())
+    opciones_feriado = ["Todas"] + datos.opciones_feriado
+    opciones_eventos = ["Todas"] + datos.opciones_eventos
+    opciones_congestion = ["Todas"] + datos.opciones_congestion
 
     f1, f2, f3 = st.columns(3, vertical_alignment="center")
     with f1:
-        fecha_sel = st.selectbox("Fecha 📅", sorted(datosTrafico["Fecha"].dt.date.unique(), reverse=True), index=0)
-        zona_sel = st.selectbox("Zona 🗾", ["Todas"] + sorted(datosTrafico["Zona"].unique()))
+        fecha_sel = st.selectbox("Fecha 📅", datos.fechas, index=0)
+        zona_sel = st.selectbox("Zona 🗾", ["Todas"] + datos.zonas)
     with f2:
         feriado_sel = st.selectbox("Feriado 📆", opciones_feriado)
         evento_sel = st.selectbox("Eventos 🎉", opciones_eventos)
     with f3:
         congestion_sel = st.selectbox("Congestion 🚥", opciones_congestion)
 
-    df_filt = datosTrafico[datosTrafico["Fecha"].dt.date == fecha_sel]
-    if zona_sel != "Todas":
-        df_filt = df_filt[df_filt["Zona"] == zona_sel]
-    if feriado_sel != "Todas":
-        df_filt = df_filt[df_filt["Feriado"].astype(str) == feriado_sel]
-    if evento_sel != "Todas":
-        df_filt = df_filt[df_filt["Evento"].astype(str) == evento_sel]
-    if congestion_sel != "Todas":
-        df_filt = df_filt[df_filt["Congestion"].astype(str) == congestion_sel]
+    # Filtro indexado y memorizado (ver filtros.py)
+    criterios = dict(Fecha=fecha_sel, Zona=zona_sel, Feriado=feriado_sel, Evento=evento_sel, Congestion=congestion_sel)
+    df_filt = datos.filtros.filtrar(**criterios)
 
     if df_filt.empty:
         st.warning("No hay datos para mostrar con los filtros seleccionados. Por favor, ajusta tus selecciones.")
@@ -236,44 +316,11 @@ def main():
 
             # Para el gráfico de flujo vehicular por hora, pivotamos después de filtrar
             if not df_filt.empty:
-                # Aseguramos que la columna 'Zona' se use para el color
-                # Convertimos a formato "long" para que Plotly Express pueda mapear el color fácilmente
-                df_long = df_filt.melt(id_vars=["HoraInicio", "Zona"], 
-                                       value_vars=["FlujoVehicular"], 
-                                       var_name="Metrica", 
-                                       value_name="Valor")
-                
-                # Filtrar solo la métrica de FlujoVehicular si se ha derretido otras
-                df_long = df_long[df_long['Metrica'] == 'FlujoVehicular']
-
-                # Definir una paleta de colores consistente
-                # Puedes definir tus propios colores aquí si quieres un mapeo específico
-                # Ejemplo: color_map = {"Av. Javier Prado": "red", "Av. Paseo de la Republica": "blue", ...}
-                # Para un número mayor de zonas, Plotly usará su paleta por defecto si no se especifica.
-                
-                if tipo_grafico == "Área":
-                    fig = px.area(df_long, x="HoraInicio", y="Valor", color="Zona",
-                                  labels={"Valor": "Flujo Vehicular", "HoraInicio": "Hora"},
-                                  title="Flujo Vehicular por Hora por Zona")
-                elif tipo_grafico == "Línea":
-                    fig = px.line(df_long, x="HoraInicio", y="Valor", color="Zona",
-                                  labels={"Valor": "Flujo Vehicular", "HoraInicio": "Hora"},
-                                  title="Flujo Vehicular por Hora por Zona")
-                elif tipo_grafico == "Barra":
-                    # Para barras, se podría acumular o mostrar barras agrupadas por zona.
-                    # Aquí agrupamos para mostrar barras por zona en cada hora
-                    fig = px.bar(df_long, x="HoraInicio", y="Valor", color="Zona", barmode='group',
-                                 labels={"Valor": "Flujo Vehicular", "HoraInicio": "Hora"},
-                                 title="Flujo Vehicular por Hora por Zona")
-                elif tipo_grafico == "Línea con Marcadores":
-                    fig = px.scatter(df_long, x="HoraInicio", y="Valor", color="Zona",
-                                     labels={"Valor": "Flujo Vehicular", "HoraInicio": "Hora"},
-                                     title="Flujo Vehicular por Hora por Zona")
-                    fig.update_traces(mode='lines+markers')
-                else:  # Boxplot
-                    fig = px.box(df_long, x="HoraInicio", y="Valor", color="Zona", points="all",
-                                 labels={"Valor": "Flujo Vehicular", "HoraInicio": "Hora"},
-                                 title="Flujo Vehicular por Hora por Zona (Boxplot)")
+                # Promedio por zona y hora leído del cubo de resumen (ver cubo.py), ya en
+                # formato "long" para que Plotly Express pueda mapear el color fácilmente.
+                # La figura se memoriza por tipo y filtros; con muchos puntos se reduce (ver graficos.py)
+                fig = cache_figuras.figura(("hora", tipo_grafico, clave_filtros(criterios)), datos,
+                                            lambda: figura_flujo_hora(tipo_grafico, datos.cubo.flujo_por_zona_hora(**criterios), df_filt))
 
                 st.plotly_chart(fig, use_container_width=True)
             else:
@@ -282,62 +329,17 @@ def main():
         elif grafico_seleccionado == "Flujo Vehicular Promedio por Zona":
             tipo_grafico_2 = st.radio("Tipo de gráfico", ["Barras", "Torta", "Barras Horizontales", "Rosquilla", "Dispersión"], horizontal=True)
 
-            promedio_zona = df_filt.groupby("Zona")["FlujoVehicular"].mean().reset_index()
+            promedio_zona = datos.cubo.promedio_por_zona(**criterios)
 
             if promedio_zona.empty:
                 st.warning("No hay datos para calcular el promedio de flujo vehicular por zona con los filtros aplicados.")
             else:
-                if tipo_grafico_2 == "Barras":
-                    fig2 = px.bar(
-                        promedio_zona,
-                        x="Zona",
-                        y="FlujoVehicular",
-                        labels={"FlujoVehicular": "Flujo Vehicular Promedio", "Zona": "Zona"},
-                        color="Zona", # Aseguramos el color por Zona
-                        color_continuous_scale="Viridis", # Esto se aplicará si 'color' es una columna numérica
-                        title="Flujo Vehicular Promedio por Zona"
-                    )
-                elif tipo_grafico_2 == "Torta":
-                    fig2 = px.pie(
-                        promedio_zona,
-                        names="Zona",
-                        values="FlujoVehicular",
-                        title="Flujo Vehicular Promedio por Zona",
-                        color="Zona" # Aseguramos el color por Zona
-                    )
-                elif tipo_grafico_2 == "Barras Horizontales":
-                    fig2 = px.bar(
-                        promedio_zona,
-                        x="FlujoVehicular",
-                        y="Zona",
-                        orientation='h',
-                        labels={"FlujoVehicular": "Flujo Vehicular Promedio", "Zona": "Zona"},
-                        color="Zona", # Aseguramos el color por Zona
-                        color_continuous_scale="Viridis",
-                        title="Flujo Vehicular Promedio por Zona"
-                    )
-                elif tipo_grafico_2 == "Rosquilla":
-                    fig2 = px.pie(
-                        promedio_zona,
-                        names="Zona",
-                        values="FlujoVehicular",
-                        hole=0.4,
-                        title="Flujo Vehicular Promedio por Zona",
-                        color="Zona" # Aseguramos el color por Zona
-                    )
-                else:  # Dispersión
-                    fig2 = px.scatter(
-                        promedio_zona,
-                        x="Zona",
-                        y="FlujoVehicular",
-                        size="FlujoVehicular",
-                        color="Zona",
-                        labels={"FlujoVehicular": "Flujo Vehicular Promedio", "Zona": "Zona"},
-                        title="Flujo Vehicular Promedio por Zona"
-                    )
+                fig2 = cache_figuras.figura(("zona", tipo_grafico_2, clave_filtros(criterios)), datos,
+                                             lambda: figura_promedio_zona(tipo_grafico_2, promedio_zona))
                 st.plotly_chart(fig2, use_container_width=True)
 
     st.divider()
+    etapas.marcar("graficos")
 
     # --- SECCION DE MULTIPLES METRICAS Y ANIMACIONES ---
     st.subheader("Métricas Clave y Estado del Tráfico", anchor=False)
@@ -347,12 +349,11 @@ def main():
     # --- PRIMERA MÉTRICA Y ANIMACIÓN (Max Flujo Vehicular) ---
     with metric_col1:
         st.markdown('<div class="metric-container">', unsafe_allow_html=True)
-        max_flujo_vehicular = datosTrafico["FlujoVehicular"].max()
+        max_flujo_vehicular = datos.cubo.maximo()
         st.header(f"{max_flujo_vehicular}", anchor=False)
         st.write("max flujo vehicular")
         try:
-            with open("animations/trafico.json", "r") as f:
-                lottie_animation1 = json.load(f)
+            lottie_animation1 = registro_animaciones.obtener("trafico.json")
             st_lottie(lottie_animation1, speed=1, reverse=False, loop=True, quality="high", height=100, width=100, key="traffic_animation_1")
         except FileNotFoundError:
             st.error("Animación 'trafico.json' no encontrada.")
@@ -363,12 +364,11 @@ def main():
     # --- SEGUNDA MÉTRICA Y ANIMACIÓN (Ejemplo: Promedio de Flujo Vehicular) ---
     with metric_col2:
         st.markdown('<div class="metric-container">', unsafe_allow_html=True)
-        promedio_flujo = int(datosTrafico["FlujoVehicular"].mean())
+        promedio_flujo = int(datos.cubo.promedio())
         st.header(f"{promedio_flujo}", anchor=False)
         st.write("promedio flujo vehicular")
         try:
-            with open("animations/grafico2.json", "r") as f:
-                lottie_animation2 = json.load(f)
+            lottie_animation2 = registro_animaciones.obtener("grafico2.json")
             st_lottie(lottie_animation2, speed=1, reverse=False, loop=True, quality="high", height=100, width=100, key="traffic_animation_2")
         except FileNotFoundError:
             st.error("Animación 'grafico2.json' no encontrada.")
@@ -382,8 +382,7 @@ def main():
         st.header("5", anchor=False)
         st.write("zonas con alta congestión")
         try:
-            with open("animations/grafico.json", "r") as f:
-                lottie_animation3 = json.load(f)
+            lottie_animation3 = registro_animaciones.obtener("grafico.json")
             st_lottie(lottie_animation3, speed=1, reverse=False, loop=True, quality="high", height=100, width=100, key="traffic_animation_3")
         except FileNotFoundError:
             st.error("Animación 'grafico.json' no encontrada.")
@@ -397,8 +396,7 @@ def main():
         st.header("12k", anchor=False)
         st.write("vehículos en movimiento")
         try:
-            with open("animations/carro.json", "r") as f:
-                lottie_animation4 = json.load(f)
+            lottie_animation4 = registro_animaciones.obtener("carro.json")
             st_lottie(lottie_animation4, speed=1, reverse=False, loop=True, quality="high", height=100, width=100, key="traffic_animation_4")
         except FileNotFoundError:
             st.error("Animación 'carro.json' no encontrada.")
@@ -407,7 +405,45 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
             
     st.divider()
-    st.dataframe(tablaTrafico, hide_index=True)
+    etapas.marcar("metricas_animaciones")
+    # --- TABLA DE DATOS: filtros y orden en el servidor, solo se envía la página visible (ver tabla.py) ---
+    st.subheader("Datos de tráfico por ruta 📋", anchor=False)
+    col_t1, col_t2, col_t3 = st.columns(3)
+    with col_t1:
+        rutas_tabla = st.multiselect("Rutas de la tabla 🛣️", datosTraficoF["Ruta"].cat.categories, placeholder="Todas")
+        congestion_tabla = st.multiselect("Nivel de congestión 🚦", sorted(datosTraficoF["Congestion"].unique()), placeholder="Todas")
+    with col_t2:
+        fecha_min, fecha_max = datosTraficoF["Fecha"].min().date(), datosTraficoF["Fecha"].max().date()
+        fechas_tabla = st.date_input("Fechas de la tabla 📅", (fecha_min, fecha_max), min_value=fecha_min, max_value=fecha_max)
+        orden_tabla = st.selectbox("Ordenar por", datosTraficoF.columns, index=None, placeholder="Orden original")
+    with col_t3:
+        filas_tabla = st.selectbox("Filas por página", FILAS_POR_PAGINA, index=1)
+        descendente_tabla = st.toggle("Descendente")
+
+    filtros_tabla = {"Ruta": rutas_tabla, "Congestion": congestion_tabla}
+    if len(fechas_tabla) == 2:
+        filtros_tabla["Fecha"] = tuple(fechas_tabla)
+    vista = cache_vistas.vista(datosTraficoF, filtros_tabla, orden_tabla, descendente_tabla)
+
+    paginas_tabla = vista.paginas(filas_tabla)
+    pagina_tabla = st.number_input("Página", min_value=1, max_value=paginas_tabla, value=1, step=1)
+    st.dataframe(vista.pagina(pagina_tabla, filas_tabla), hide_index=True)
+    inicio_tabla = min(vista.total, (pagina_tabla - 1) * filas_tabla + 1)
+    st.caption(f"Filas {inicio_tabla}–{min(vista.total, pagina_tabla * filas_tabla)} de {vista.total} (página {pagina_tabla} de {paginas_tabla})")
+
+    # Las descargas se generan recién al hacer clic, no en cada rerun
+    col_d1, col_d2 = st.columns(2)
+    with col_d1:
+        st.download_button("Descargar CSV", vista.a_csv, file_name="trafico_rutas.csv", mime="text/csv", disabled=vista.total == 0)
+    with col_d2:
+        if parquet_disponible():
+            st.download_button("Descargar Parquet", vista.a_parquet, file_name="trafico_rutas.parquet",
+                               mime="application/vnd.apache.parquet", disabled=vista.total == 0)
+    etapas.marcar("tabla")
+
+    duraciones = etapas.terminar()
+    if st.query_params.get("debug") == "1":
+        mostrar_panel_rendimiento(duraciones)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,290 @@
+#=====================
+#   BENCHMARKS
+#=====================
+# Mide los caminos calientes de la app con datasets sintéticos de 1x, 10x y
+# 100x el tamaño de los CSV actuales (mismo esquema, generados con semilla
+# fija) y guarda los tiempos como JSON. Corre sin pantalla: no levanta
+# Streamlit y los gráficos solo se construyen y serializan.
+#
+#   - carga: read_csv y lectura compacta (formato_compacto.py) de ambos datasets;
+#   - tablero: preparación de DatosTrafico (filtros + cubo);
+#   - filtros: máscara booleana + groupby (como el app.py original), motor de
+#     filtros sin memoria y consultas al cubo;
+#   - figuras: construcción (graficos.py) + to_json de los gráficos de la sección
+#     de análisis, incluido un boxplot por encima de PRESUPUESTO_PUNTOS;
+#   - modelo: entrenamiento y latencia de predicción (una consulta y lote de 100).
+#     Entrenar 100 árboles con 100x filas tarda muchos minutos en una sola CPU,
+#     así que el modelo se mide solo hasta --max-escala-modelo (10 por defecto).
+#
+# Uso:
+#   python benchmark.py ejecutar [--escalas 1 10 100] [--repeticiones 5] [--max-escala-modelo 10] [--salida benchmarks/base.json]
+#   python benchmark.py comparar benchmarks/base.json benchmarks/nuevo.json [--umbral 0.25]
+#     (sale con código 1 si algún camino empeoró más que el umbral)
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import datetime
+import tempfile
+import statistics
+from importlib.metadata import version
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_BENCHMARKS = os.path.join(BASE_DIR, 'benchmarks')
+RUTA_TABLERO = os.path.join(BASE_DIR, 'Dataset_limpio.csv')
+RUTA_MODELO = os.path.join(BASE_DIR, 'dataset_trafico_limpio.csv')
+SEMILLA = 2025
+
+# Diferencias menores a esto se consideran ruido aunque superen el umbral relativo
+MINIMO_ABSOLUTO_S = 0.002
+
+
+# 1. Datasets sintéticos: el perfil promedio por ruta y hora del CSV real, repetido
+#    sobre tantos días como haga falta para llegar a la escala, con ruido
+def _fechas(n_dias):
+    return pd.date_range('2023-01-01', periods=n_dias, freq='D')
+
+
+def _flujos(perfil, n, azar):
+    ruido = azar.normal(1.0, 0.15, size=n)
+    return np.clip(np.round(perfil * ruido), 0, None).astype(int)
+
+
+def generar_tablero(escala, azar):
+    base = pd.read_csv(RUTA_TABLERO)
+    perfil = base.groupby(['Zona', 'HoraInicio'])['FlujoVehicular'].mean()
+    zonas = perfil.index.get_level_values(0).unique()
+    fechas = _fechas(base['Fecha'].nunique() * escala)
+    horas = [f"{h:02d}:00" for h in range(24)]
+
+    z, f, h = np.meshgrid(np.arange(len(zonas)), np.arange(len(fechas)), np.arange(24), indexing='ij')
+    z, f, h = z.ravel(), f.ravel(), h.ravel()
+    flujos = _flujos(perfil.to_numpy().reshape(len(zonas), 24)[z, h], len(z), azar)
+    from modelo_prediccion import calcular_congestion_vectorizada
+    return pd.DataFrame({
+        'Zona': zonas.to_numpy()[z],
+        'Fecha': fechas.strftime('%Y-%m-%d').to_numpy()[f],
+        'DiaSemana': fechas.day_name().to_numpy()[f],
+        'HoraInicio': np.asarray(horas)[h],
+        'HoraFin': np.asarray(horas[1:] + horas[:1])[h],
+        'Feriado': np.where(azar.random(len(fechas)) < 0.05, 'si', 'no')[f],
+        'EventoEspecial': azar.choice(base['EventoEspecial'].unique(), size=len(z)),
+        'FlujoVehicular': flujos,
+        'Congestion': [c.lower() for c in calcular_congestion_vectorizada(flujos)],
+    })
+
+
+def generar_modelo(escala, azar):
+    base = pd.read_csv(RUTA_MODELO)
+    perfil = base.groupby(['Ruta', 'Intervalo'])['FlujoVehicular'].mean().unstack().reindex(columns=sorted(base['Intervalo'].unique()))
+    rutas = perfil.index.to_numpy()
+    fechas = _fechas(base['Fecha'].nunique() * escala)
+
+    r, f, h = np.meshgrid(np.arange(len(rutas)), np.arange(len(fechas)), np.arange(24), indexing='ij')
+    r, f, h = r.ravel(), f.ravel(), h.ravel()
+    flujos = _flujos(perfil.to_numpy()[r, h], len(r), azar)
+    from modelo_prediccion import calcular_congestion_vectorizada
+    from esquema import DIAS_SEMANA
+    return pd.DataFrame({
+        'Ruta': rutas[r],
+        'Fecha': fechas.strftime('%Y-%m-%d').to_numpy()[f],
+        'DiaSemana': DIAS_SEMANA[fechas.dayofweek.to_numpy()][f],
+        'Intervalo': perfil.columns.to_numpy()[h],
+        'Feriado': np.where(azar.random(len(fechas)) < 0.05, 'si', 'no')[f],
+        'EventoEspecial': azar.choice(base['EventoEspecial'].unique(), size=len(r)),
+        'FlujoVehicular': flujos,
+        'Congestion': [c.lower() for c in calcular_congestion_vectorizada(flujos)],
+    })
+
+
+# 2. Medición: mediana y mínimo de varias repeticiones (tras una de calentamiento
+#    si se pide); antes de cada repetición se puede limpiar estado con `preparar`
+def medir(funcion, repeticiones, calentar=True, preparar=None):
+    if calentar:
+        if preparar:
+            preparar()
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {'mediana_s': statistics.median(tiempos), 'minimo_s': min(tiempos), 'repeticiones': repeticiones}
+
+
+def _criterios_ejemplo(datos):
+    return [dict(Fecha=fecha, Zona=zona, Feriado='Todas', Evento='Todas', Congestion='Todas')
+            for fecha in datos.fechas[:3] for zona in ['Todas'] + datos.zonas[:2]]
+
+
+def medir_escala(escala, repeticiones, directorio, con_modelo=True):
+    import formato_compacto
+    import datos as capa_datos
+    import modelo_prediccion
+    import graficos
+    from entrenar_modelo import HIPERPARAMETROS, cargar_datos_entrenamiento, construir_modelo, ajustar, features, target
+    from motor_bosque import exportar_motor
+
+    azar = np.random.default_rng(SEMILLA + escala)
+    ruta_tablero = os.path.join(directorio, f'Dataset_limpio_{escala}x.csv')
+    ruta_modelo = os.path.join(directorio, f'dataset_trafico_limpio_{escala}x.csv')
+    generar_tablero(escala, azar).to_csv(ruta_tablero, index=False)
+    generar_modelo(escala, azar).to_csv(ruta_modelo, index=False)
+    formato_compacto.DIRECTORIO_COMPACTO = os.path.join(directorio, 'compacto')
+
+    resultados = {}
+    # Carga
+    resultados['carga_csv_tablero'] = medir(lambda: pd.read_csv(ruta_tablero), repeticiones)
+    resultados['carga_csv_modelo'] = medir(lambda: pd.read_csv(ruta_modelo), repeticiones)
+    resultados['carga_compacta_tablero'] = medir(lambda: formato_compacto.leer_dataset(ruta_tablero), repeticiones)
+    resultados['carga_compacta_modelo'] = medir(lambda: formato_compacto.leer_dataset(ruta_modelo), repeticiones)
+    resultados['preparar_tablero'] = medir(lambda: capa_datos._preparar_datos_trafico(ruta_tablero), repeticiones)
+
+    # Filtros y agregados
+    datos = capa_datos._preparar_datos_trafico(ruta_tablero)
+    df = datos.df
+    criterios = _criterios_ejemplo(datos)
+
+    def mascara_groupby():
+        for c in criterios:
+            mascara = df['Fecha'].dt.date == c['Fecha']
+            if c['Zona'] != 'Todas':
+                mascara &= df['Zona'] == c['Zona']
+            df[mascara].groupby(['Zona', 'HoraInicio'], observed=True)['FlujoVehicular'].mean()
+
+    def motor_sin_memoria():
+        for c in criterios:
+            df.iloc[datos.filtros.posiciones(**c)].groupby(['Zona', 'HoraInicio'], observed=True)['FlujoVehicular'].mean()
+
+    # Un rerun de app.py: los dos gráficos y las métricas de cabecera
+    def cubo():
+        for c in criterios:
+            datos.cubo.flujo_por_zona_hora(**c)
+            datos.cubo.promedio_por_zona(**c)
+            datos.cubo.maximo()
+            datos.cubo.promedio()
+
+    resultados['filtro_mascara_groupby'] = medir(mascara_groupby, repeticiones)
+    resultados['filtro_motor'] = medir(motor_sin_memoria, repeticiones)
+    resultados['cubo_consultas'] = medir(cubo, repeticiones, preparar=datos.cubo.limpiar)
+    resultados['cubo_consultas_memoria'] = medir(cubo, repeticiones)
+
+    # Figuras (construcción + serialización, que es lo que Streamlit envía), con
+    # los constructores de graficos.py que usa app.py. El boxplot de un día no
+    # llega a PRESUPUESTO_PUNTOS; sobre todas las filas sí (desde 10x), y se mide
+    # también forzando todos los puntos para ver lo que ahorra el resumen
+    df_long = datos.cubo.flujo_por_zona_hora()
+    df_dia = datos.filtros.filtrar(Fecha=datos.fechas[0])
+    promedio_zona = datos.cubo.promedio_por_zona()
+    resultados['figura_area'] = medir(lambda: graficos.figura_flujo_hora("Área", df_long, df_dia).to_json(), repeticiones)
+    resultados['figura_boxplot_dia'] = medir(lambda: graficos.figura_flujo_hora("Boxplot", df_long, df_dia).to_json(), repeticiones)
+    resultados['figura_boxplot_todo'] = medir(lambda: graficos.figura_flujo_hora("Boxplot", df_long, df).to_json(), repeticiones)
+    resultados['figura_boxplot_todo_puntos'] = medir(lambda: graficos.figura_flujo_hora("Boxplot", df_long, df, presupuesto=len(df)).to_json(),
+                                                     repeticiones)
+    resultados['figura_barras_zona'] = medir(lambda: graficos.figura_promedio_zona("Barras", promedio_zona).to_json(), repeticiones)
+
+    if con_modelo:
+        # Entrenamiento (una sola vez: es el camino más caro), solo con el CSV sintético
+        df_modelo = cargar_datos_entrenamiento(ruta_modelo)
+        inicio = time.perf_counter()
+        model = ajustar(construir_modelo(HIPERPARAMETROS), df_modelo[features], df_modelo[target])
+        duracion = time.perf_counter() - inicio
+        resultados['entrenamiento'] = {'mediana_s': duracion, 'minimo_s': duracion, 'repeticiones': 1}
+
+        # Predicción con el modelo recién entrenado, sin tabla precalculada ni caché
+        modelo_prediccion.reemplazar_modelo(model, exportar_motor(model), None)
+        rutas = sorted(df_modelo['Ruta'].unique())
+        fechas = pd.date_range('2025-01-01', periods=100, freq='3D').strftime('%Y-%m-%d')
+        consultas = [(rutas[i % len(rutas)], fechas[i], 'no') for i in range(100)]
+        limpiar = modelo_prediccion.cache_predicciones.limpiar
+        resultados['prediccion_individual'] = medir(lambda: modelo_prediccion.predecir_trafico_diario(*consultas[0]), repeticiones, preparar=limpiar)
+        resultados['prediccion_individual_cache'] = medir(lambda: modelo_prediccion.predecir_trafico_diario(*consultas[0]), repeticiones)
+        resultados['prediccion_lote_100'] = medir(lambda: modelo_prediccion.predecir_trafico_lote(consultas), repeticiones, preparar=limpiar)
+    return resultados
+
+
+def ejecutar(escalas, repeticiones, max_escala_modelo=10):
+    directorio = tempfile.mkdtemp(prefix='benchmark_trafico_')
+    try:
+        resultados = {}
+        for escala in escalas:
+            print(f"⏱️ Escala {escala}x...", file=sys.stderr)
+            resultados[f'{escala}x'] = medir_escala(escala, repeticiones, directorio, escala <= max_escala_modelo)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    meta = {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semilla': SEMILLA,
+        'repeticiones': repeticiones,
+        'max_escala_modelo': max_escala_modelo,
+        'versiones': {p: version(p) for p in ('pandas', 'numpy', 'scikit-learn', 'plotly')},
+    }
+    return {'meta': meta, 'resultados': resultados}
+
+
+# 3. Comparación: cociente de medianas; empeora si supera 1 + umbral y la diferencia
+#    absoluta supera MINIMO_ABSOLUTO_S
+def comparar(base, nuevo, umbral=0.25):
+    filas = []
+    for escala, medidas in nuevo['resultados'].items():
+        for camino, medida in medidas.items():
+            anterior = base['resultados'].get(escala, {}).get(camino)
+            if anterior is None:
+                continue
+            antes, ahora = anterior['mediana_s'], medida['mediana_s']
+            cociente = ahora / antes if antes > 0 else float('inf')
+            empeoro = cociente > 1 + umbral and ahora - antes > MINIMO_ABSOLUTO_S
+            filas.append((escala, camino, antes, ahora, cociente, empeoro))
+    return filas
+
+
+def imprimir_comparacion(filas, umbral):
+    print(f"{'escala':<7} {'camino':<30} {'base ms':>10} {'nuevo ms':>10} {'cociente':>9}")
+    for escala, camino, antes, ahora, cociente, empeoro in filas:
+        marca = '  ❌' if empeoro else ''
+        print(f"{escala:<7} {camino:<30} {antes * 1000:>10.2f} {ahora * 1000:>10.2f} {cociente:>8.2f}x{marca}")
+    regresiones = sum(f[-1] for f in filas)
+    print(f"\n{'❌' if regresiones else '✅'} {regresiones} regresiones de {len(filas)} caminos (umbral +{umbral:.0%})")
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, filtros, figuras y predicción.")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_ejecutar = sub.add_parser('ejecutar', help="Mide y guarda los resultados en JSON")
+    p_ejecutar.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    p_ejecutar.add_argument('--repeticiones', type=int, default=5)
+    p_ejecutar.add_argument('--max-escala-modelo', type=int, default=10, help="Mayor escala con entrenamiento y predicción (0 = nunca)")
+    p_ejecutar.add_argument('--salida', default=os.path.join(DIRECTORIO_BENCHMARKS, 'ultimo.json'))
+    p_comparar = sub.add_parser('comparar', help="Compara dos resultados; código 1 si hay regresiones")
+    p_comparar.add_argument('base')
+    p_comparar.add_argument('nuevo')
+    p_comparar.add_argument('--umbral', type=float, default=0.25, help="Empeoramiento relativo tolerado (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    if args.comando == 'ejecutar':
+        resultado = ejecutar(args.escalas, args.repeticiones, args.max_escala_modelo)
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, 'w') as f:
+            json.dump(resultado, f, indent=2)
+        for escala, medidas in resultado['resultados'].items():
+            for camino, medida in medidas.items():
+                print(f"{escala:<5} {camino:<30} {medida['mediana_s'] * 1000:>10.2f} ms")
+        print(f"📄 Resultados guardados en {args.salida}")
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.nuevo) as f:
+            nuevo = json.load(f)
+        sys.exit(1 if imprimir_comparacion(comparar(base, nuevo, args.umbral), args.umbral) else 0)
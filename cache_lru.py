@@ -0,0 +1,92 @@
+#=====================
+#   CACHÉ LRU
+#=====================
+# Caché LRU común a los módulos que memorizan resultados:
+#   - límite de entradas y, si se da `peso`, también de peso total (p. ej. bytes);
+#   - TTL opcional;
+#   - `origen`: de qué datos o modelo salió cada entrada. Si al pedirla el
+#     origen no es el mismo (identidad, o igualdad con mismo_origen=operator.eq)
+#     la entrada está vencida y cuenta como fallo;
+#   - contadores de aciertos y fallos.
+import time
+import operator
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    def __init__(self, max_entradas=128, ttl_segundos=None, max_peso=None, peso=None, mismo_origen=operator.is_):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.max_peso = max_peso
+        self.peso = peso
+        self.mismo_origen = mismo_origen
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()  # clave -> (instante, origen, valor)
+        self._lock = threading.Lock()
+
+    def _vigente(self, entrada, origen):
+        instante, origen_entrada, _ = entrada
+        if self.ttl_segundos is not None and time.monotonic() - instante > self.ttl_segundos:
+            return False
+        return origen is None or self.mismo_origen(origen_entrada, origen)
+
+    # Valor guardado, o None si falta o está vencido
+    def obtener(self, clave, origen=None):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and self._vigente(entrada, origen):
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[2]
+            if entrada is not None:
+                del self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor, origen=None):
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), origen, valor)
+            self._datos.move_to_end(clave)
+            while self.max_entradas is not None and len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+            # Con límite de peso se conserva al menos la entrada recién guardada
+            while self.max_peso is not None and len(self._datos) > 1 and self._peso_total() > self.max_peso:
+                self._datos.popitem(last=False)
+
+    # `calcular` corre fuera del lock: dos hilos pueden calcular la misma clave a la vez
+    def obtener_o_calcular(self, clave, calcular, origen=None):
+        valor = self.obtener(clave, origen)
+        if valor is None:
+            valor = calcular()
+            self.guardar(clave, valor, origen)
+        return valor
+
+    def _peso_total(self):
+        return sum(self.peso(valor) for _, _, valor in self._datos.values())
+
+    def elementos(self):
+        with self._lock:
+            return [(clave, valor) for clave, (_, _, valor) in self._datos.items()]
+
+    def valores(self):
+        return [valor for _, valor in self.elementos()]
+
+    def __len__(self):
+        return len(self._datos)
+
+    def limpiar(self, contadores=False):
+        with self._lock:
+            self._datos.clear()
+            if contadores:
+                self.aciertos = 0
+                self.fallos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            resultado = {'entradas': len(self._datos), 'max_entradas': self.max_entradas,
+                         'aciertos': self.aciertos, 'fallos': self.fallos}
+            if self.max_peso is not None:
+                resultado.update(peso=self._peso_total(), max_peso=self.max_peso)
+            return resultado
@@ -0,0 +1,84 @@
+#=============================
+#   CLIENTE DE PREDICCIÓN
+#=============================
+# Dos clientes con la misma interfaz:
+#   - ClientePrediccion: habla con servicio_prediccion.py por HTTP (conexión persistente);
+#   - ClienteLocal: llama al modelo en el mismo proceso, para pruebas y
+#     desarrollo sin levantar el servicio.
+# Ambos devuelven dicts con ruta, fecha, feriado, dia_semana, intervalos, flujo y congestion.
+import json
+import http.client
+from urllib.parse import urlsplit, urlencode
+
+
+class ErrorServicio(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(f"{estado}: {mensaje}")
+        self.estado = estado
+
+
+class ClientePrediccion:
+    def __init__(self, url='http://127.0.0.1:8502', timeout=30):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.timeout = timeout
+        self._conexion = None
+
+    def _pedir(self, metodo, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+        cabeceras = {'Content-Type': 'application/json'} if datos is not None else {}
+        for intento in range(2):
+            if self._conexion is None:
+                self._conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=self.timeout)
+            try:
+                self._conexion.request(metodo, ruta, body=datos, headers=cabeceras)
+                respuesta = self._conexion.getresponse()
+                contenido = json.loads(respuesta.read() or b'{}')
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # La conexión persistente pudo haberse cerrado: reintentar una vez con una nueva
+                self.cerrar()
+                if intento:
+                    raise
+        if respuesta.status != 200:
+            raise ErrorServicio(respuesta.status, contenido.get('error', ''))
+        return contenido
+
+    def predecir(self, ruta, fecha, feriado):
+        return self._pedir('GET', '/prediccion?' + urlencode({'ruta': ruta, 'fecha': str(fecha), 'feriado': feriado}))
+
+    # consultas: lista de tripletas (ruta, fecha, feriado)
+    def predecir_lote(self, consultas):
+        cuerpo = {'consultas': [{'ruta': r, 'fecha': str(f), 'feriado': h} for r, f, h in consultas]}
+        return self._pedir('POST', '/prediccion/lote', cuerpo)['resultados']
+
+    def estadisticas(self):
+        return self._pedir('GET', '/estadisticas')
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+
+class ClienteLocal:
+    def __init__(self):
+        # Importación diferida: el cliente HTTP no necesita cargar el modelo
+        import modelo_prediccion
+        from servicio_prediccion import prediccion_a_json
+        self._modelo = modelo_prediccion
+        self._a_json = prediccion_a_json
+
+    def predecir(self, ruta, fecha, feriado):
+        return self.predecir_lote([(ruta, fecha, feriado)])[0]
+
+    def predecir_lote(self, consultas):
+        claves = [self._modelo.normalizar_consulta(*c) for c in consultas]
+        return [self._a_json(c, df) for c, df in zip(claves, self._modelo.predecir_trafico_lote(claves))]
+
+    def estadisticas(self):
+        return {'cache': self._modelo.estadisticas_cache()}
+
+    def cerrar(self):
+        pass
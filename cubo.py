@@ -0,0 +1,164 @@
+#======================
+#   CUBO DE RESUMEN
+#======================
+# Agregados del flujo vehicular por celda (fecha x zona x hora x feriado x
+# evento x congestión): cantidad, suma, mínimo y máximo. Se calcula una vez al
+# cargar los datos y se actualiza de forma incremental al agregar filas: las
+# celdas que ya existen suman sus medidas y las nuevas se agregan al final, con
+# sus posiciones sumadas a los índices (sin volver a agrupar todo).
+# Congestion se incluye como dimensión porque el tablero también filtra por ella.
+#
+# En el dataset del tablero cada fila ya es una celda (una lectura por fecha,
+# zona y hora), así que el cubo no tiene menos filas que los datos. Lo que
+# abarata las consultas de app.py es:
+#   - las celdas que cumplen los filtros salen de los índices de MotorFiltros
+#     (posiciones, sin copiar filas);
+#   - los promedios por zona y por zona x hora se agregan con np.bincount
+#     sobre códigos enteros de zona y hora precalculados;
+#   - cada resultado (y los valores de las métricas) queda memorizado por
+#     criterios hasta que cambian las celdas.
+import copy
+import threading
+import numpy as np
+import pandas as pd
+from filtros import MotorFiltros
+from cache_lru import CacheLRU
+
+DIMENSIONES = ["Fecha", "Zona", "HoraInicio", "Feriado", "Evento", "Congestion"]
+MEDIDA = "FlujoVehicular"
+MAX_CONSULTAS = 256
+# Medidas de cada celda y cómo se combinan dos celdas iguales
+AGREGADOS = {"cantidad": np.add, "suma": np.add, "minimo": np.minimum, "maximo": np.maximum}
+
+
+def _resumir(df):
+    return (df.groupby(DIMENSIONES, observed=True)[MEDIDA]
+              .agg(cantidad="count", suma="sum", minimo="min", maximo="max")
+              .astype({"suma": np.int64})  # int64: al combinar celdas la suma no desborda
+              .reset_index())
+
+
+def _claves(celdas):
+    return zip(*(celdas[c].tolist() for c in DIMENSIONES))
+
+
+def _codigos(serie):
+    categorico = pd.Categorical(serie)
+    return categorico.categories, categorico.codes.astype(np.intp)
+
+
+# Celdas publicadas juntas con sus índices y arreglos; se reemplaza entero al agregar filas
+class _EstadoCubo:
+    def __init__(self, celdas, filtros=None):
+        self.dimensiones = celdas[DIMENSIONES]
+        self.medidas = {nombre: celdas[nombre].to_numpy() for nombre in AGREGADOS}
+        self.filtros = filtros or MotorFiltros(self.dimensiones)
+        self.zonas, self.codigo_zona = _codigos(self.dimensiones["Zona"])
+        self.horas, self.codigo_hora = _codigos(self.dimensiones["HoraInicio"])
+
+    @property
+    def celdas(self):
+        return self.dimensiones.assign(**self.medidas)
+
+    # Estado con las celdas `nuevas` combinadas: posiciones[i] es la celda existente
+    # de nuevas[i], o -1 si es nueva (va al final, en el mismo orden)
+    def extender(self, nuevas, posiciones):
+        existentes = posiciones >= 0
+        frescas = nuevas[~existentes]
+        estado = copy.copy(self)
+        estado.medidas = {}
+        for nombre, combinar in AGREGADOS.items():
+            valores = np.concatenate([self.medidas[nombre], frescas[nombre].to_numpy()])
+            destino = posiciones[existentes]
+            valores[destino] = combinar(valores[destino], nuevas[nombre].to_numpy()[existentes])
+            estado.medidas[nombre] = valores
+        if frescas.empty:
+            return estado
+
+        estado.dimensiones = pd.concat([self.dimensiones, frescas[DIMENSIONES]], ignore_index=True)
+        estado.filtros = self.filtros.extender(estado.dimensiones)
+        codigo_zona = self.zonas.get_indexer(frescas["Zona"])
+        codigo_hora = self.horas.get_indexer(frescas["HoraInicio"])
+        if (codigo_zona < 0).any() or (codigo_hora < 0).any():
+            # Zona u hora que no estaban: se recodifica todo para mantener las categorías ordenadas
+            return _EstadoCubo(estado.celdas, estado.filtros)
+        estado.codigo_zona = np.concatenate([self.codigo_zona, codigo_zona])
+        estado.codigo_hora = np.concatenate([self.codigo_hora, codigo_hora])
+        return estado
+
+    # Suma y cantidad por grupo (códigos 0..n_grupos-1) de las celdas en `posiciones`
+    def sumar_por(self, grupos, posiciones, n_grupos):
+        suma = np.bincount(grupos[posiciones], weights=self.medidas["suma"][posiciones], minlength=n_grupos)
+        cantidad = np.bincount(grupos[posiciones], weights=self.medidas["cantidad"][posiciones], minlength=n_grupos)
+        presentes = np.flatnonzero(cantidad)
+        return presentes, suma[presentes] / cantidad[presentes]
+
+
+class CuboTrafico:
+    def __init__(self, df, max_consultas=MAX_CONSULTAS):
+        self._lock = threading.Lock()
+        self._consultas = CacheLRU(max_consultas)  # origen: el _EstadoCubo vigente
+        self._estado = _EstadoCubo(_resumir(df))
+
+    @property
+    def celdas(self):
+        return self._estado.celdas
+
+    @property
+    def filtros(self):
+        return self._estado.filtros
+
+    # Combina las celdas de las filas nuevas con las existentes (costo proporcional a las filas nuevas)
+    def agregar_filas(self, nuevas):
+        nuevas = _resumir(nuevas)
+        with self._lock:
+            estado = self._estado
+            self._estado = estado.extender(nuevas, self._ubicar(estado, nuevas))
+
+    # Posición de cada celda de `nuevas` en el estado, o -1 si no existe. Solo se
+    # comparan las celdas de las mismas fechas (índice de Fecha de los filtros)
+    def _ubicar(self, estado, nuevas):
+        claves = list(_claves(nuevas))
+        existentes = {}
+        for fecha in {clave[0] for clave in claves}:
+            candidatas = estado.filtros.posiciones(Fecha=fecha.date())
+            existentes.update(zip(_claves(estado.dimensiones.iloc[candidatas]), candidatas))
+        return np.array([existentes.get(clave, -1) for clave in claves], dtype=np.intp)
+
+    # Resultado memorizado de calcular(estado, posiciones) para estos criterios
+    def _consulta(self, nombre, criterios, calcular):
+        estado = self._estado
+        clave = (nombre, estado.filtros.clave(criterios))
+        return self._consultas.obtener_o_calcular(
+            clave, lambda: calcular(estado, estado.filtros.posiciones(**criterios)), estado)
+
+    def maximo(self, **criterios):
+        return self._consulta("maximo", criterios,
+                              lambda e, pos: e.medidas["maximo"][pos].max() if len(pos) else np.nan)
+
+    def promedio(self, **criterios):
+        return self._consulta("promedio", criterios,
+                              lambda e, pos: e.medidas["suma"][pos].sum() / e.medidas["cantidad"][pos].sum() if len(pos) else np.nan)
+
+    # Mismo formato que df.groupby("Zona")["FlujoVehicular"].mean().reset_index()
+    def promedio_por_zona(self, **criterios):
+        def calcular(e, pos):
+            presentes, promedios = e.sumar_por(e.codigo_zona, pos, len(e.zonas))
+            return pd.DataFrame({"Zona": pd.Categorical.from_codes(presentes, e.zonas), MEDIDA: promedios})
+        return self._consulta("por_zona", criterios, calcular)
+
+    # Promedio por zona y hora, en formato largo (Zona, HoraInicio, Valor) para plotly
+    def flujo_por_zona_hora(self, **criterios):
+        def calcular(e, pos):
+            n_horas = len(e.horas)
+            presentes, promedios = e.sumar_por(e.codigo_zona * n_horas + e.codigo_hora, pos, len(e.zonas) * n_horas)
+            return pd.DataFrame({"Zona": pd.Categorical.from_codes(presentes // n_horas, e.zonas),
+                                 "HoraInicio": e.horas[presentes % n_horas].to_numpy(),
+                                 "Valor": promedios})
+        return self._consulta("por_zona_hora", criterios, calcular)
+
+    def limpiar(self):
+        self._consultas.limpiar()
+
+    def estadisticas(self):
+        return {'celdas': len(self._estado.dimensiones), **self._consultas.estadisticas()}
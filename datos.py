@@ -0,0 +1,273 @@
+#=====================
+#   CAPA DE DATOS
+#=====================
+# Carga cada dataset una sola vez por proceso y deja precalculadas las
+# columnas derivadas y las listas de opciones que usa app.py. Los datos se
+# vuelven a leer solo si el archivo cambia (mtime/tamaño y, si eso cambió,
+# hash del contenido). Los CSV se leen a través de formato_compacto (columnas
+# binarias con categóricas y enteros chicos). El tablero incluye además los bloques de filas nuevas
+# que guarda ingesta.py en la carpeta "ingesta/".
+#
+# Los DataFrames devueltos son compartidos entre sesiones: no modificarlos,
+# hacer .copy() antes si hace falta.
+import os
+import copy
+import glob
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from filtros import MotorFiltros
+from cubo import CuboTrafico
+from formato_compacto import leer_dataset
+from instrumentacion import instrumentacion
+from esquema import catalogo_rutas, normalizar_calendario, normalizar_etiquetas
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_DATOS_TRAFICO = os.path.join(BASE_DIR, 'Dataset_limpio.csv')
+RUTA_DATOS_RUTAS = os.path.join(BASE_DIR, 'dataset_trafico_limpio.csv')
+DIRECTORIO_INGESTA = os.path.join(BASE_DIR, 'ingesta')
+
+_lock = threading.Lock()
+_cache = {}  # ruta -> _Entrada
+
+
+class _Entrada:
+    def __init__(self, firma, huella, datos, tiempo_carga):
+        self.firma = firma
+        self.huella = huella
+        self.datos = datos
+        self.tiempo_carga = tiempo_carga
+        self.cargas = 1
+        self.aciertos = 0
+
+
+# Datos del tablero (Dataset_limpio.csv) con columnas y opciones precalculadas
+class DatosTrafico:
+    def __init__(self, df, cubo=None):
+        self.df = df
+        self.zonas = sorted(df["Zona"].unique())
+        self.fechas = sorted(df["Fecha"].dt.date.unique(), reverse=True)
+        self.opciones_feriado = sorted(df["Feriado"].astype(str).unique().tolist())
+        self.opciones_eventos = sorted(df["Evento"].astype(str).unique().tolist())
+        self.opciones_congestion = sorted(df["Congestion"].astype(str).unique().tolist())
+        self.filtros = MotorFiltros(df)
+        self.cubo = cubo if cubo is not None else CuboTrafico(df)
+
+    # DatosTrafico con `nuevas` al final: opciones, índices de filtros y cubo se
+    # actualizan solo con esas filas (el cubo es compartido con este objeto)
+    def extender(self, nuevas):
+        datos = copy.copy(self)
+        datos.df = _concatenar(self.df, nuevas)
+        nuevas = datos.df.iloc[len(self.df):]  # ya con los tipos del DataFrame cargado
+        datos.zonas = sorted(set(self.zonas).union(nuevas["Zona"].unique()))
+        datos.fechas = sorted(set(self.fechas).union(nuevas["Fecha"].dt.date.unique()), reverse=True)
+        datos.opciones_feriado = sorted(set(self.opciones_feriado).union(nuevas["Feriado"].astype(str)))
+        datos.opciones_eventos = sorted(set(self.opciones_eventos).union(nuevas["Evento"].astype(str)))
+        datos.opciones_congestion = sorted(set(self.opciones_congestion).union(nuevas["Congestion"].astype(str)))
+        datos.filtros = self.filtros.extender(datos.df)
+        self.cubo.agregar_filas(nuevas)
+        return datos
+
+
+# Concatena con los tipos del DataFrame cargado (categóricas, enteros chicos, fechas
+# en ns), para no convertir cada columna entera en cada agregado
+def _concatenar(df, nuevas):
+    nuevas = nuevas.copy()
+    columnas = {}
+    for columna in df.columns:
+        actual, extra = df[columna], nuevas[columna]
+        if isinstance(actual.dtype, pd.CategoricalDtype):
+            categorias = actual.cat.categories
+            faltantes = pd.Index(extra.astype(str).unique()).difference(categorias)
+            if len(faltantes):
+                categorias = categorias.union(faltantes)
+                actual = actual.cat.set_categories(categorias)
+            nuevas[columna] = pd.Categorical(extra.astype(str), categories=categorias)
+        elif pd.api.types.is_integer_dtype(actual.dtype) and pd.api.types.is_integer_dtype(extra.dtype):
+            info = np.iinfo(actual.dtype)
+            if extra.empty or (extra.min() >= info.min and extra.max() <= info.max):
+                nuevas[columna] = extra.astype(actual.dtype)
+        elif pd.api.types.is_datetime64_dtype(actual.dtype):
+            nuevas[columna] = extra.astype(actual.dtype)
+        columnas[columna] = actual
+    return pd.concat([pd.DataFrame(columnas), nuevas[df.columns]], ignore_index=True)
+
+
+# Bloques de filas nuevas (esquema de dataset_trafico_limpio.csv), en orden de llegada
+def archivos_ingesta():
+    return sorted(glob.glob(os.path.join(DIRECTORIO_INGESTA, 'bloque_*.csv')))
+
+
+# Filas del esquema del modelo (Ruta/Intervalo) llevadas al esquema del tablero
+# (Zona/HoraInicio), con el nombre de zona que ya usa el tablero
+def a_esquema_tablero(df):
+    fechas = pd.to_datetime(df["Fecha"])
+    horas = df["Intervalo"].astype(str).str.split("-", expand=True)
+    catalogo = catalogo_rutas()
+    return pd.DataFrame({
+        "Zona": [catalogo.zona_tablero(r) for r in df["Ruta"]],
+        "Fecha": fechas.dt.strftime("%Y-%m-%d").to_numpy(),
+        "DiaSemana": fechas.dt.day_name().to_numpy(),
+        "HoraInicio": horas[0].to_numpy(),
+        "HoraFin": horas[1].to_numpy(),
+        "Feriado": df["Feriado"].to_numpy(),
+        "EventoEspecial": df["EventoEspecial"].to_numpy(),
+        "FlujoVehicular": df["FlujoVehicular"].to_numpy(),
+        "Congestion": df["Congestion"].to_numpy(),
+    })
+
+
+def _archivos(ruta):
+    return [ruta] + archivos_ingesta() if ruta == RUTA_DATOS_TRAFICO else [ruta]
+
+
+def _firma(ruta):
+    firma = []
+    for archivo in _archivos(ruta):
+        st = os.stat(archivo)
+        firma.append((archivo, st.st_mtime_ns, st.st_size))
+    return tuple(firma)
+
+
+def _huella(ruta):
+    h = hashlib.sha256()
+    for archivo in _archivos(ruta):
+        with open(archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def _preparar_filas_trafico(datosTrafico):
+    datosTrafico["Fecha"] = pd.to_datetime(datosTrafico["Fecha"], format="%Y-%m-%d")
+    datosTrafico["HoraInicio"] = pd.to_datetime(datosTrafico["HoraInicio"], format="%H:%M").dt.strftime("%H:%M")
+
+    # Esquema común (esquema.py): día de la semana desde la fecha y etiquetas uniformes
+    normalizar_calendario(datosTrafico)
+    normalizar_etiquetas(datosTrafico)
+
+    # Asegúrate de que estas columnas existen en tu CSV o ajústa los nombres
+    if 'Feriado' not in datosTrafico.columns:
+        datosTrafico['Feriado'] = 'No'
+    if 'Evento' not in datosTrafico.columns:
+        datosTrafico['Evento'] = 'Ninguno'
+    if 'Congestion' not in datosTrafico.columns:
+        datosTrafico['Congestion'] = pd.cut(datosTrafico['FlujoVehicular'],
+                                            bins=[0, 100, 500, 1000, datosTrafico['FlujoVehicular'].max()],
+                                            labels=['Baja', 'Media', 'Alta', 'Muy Alta'])
+        datosTrafico['Congestion'] = datosTrafico['Congestion'].astype(str)
+    return datosTrafico
+
+
+def _preparar_datos_trafico(ruta):
+    partes = [leer_dataset(ruta)]
+    if ruta == RUTA_DATOS_TRAFICO:
+        partes += [a_esquema_tablero(pd.read_csv(archivo)) for archivo in archivos_ingesta()]
+    return DatosTrafico(_preparar_filas_trafico(pd.concat(partes, ignore_index=True)))
+
+
+def _preparar_datos_rutas(ruta):
+    return normalizar_etiquetas(normalizar_calendario(leer_dataset(ruta)))
+
+
+def _obtener(ruta, preparar):
+    firma = _firma(ruta)
+    with _lock:
+        entrada = _cache.get(ruta)
+        if entrada is not None:
+            if entrada.firma == firma:
+                entrada.aciertos += 1
+                return entrada.datos
+            # Cambió mtime/tamaño: solo recargar si cambió el contenido
+            huella = _huella(ruta)
+            if huella == entrada.huella:
+                entrada.firma = firma
+                entrada.aciertos += 1
+                return entrada.datos
+        else:
+            huella = _huella(ruta)
+
+        inicio = time.perf_counter()
+        datos = preparar(ruta)
+        tiempo = time.perf_counter() - inicio
+        instrumentacion.registrar(f'datos.preparar.{os.path.basename(ruta)}', tiempo)
+        if entrada is None:
+            _cache[ruta] = _Entrada(firma, huella, datos, tiempo)
+        else:
+            entrada.firma, entrada.huella, entrada.datos, entrada.tiempo_carga = firma, huella, datos, tiempo
+            entrada.cargas += 1
+        return datos
+
+
+# Dataset del tablero (Zona/HoraInicio) ya preprocesado
+def cargar_datos_trafico(ruta=RUTA_DATOS_TRAFICO):
+    return _obtener(ruta, _preparar_datos_trafico)
+
+
+# Agrega filas nuevas (esquema del tablero) al dataset ya cargado: filtros y cubo
+# se actualizan de forma incremental (ver DatosTrafico.extender) y se publica el
+# DatosTrafico nuevo. persistir(), si se da, escribe esas mismas filas en disco
+# (bloque de ingesta): corre después de actualizar la memoria y con el lock
+# tomado, junto con la firma nueva, para que ninguna carga lea el bloque y vuelva
+# a sumar las filas. Sin bloque nuevo los archivos no cambian y la firma tampoco.
+def agregar_filas_trafico(nuevas, ruta=RUTA_DATOS_TRAFICO, persistir=None):
+    cargar_datos_trafico(ruta)
+    nuevas = _preparar_filas_trafico(nuevas.copy())
+    with _lock:
+        entrada = _cache[ruta]
+        entrada.datos = entrada.datos.extender(nuevas)
+        if persistir is not None:
+            persistir()
+            _actualizar_firma(entrada, ruta)
+        return entrada.datos
+
+
+def _actualizar_firma(entrada, ruta):
+    entrada.firma = _firma(ruta)
+    entrada.huella = _huella(ruta)
+
+
+# Los bloques que ya se escribieron en disco están incluidos en memoria: actualizar
+# la firma para que la próxima carga no relea todo
+def marcar_vigente(ruta=RUTA_DATOS_TRAFICO):
+    with _lock:
+        entrada = _cache.get(ruta)
+        if entrada is not None:
+            _actualizar_firma(entrada, ruta)
+
+
+# Dataset del modelo (Ruta/Intervalo), con las etiquetas del esquema común
+def cargar_datos_rutas(ruta=RUTA_DATOS_RUTAS):
+    return _obtener(ruta, _preparar_datos_rutas)
+
+
+def _memoria(datos):
+    df = datos.df if isinstance(datos, DatosTrafico) else datos
+    return int(df.memory_usage(deep=True).sum())
+
+
+# Estadísticas de memoria y tiempo de carga por archivo
+def estadisticas_datos():
+    with _lock:
+        return [
+            {
+                'archivo': os.path.basename(ruta),
+                'huella': e.huella,
+                'filas': len(e.datos.df if isinstance(e.datos, DatosTrafico) else e.datos),
+                'memoria_bytes': _memoria(e.datos),
+                'tiempo_carga_s': e.tiempo_carga,
+                'cargas': e.cargas,
+                'aciertos': e.aciertos,
+            }
+            for ruta, e in _cache.items()
+        ]
+
+
+instrumentacion.registrar_fuente('datos', estadisticas_datos)
+
+
+def limpiar_cache_datos():
+    with _lock:
+        _cache.clear()
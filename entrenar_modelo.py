@@ -0,0 +1,333 @@
+#=======================
+#   ENTRENAR MODELO
+#=======================
+# Entrena el pipeline una sola vez y lo guarda como artefacto versionado en
+# la carpeta "modelos/". La versión (huella) depende del contenido del CSV
+# (más los bloques agregados por ingesta.py) y de los hiperparámetros, así que
+# el artefacto se regenera solo cuando cambia alguno de ellos. Junto al modelo
+# se publican el motor NumPy (motor_bosque.py) y la tabla de pronósticos
+# (tabla_pronosticos.py) de la misma huella, que son los que usa la app.
+#
+# Uso:
+#   python entrenar_modelo.py [--forzar] [--n-jobs N]   entrena y publica los artefactos
+#   python entrenar_modelo.py --evaluar                 evalúa la configuración actual
+#   python entrenar_modelo.py --barrido [--procesos N] [--n-estimators 50 100 ...]
+#          [--max-depth 0 12 ...] [--min-samples-leaf 1 3 ...] [--sin-dia] [--salida r.json]
+#
+# La evaluación usa un corte temporal (las últimas fechas quedan para prueba) y
+# reporta tiempo de entrenamiento, memoria pico, latencia de predicción,
+# tamaño del modelo y error para cada configuración.
+import io
+import os
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import resource
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+from importlib.metadata import version
+from datos import archivos_ingesta
+from formato_compacto import leer_dataset
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_DATASET = os.path.join(BASE_DIR, 'dataset_trafico_limpio.csv')
+DIRECTORIO_MODELOS = os.path.join(BASE_DIR, 'modelos')
+
+# Subir este número invalida todos los artefactos guardados
+VERSION_ARTEFACTO = 1
+
+# Features y target
+features = ['Ruta', 'Feriado', 'Intervalo', 'Dia', 'Mes', 'DiaSemana']
+target = 'FlujoVehicular'
+cat_features = ['Ruta', 'Feriado', 'Intervalo']
+
+HIPERPARAMETROS = {'n_estimators': 100, 'random_state': 42}
+
+# Núcleos para entrenar (-1 = todos). No cambia el modelo resultante, así que no entra en la huella
+N_JOBS = -1
+
+# Los 24 intervalos horarios del día
+INTERVALOS = [f"{str(h).zfill(2)}:00-{str((h+1)%24).zfill(2)}:00" for h in range(24)]
+
+
+# CSV base + bloques de filas nuevas guardados por ingesta.py. Los bloques son
+# filas del dataset real: otro CSV (p. ej. los sintéticos de benchmark.py) se lee solo
+def archivos_entrenamiento(ruta_dataset=RUTA_DATASET):
+    return [ruta_dataset] + archivos_ingesta() if ruta_dataset == RUTA_DATASET else [ruta_dataset]
+
+
+# 1. Cargar los CSV y extraer componentes de la fecha
+def cargar_datos_entrenamiento(ruta_dataset=RUTA_DATASET):
+    # El dataset base se lee en formato compacto; los bloques de ingesta son CSV chicos
+    archivos = archivos_entrenamiento(ruta_dataset)
+    df = pd.concat([leer_dataset(archivos[0])] + [pd.read_csv(r) for r in archivos[1:]], ignore_index=True)
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    df['Dia'] = df['Fecha'].dt.day
+    df['Mes'] = df['Fecha'].dt.month
+    df['DiaSemana'] = df['Fecha'].dt.dayofweek  # 0 = lunes
+    return df
+
+
+# Entrada del modelo para varias consultas: 24 filas (una por intervalo) por
+# cada tripleta (ruta, fecha, feriado), construida sin bucles
+def construir_features(rutas, fechas, feriados):
+    fechas = pd.DatetimeIndex(pd.to_datetime(fechas))
+    n = len(fechas)
+    return pd.DataFrame({
+        'Ruta': np.repeat(np.asarray(rutas, dtype=object), 24),
+        'Feriado': np.repeat(np.asarray(feriados, dtype=object), 24),
+        'Intervalo': np.tile(np.array(INTERVALOS, dtype=object), n),
+        'Dia': np.repeat(fechas.day.to_numpy(), 24),
+        'Mes': np.repeat(fechas.month.to_numpy(), 24),
+        'DiaSemana': np.repeat(fechas.dayofweek.to_numpy(), 24)
+    })
+
+
+# 2. Pipeline (OneHot para las categóricas + RandomForest)
+def construir_modelo(hiperparametros=HIPERPARAMETROS, columnas=features):
+    # sklearn se importa aquí: quien solo sirve desde la tabla precalculada no lo necesita
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import OneHotEncoder
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(handle_unknown='ignore'), [c for c in cat_features if c in columnas])
+        ],
+        remainder='passthrough'  # dejar Dia, Mes, DiaSemana como están
+    )
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(**hiperparametros))
+    ])
+
+
+# 3. Huella del artefacto: dataset + hiperparámetros + versión de sklearn
+def huella_modelo(ruta_dataset=RUTA_DATASET, hiperparametros=HIPERPARAMETROS):
+    h = hashlib.sha256()
+    for ruta in archivos_entrenamiento(ruta_dataset):
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloque)
+    h.update(json.dumps(hiperparametros, sort_keys=True).encode())
+    h.update(version('scikit-learn').encode())
+    h.update(str(VERSION_ARTEFACTO).encode())
+    return h.hexdigest()[:16]
+
+
+def ruta_artefacto(huella):
+    return os.path.join(DIRECTORIO_MODELOS, f'modelo_{huella}.joblib')
+
+
+# 4. Entrenamiento y guardado
+def ajustar(model, X, y, n_jobs=N_JOBS):
+    # Se entrena en paralelo y se vuelve a un solo hilo para predecir: los lotes
+    # de predicción son chicos y no compensan el costo de repartir el trabajo
+    model.set_params(regressor__n_jobs=n_jobs)
+    model.fit(X, y)
+    model.set_params(regressor__n_jobs=None)
+    return model
+
+
+def entrenar_modelo(ruta_dataset=RUTA_DATASET, hiperparametros=HIPERPARAMETROS, n_jobs=N_JOBS):
+    df = cargar_datos_entrenamiento(ruta_dataset)
+    model = ajustar(construir_modelo(hiperparametros), df[features], df[target], n_jobs)
+    print("✅ Modelo entrenado correctamente.")
+    return model
+
+
+def guardar_modelo(model, huella):
+    os.makedirs(DIRECTORIO_MODELOS, exist_ok=True)
+    destino = ruta_artefacto(huella)
+    # Se escribe en un temporal y se renombra para que otro proceso nunca
+    # lea un artefacto a medio escribir. Sin compresión, para poder mapearlo.
+    fd, temporal = tempfile.mkstemp(dir=DIRECTORIO_MODELOS, suffix='.tmp')
+    os.close(fd)
+    try:
+        joblib.dump(model, temporal)
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    limpiar_artefactos('modelo_', destino)
+    return destino
+
+
+# Borra los artefactos de versiones anteriores con ese prefijo (modelo_, motor_, pronosticos_)
+def limpiar_artefactos(prefijo, vigente):
+    for nombre in os.listdir(DIRECTORIO_MODELOS):
+        ruta = os.path.join(DIRECTORIO_MODELOS, nombre)
+        if nombre.startswith(prefijo) and ruta != vigente and '.tmp' not in nombre:
+            os.remove(ruta)
+
+
+# 5. Cargar el artefacto vigente (mapeado en memoria); reentrenar si falta o está desactualizado.
+#    Quien ya calculó la huella la pasa para no volver a leer los CSV.
+def cargar_modelo(ruta_dataset=RUTA_DATASET, hiperparametros=HIPERPARAMETROS, mmap=True, huella=None):
+    huella = huella or huella_modelo(ruta_dataset, hiperparametros)
+    ruta = ruta_artefacto(huella)
+    if os.path.exists(ruta):
+        try:
+            return joblib.load(ruta, mmap_mode='r' if mmap else None)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer {ruta} ({e}); se reentrenará el modelo.")
+
+    model = entrenar_modelo(ruta_dataset, hiperparametros)
+    guardar_modelo(model, huella)
+    return model
+
+
+# Guarda el modelo (si falta), su motor NumPy y su tabla de pronósticos con la
+# misma huella, y borra los de versiones anteriores. Las rutas de la tabla son
+# las que vio el encoder al entrenar (ya ordenadas), sin releer los datos.
+def publicar_artefactos(model, huella):
+    # Importación diferida: esos módulos importan este
+    from motor_bosque import exportar_motor, ruta_motor
+    from tabla_pronosticos import precalcular_tabla, ruta_tabla
+
+    if not os.path.exists(ruta_artefacto(huella)):
+        guardar_modelo(model, huella)
+    motor = exportar_motor(model)
+    motor.guardar(ruta_motor(huella))
+    limpiar_artefactos('motor_', ruta_motor(huella))
+
+    encoder = model.named_steps['preprocessor'].named_transformers_['cat']
+    tabla = precalcular_tabla(model, list(encoder.categories_[cat_features.index('Ruta')]))
+    tabla.guardar(ruta_tabla(huella))
+    limpiar_artefactos('pronosticos_', ruta_tabla(huella))
+    return motor, tabla
+
+
+def artefactos_publicados(huella):
+    from motor_bosque import ruta_motor
+    from tabla_pronosticos import ruta_tabla
+    return all(os.path.exists(r) for r in (ruta_artefacto(huella), ruta_motor(huella), ruta_tabla(huella)))
+
+
+# 6. Evaluación con corte temporal
+def dividir_por_fecha(df, fraccion_prueba=0.2):
+    fechas = np.sort(df['Fecha'].unique())
+    n_prueba = max(1, int(round(len(fechas) * fraccion_prueba)))
+    corte = fechas[-n_prueba]
+    return df[df['Fecha'] < corte], df[df['Fecha'] >= corte]
+
+
+# Entrena y mide una configuración: {'hiperparametros': {...}, 'columnas': [...]}.
+# Pensada para correr en un proceso propio, así ru_maxrss es el pico de esa configuración.
+def evaluar_configuracion(configuracion, ruta_dataset=RUTA_DATASET, n_jobs=N_JOBS, fraccion_prueba=0.2):
+    hiperparametros = configuracion.get('hiperparametros', HIPERPARAMETROS)
+    columnas = configuracion.get('columnas', features)
+    entrenamiento, prueba = dividir_por_fecha(cargar_datos_entrenamiento(ruta_dataset), fraccion_prueba)
+
+    inicio = time.perf_counter()
+    model = ajustar(construir_modelo(hiperparametros, columnas), entrenamiento[columnas], entrenamiento[target], n_jobs)
+    tiempo_entrenamiento = time.perf_counter() - inicio
+
+    errores = model.predict(prueba[columnas]) - prueba[target].to_numpy()
+    un_dia = prueba[columnas].iloc[:24]
+    model.predict(un_dia)
+    repeticiones = 50
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        model.predict(un_dia)
+    latencia_ms = (time.perf_counter() - inicio) / repeticiones * 1000
+
+    buffer = io.BytesIO()
+    pickle.dump(model, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    return {
+        'hiperparametros': hiperparametros,
+        'columnas': list(columnas),
+        'filas_entrenamiento': len(entrenamiento),
+        'filas_prueba': len(prueba),
+        'tiempo_entrenamiento_s': round(tiempo_entrenamiento, 3),
+        'memoria_pico_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'latencia_24_filas_ms': round(latencia_ms, 3),
+        'tamano_modelo_mb': round(buffer.tell() / 1024 ** 2, 2),
+        'mae': round(float(np.mean(np.abs(errores))), 2),
+        'rmse': round(float(np.sqrt(np.mean(errores ** 2))), 2),
+    }
+
+
+def _evaluar_en_proceso(argumentos):
+    return evaluar_configuracion(*argumentos)
+
+
+# Evalúa todas las configuraciones en paralelo, un proceso nuevo por configuración.
+# Cada proceso entrena con un solo núcleo para no competir con los demás.
+def barrido(configuraciones, ruta_dataset=RUTA_DATASET, procesos=None):
+    tareas = [(c, ruta_dataset, 1) for c in configuraciones]
+    with ProcessPoolExecutor(max_workers=procesos, max_tasks_per_child=1) as pool:
+        return list(pool.map(_evaluar_en_proceso, tareas))
+
+
+def generar_configuraciones(n_estimators, max_depth, min_samples_leaf, sin_dia=False):
+    conjuntos = [features] + ([[c for c in features if c != 'Dia']] if sin_dia else [])
+    configuraciones = []
+    for n, profundidad, hoja, columnas in itertools.product(n_estimators, max_depth, min_samples_leaf, conjuntos):
+        hiperparametros = dict(HIPERPARAMETROS, n_estimators=n, min_samples_leaf=hoja)
+        if profundidad:
+            hiperparametros['max_depth'] = profundidad
+        configuraciones.append({'hiperparametros': hiperparametros, 'columnas': columnas})
+    return configuraciones
+
+
+def imprimir_resultados(resultados):
+    print(f"{'n_est':>5} {'prof':>5} {'hoja':>4} {'cols':>4} | {'fit s':>6} {'RSS MB':>7} {'pred ms':>7} {'MB':>6} | {'MAE':>6} {'RMSE':>6}")
+    for r in sorted(resultados, key=lambda r: r['mae']):
+        h = r['hiperparametros']
+        print(f"{h['n_estimators']:>5} {str(h.get('max_depth', '-')):>5} {h.get('min_samples_leaf', 1):>4} {len(r['columnas']):>4} | "
+              f"{r['tiempo_entrenamiento_s']:>6} {r['memoria_pico_mb']:>7} {r['latencia_24_filas_ms']:>7} {r['tamano_modelo_mb']:>6} | "
+              f"{r['mae']:>6} {r['rmse']:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena y guarda el modelo de predicción de tráfico.")
+    parser.add_argument('--dataset', default=RUTA_DATASET, help="CSV de entrenamiento")
+    parser.add_argument('--forzar', action='store_true', help="Reentrenar aunque exista un artefacto vigente")
+    parser.add_argument('--n-jobs', type=int, default=N_JOBS, help="Núcleos para entrenar (-1 = todos)")
+    parser.add_argument('--evaluar', action='store_true', help="Evaluar la configuración actual con corte temporal")
+    parser.add_argument('--barrido', action='store_true', help="Evaluar en paralelo una grilla de configuraciones")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos del barrido (por defecto, todos los núcleos)")
+    parser.add_argument('--n-estimators', type=int, nargs='+', default=[50, 100, 200])
+    parser.add_argument('--max-depth', type=int, nargs='+', default=[0, 12, 20], help="0 = sin límite")
+    parser.add_argument('--min-samples-leaf', type=int, nargs='+', default=[1, 3])
+    parser.add_argument('--sin-dia', action='store_true', help="Incluir también la variante sin la feature 'Dia'")
+    parser.add_argument('--salida', help="Guardar los resultados en este archivo JSON")
+    args = parser.parse_args()
+
+    if args.evaluar or args.barrido:
+        if args.barrido:
+            configuraciones = generar_configuraciones(args.n_estimators, args.max_depth, args.min_samples_leaf, args.sin_dia)
+            print(f"🔬 Evaluando {len(configuraciones)} configuraciones...")
+            resultados = barrido(configuraciones, args.dataset, args.procesos)
+        else:
+            resultados = [evaluar_configuracion({}, args.dataset, args.n_jobs)]
+        imprimir_resultados(resultados)
+        if args.salida:
+            with open(args.salida, 'w') as f:
+                json.dump(resultados, f, indent=2)
+    else:
+        huella = huella_modelo(args.dataset)
+        if args.forzar or not os.path.exists(ruta_artefacto(huella)):
+            inicio = time.perf_counter()
+            model = entrenar_modelo(args.dataset, n_jobs=args.n_jobs)
+            print(f"⏱️ Entrenamiento: {time.perf_counter() - inicio:.2f} s")
+            print(f"📦 Artefacto guardado en {guardar_modelo(model, huella)}")
+        elif artefactos_publicados(huella):
+            print(f"📦 Los artefactos de {huella} ya están al día.")
+            raise SystemExit(0)
+        else:
+            model = cargar_modelo(args.dataset, huella=huella)
+        inicio = time.perf_counter()
+        motor, tabla = publicar_artefactos(model, huella)
+        print(f"📦 Motor ({motor.n_arboles} árboles) y tabla ({tabla.flujos.shape[0]} rutas x {tabla.flujos.shape[2]} días) "
+              f"publicados en {time.perf_counter() - inicio:.2f} s")
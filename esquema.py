@@ -0,0 +1,146 @@
+#=====================
+#   ESQUEMA COMÚN
+#=====================
+# Los dos datasets nombran distinto las mismas cosas:
+#   - Dataset_limpio.csv (tablero): "Av. Paseo de la Republica", "Av. de la Marina",
+#     DiaSemana en inglés y corrido (2025-05-01 figura como "Saturday");
+#   - dataset_trafico_limpio.csv (modelo): "Av. paseo de la república", "Av. la marina",
+#     DiaSemana en español y correcto.
+# Este módulo lleva ambos a claves comunes:
+#   - clave_ruta(): sin tildes, minúsculas, espacios simples y alias conocidos;
+#   - CatalogoRutas: código entero por clave + tabla de equivalencias entre nombres;
+#   - normalizar_calendario(): DiaSemana recalculado desde Fecha;
+#   - normalizar_etiquetas(): feriado/congestión en minúsculas, eventos con mayúscula inicial.
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+import pandas as pd
+from formato_compacto import leer_dataset
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DIAS_SEMANA = np.array(['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'], dtype=object)
+FERIADOS = ['no', 'si']
+
+# Nombres que difieren en más que tildes/mayúsculas (clave -> clave canónica)
+ALIAS_RUTAS = {
+    'av. de la marina': 'av. la marina',
+}
+
+# Tope de nombres recordados por catálogo (las consultas del servicio pueden traer cualquier texto)
+MAX_MEMO = 4096
+
+
+class RutaDesconocida(ValueError):
+    def __init__(self, ruta, conocidas=()):
+        conocidas = list(conocidas)
+        detalle = f" (rutas disponibles: {', '.join(conocidas)})" if conocidas else ""
+        super().__init__(f"Ruta desconocida: {ruta}{detalle}")
+        self.ruta = ruta
+
+
+def clave_ruta(nombre):
+    texto = unicodedata.normalize('NFKD', str(nombre))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'\s+', ' ', texto).strip().lower()
+    return ALIAS_RUTAS.get(texto, texto)
+
+
+# 1. Catálogo de rutas: un código entero por clave y el nombre de cada ruta en cada dataset
+class CatalogoRutas:
+    def __init__(self, rutas_modelo, zonas_tablero=()):
+        nombres_modelo = {}
+        nombres_tablero = {}
+        for nombre in rutas_modelo:
+            nombres_modelo.setdefault(clave_ruta(nombre), str(nombre))
+        for nombre in zonas_tablero:
+            nombres_tablero.setdefault(clave_ruta(nombre), str(nombre))
+
+        self.claves = sorted(set(nombres_modelo) | set(nombres_tablero))
+        self._codigos = {c: i for i, c in enumerate(self.claves)}
+        self._nombres_modelo = nombres_modelo
+        self._nombres_tablero = nombres_tablero
+        self._memo = {}  # nombre tal cual llega -> código (evita repetir la normalización)
+
+    # Tabla de equivalencias (código, clave, nombre en el modelo, nombre en el tablero)
+    @property
+    def tabla(self):
+        return pd.DataFrame({
+            'Codigo': np.arange(len(self.claves), dtype=np.int16),
+            'Clave': self.claves,
+            'RutaModelo': [self._nombres_modelo.get(c) for c in self.claves],
+            'ZonaTablero': [self._nombres_tablero.get(c) for c in self.claves],
+        })
+
+    # Código de una ruta escrita en cualquiera de los dos formatos, o -1 si no se conoce
+    def codigo(self, nombre):
+        codigo = self._memo.get(nombre)
+        if codigo is None:
+            codigo = self._codigos.get(clave_ruta(nombre), -1)
+            if len(self._memo) >= MAX_MEMO:
+                self._memo.clear()
+            self._memo[nombre] = codigo
+        return codigo
+
+    # Nombre con el que el modelo conoce la ruta; si no la conoce, RutaDesconocida
+    # (o el mismo nombre sin cambios con estricto=False, p. ej. para rutas nuevas en la ingesta)
+    def ruta_modelo(self, nombre, estricto=True):
+        codigo = self.codigo(nombre)
+        ruta = self._nombres_modelo.get(self.claves[codigo]) if codigo >= 0 else None
+        if ruta is None:
+            if not estricto:
+                return str(nombre).strip()
+            raise RutaDesconocida(nombre, sorted(self._nombres_modelo.values()))
+        return ruta
+
+    # Nombre de la ruta en el tablero (o el del modelo si el tablero no la tiene)
+    def zona_tablero(self, nombre):
+        codigo = self.codigo(nombre)
+        if codigo < 0:
+            return str(nombre)
+        clave = self.claves[codigo]
+        return self._nombres_tablero.get(clave) or self._nombres_modelo[clave]
+
+
+# 2. Calendario y etiquetas
+def normalizar_calendario(df):
+    fechas = pd.to_datetime(df['Fecha'])
+    df['DiaSemana'] = DIAS_SEMANA[fechas.dt.dayofweek.to_numpy()]
+    return df
+
+
+def normalizar_etiquetas(df):
+    for columna in ('Feriado', 'Congestion'):
+        if columna in df.columns:
+            df[columna] = df[columna].astype(str).str.strip().str.lower()
+    if 'EventoEspecial' in df.columns:
+        df['EventoEspecial'] = df['EventoEspecial'].astype(str).str.strip().str.capitalize()
+    return df
+
+
+# 3. Catálogo de los dos datasets base, calculado una vez por proceso (se
+#    recalcula si cambia alguno de los CSV)
+RUTAS_CATALOGO = (os.path.join(BASE_DIR, 'dataset_trafico_limpio.csv'), os.path.join(BASE_DIR, 'Dataset_limpio.csv'))
+_lock = threading.Lock()
+_catalogo = None  # (firma, CatalogoRutas)
+
+
+def _firma():
+    return tuple((os.stat(r).st_mtime_ns, os.stat(r).st_size) for r in RUTAS_CATALOGO)
+
+
+def catalogo_rutas():
+    global _catalogo
+    firma = _firma()
+    with _lock:
+        if _catalogo is None or _catalogo[0] != firma:
+            ruta_modelo, ruta_tablero = RUTAS_CATALOGO
+            _catalogo = (firma, CatalogoRutas(leer_dataset(ruta_modelo)['Ruta'].unique(),
+                                              leer_dataset(ruta_tablero)['Zona'].unique()))
+        return _catalogo[1]
+
+
+if __name__ == "__main__":
+    print(catalogo_rutas().tabla.to_string(index=False))
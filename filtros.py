@@ -0,0 +1,87 @@
+#=======================
+#   MOTOR DE FILTROS
+#=======================
+# Índices invertidos (valor -> posiciones de fila) por columna, construidos una
+# vez por carga del dataset. Un filtro es la intersección de los índices de
+# las columnas seleccionadas; las vistas resultantes y sus promedios por zona
+# quedan memorizados. "Todas" o None significa que la columna no filtra.
+#
+# Las vistas memorizadas son compartidas: no modificarlas.
+import numpy as np
+import pandas as pd
+from cache_lru import CacheLRU
+
+TODAS = "Todas"
+
+
+class MotorFiltros:
+    # Con `base` (el motor de un df que es el comienzo de este) solo se indexan las
+    # filas nuevas y se suman a los índices de base, que no se modifican
+    def __init__(self, df, columnas=("Fecha", "Zona", "Feriado", "Evento", "Congestion"), max_vistas=256, base=None):
+        self.df = df
+        self.max_vistas = max_vistas
+        self.categorias = {}
+        self._indices = {}
+        inicio = len(base.df) if base is not None else 0
+        for columna in columnas:
+            valores = df[columna].iloc[inicio:]
+            # Las fechas se filtran por día; el resto se compara como texto, igual que antes en app.py
+            valores = valores.dt.date if columna == "Fecha" else valores.astype(str)
+            categorico = pd.Categorical(valores)
+            codigos = categorico.codes
+            orden = np.argsort(codigos, kind="stable") + inicio
+            cortes = np.cumsum(np.bincount(codigos, minlength=len(categorico.categories)))[:-1]
+            indices = dict(zip(categorico.categories, np.split(orden, cortes)))
+            categorias = categorico.categories
+            if base is not None:
+                previos = base._indices[columna]
+                indices = {**previos, **{v: np.concatenate([previos[v], pos]) if v in previos else pos
+                                         for v, pos in indices.items()}}
+                categorias = base.categorias[columna].union(categorias)
+            self.categorias[columna] = categorias
+            self._indices[columna] = indices
+        self._vistas = CacheLRU(max_vistas)
+        self._promedios = CacheLRU(max_vistas)
+
+    # Motor para `df` = el df de este motor + filas nuevas al final (cachés vacías)
+    def extender(self, df):
+        return MotorFiltros(df, tuple(self._indices), self.max_vistas, base=self)
+
+    # Valores posibles de una columna (ordenados)
+    def opciones(self, columna):
+        return list(self.categorias[columna])
+
+    def clave(self, criterios):
+        return tuple(sorted((c, v) for c, v in criterios.items() if v is not None and v != TODAS))
+
+    def posiciones(self, **criterios):
+        clave = self.clave(criterios)
+        if not clave:
+            return np.arange(len(self.df))
+        listas = sorted((self._indices[c].get(v, np.empty(0, dtype=np.intp)) for c, v in clave), key=len)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            if not len(resultado):
+                break
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+        return resultado
+
+    # Filas que cumplen todos los criterios, p. ej. filtrar(Fecha=fecha, Zona="Av. Abancay")
+    def filtrar(self, **criterios):
+        clave = self.clave(criterios)
+        return self._vistas.obtener_o_calcular(clave, lambda: self.df.iloc[self.posiciones(**criterios)])
+
+    # Flujo vehicular promedio por zona para los mismos criterios
+    def promedio_por_zona(self, **criterios):
+        clave = self.clave(criterios)
+        return self._promedios.obtener_o_calcular(clave,
+                                                  lambda: self.filtrar(**criterios).groupby("Zona")["FlujoVehicular"].mean().reset_index())
+
+    def estadisticas(self):
+        return {'vistas': len(self._vistas), 'promedios': len(self._promedios),
+                'aciertos': self._vistas.aciertos + self._promedios.aciertos,
+                'fallos': self._vistas.fallos + self._promedios.fallos}
+
+    def limpiar(self):
+        self._vistas.limpiar()
+        self._promedios.limpiar()
@@ -0,0 +1,184 @@
+#=========================
+#   FORMATO COMPACTO
+#=========================
+# Guarda un CSV como una carpeta de columnas binarias (.npy) más un meta.json:
+#   - textos repetidos (rutas, días, feriado, eventos, congestión) -> categóricas
+#     codificadas por diccionario (int8/int16 + lista de categorías);
+#   - "HH:MM" y "HH:MM-HH:MM" en horas exactas -> código de hora int8;
+#   - fechas "YYYY-MM-DD" -> días desde 1970 (int32);
+#   - enteros -> el tipo más chico que alcance (p. ej. int16 para el flujo).
+# Las columnas se leen con np.load(mmap_mode='r'), sin parsear texto.
+#
+# leer_dataset(ruta_csv) es el punto de entrada para app.py (vía datos.py) y
+# para el entrenamiento: usa la versión compacta si está al día con el CSV y,
+# si no, la regenera. El CSV sigue siendo la fuente de verdad. Cada versión del
+# CSV (fecha de modificación y tamaño) tiene su propia carpeta, que nunca se
+# reescribe: varios procesos pueden convertir y leer a la vez.
+#
+# Uso:  python formato_compacto.py [archivo.csv ...]   (por defecto, los dos datasets)
+import os
+import re
+import sys
+import glob
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_COMPACTO = os.path.join(BASE_DIR, 'datos_compactos')
+VERSION_FORMATO = 1
+
+PATRON_FECHA = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+PATRON_HORA = re.compile(r'^([01]\d|2[0-3]):00$')
+PATRON_INTERVALO = re.compile(r'^([01]\d|2[0-3]):00-([01]\d|2[0-3]):00$')
+HORAS = [f"{h:02d}:00" for h in range(24)]
+INTERVALOS = [f"{h:02d}:00-{(h + 1) % 24:02d}:00" for h in range(24)]
+
+
+def _firma(ruta_csv):
+    st = os.stat(ruta_csv)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _nombre(ruta_csv):
+    return os.path.splitext(os.path.basename(ruta_csv))[0]
+
+
+def ruta_compacta(ruta_csv, firma=None):
+    mtime, tamano = firma or _firma(ruta_csv)
+    return os.path.join(DIRECTORIO_COMPACTO, f'{_nombre(ruta_csv)}-{mtime}-{tamano}')
+
+
+def _entero_minimo(valores):
+    for tipo in (np.int8, np.int16, np.int32):
+        info = np.iinfo(tipo)
+        if valores.min() >= info.min and valores.max() <= info.max:
+            return valores.astype(tipo)
+    return valores.astype(np.int64)
+
+
+def _codificar_columna(serie):
+    if pd.api.types.is_integer_dtype(serie):
+        return 'entero', _entero_minimo(serie.to_numpy()), None
+    if pd.api.types.is_float_dtype(serie):
+        return 'real', serie.to_numpy(), None
+
+    texto = serie.astype(str)
+    if texto.str.match(PATRON_FECHA).all():
+        dias = pd.to_datetime(texto, format='%Y-%m-%d').to_numpy().astype('datetime64[D]').astype(np.int32)
+        return 'fecha', dias, None
+    if texto.str.match(PATRON_HORA).all():
+        return 'hora', texto.str[:2].astype(int).to_numpy().astype(np.int8), None
+    if texto.isin(INTERVALOS).all():
+        return 'intervalo', texto.str[:2].astype(int).to_numpy().astype(np.int8), None
+
+    categorico = pd.Categorical(texto)
+    return 'categoria', _entero_minimo(categorico.codes.astype(np.int64)), list(categorico.categories)
+
+
+# 1. Conversión CSV -> carpeta compacta: se escribe en un temporal único y se
+#    renombra. Si la carpeta ya existe, otro proceso (otra sesión de Streamlit,
+#    el servicio) terminó primero y se usa la suya.
+def convertir_csv(ruta_csv, destino=None):
+    firma = _firma(ruta_csv)
+    destino = destino or ruta_compacta(ruta_csv, firma)
+    df = pd.read_csv(ruta_csv)
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = tempfile.mkdtemp(prefix=os.path.basename(destino) + '.', suffix='.tmp', dir=os.path.dirname(destino))
+    try:
+        columnas = []
+        for i, nombre in enumerate(df.columns):
+            tipo, valores, categorias = _codificar_columna(df[nombre])
+            np.save(os.path.join(temporal, f'{i}.npy'), valores)
+            columnas.append({'nombre': nombre, 'tipo': tipo, 'dtype': str(valores.dtype), 'categorias': categorias})
+
+        with open(os.path.join(temporal, 'meta.json'), 'w') as f:
+            json.dump({'version': VERSION_FORMATO, 'origen': os.path.basename(ruta_csv), 'firma_origen': firma,
+                       'filas': len(df), 'columnas': columnas}, f, ensure_ascii=False)
+        try:
+            os.rename(temporal, destino)
+        except OSError:
+            if not esta_al_dia(ruta_csv, destino):
+                raise
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+    _borrar_versiones_viejas(ruta_csv, destino)
+    return destino
+
+
+# Carpetas de versiones anteriores del mismo CSV (no los temporales de otros procesos)
+def _borrar_versiones_viejas(ruta_csv, vigente):
+    for directorio in glob.glob(os.path.join(os.path.dirname(vigente), glob.escape(_nombre(ruta_csv)) + '-*')):
+        if directorio != vigente and not directorio.endswith('.tmp'):
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+def _leer_meta(directorio):
+    with open(os.path.join(directorio, 'meta.json')) as f:
+        return json.load(f)
+
+
+# 2. Lectura: categóricas para los textos, datetime64 para las fechas, enteros chicos para el resto
+def _decodificar_columna(tipo, valores, categorias):
+    if tipo == 'categoria':
+        return pd.Categorical.from_codes(valores, categorias)
+    if tipo == 'hora':
+        return pd.Categorical.from_codes(valores, HORAS)
+    if tipo == 'intervalo':
+        return pd.Categorical.from_codes(valores, INTERVALOS)
+    if tipo == 'fecha':
+        return np.asarray(valores).astype('datetime64[D]').astype('datetime64[ns]')
+    return valores
+
+
+def leer_compacto(directorio, mmap=True):
+    meta = _leer_meta(directorio)
+    columnas = {}
+    for i, columna in enumerate(meta['columnas']):
+        valores = np.load(os.path.join(directorio, f'{i}.npy'), mmap_mode='r' if mmap else None)
+        columnas[columna['nombre']] = _decodificar_columna(columna['tipo'], valores, columna['categorias'])
+    return pd.DataFrame(columnas)
+
+
+# El CSV con los mismos tipos que leer_compacto, sin escribir nada en disco
+def leer_csv(ruta_csv):
+    df = pd.read_csv(ruta_csv)
+    return pd.DataFrame({nombre: _decodificar_columna(*_codificar_columna(df[nombre])) for nombre in df.columns})
+
+
+def esta_al_dia(ruta_csv, directorio=None):
+    directorio = directorio or ruta_compacta(ruta_csv)
+    try:
+        meta = _leer_meta(directorio)
+    except (OSError, ValueError):
+        return False
+    return meta.get('version') == VERSION_FORMATO and meta.get('firma_origen') == _firma(ruta_csv)
+
+
+# 3. Punto de entrada: versión compacta al día (regenerándola si hace falta) o, si
+#    no se puede escribir en disco, el CSV leído con los mismos tipos
+def leer_dataset(ruta_csv, mmap=True):
+    try:
+        directorio = ruta_compacta(ruta_csv)
+        if not esta_al_dia(ruta_csv, directorio):
+            convertir_csv(ruta_csv, directorio)
+        return leer_compacto(directorio, mmap)
+    except OSError as e:
+        print(f"⚠️ No se pudo usar el formato compacto para {ruta_csv} ({e}); se leerá el CSV.")
+        return leer_csv(ruta_csv)
+
+
+if __name__ == "__main__":
+    archivos = sys.argv[1:] or [os.path.join(BASE_DIR, 'Dataset_limpio.csv'),
+                                os.path.join(BASE_DIR, 'dataset_trafico_limpio.csv')]
+    for ruta_csv in archivos:
+        destino = convertir_csv(ruta_csv)
+        meta = _leer_meta(destino)
+        bytes_compacto = sum(os.path.getsize(os.path.join(destino, n)) for n in os.listdir(destino))
+        print(f"📦 {os.path.basename(ruta_csv)}: {os.path.getsize(ruta_csv)} bytes -> {bytes_compacto} bytes "
+              f"({meta['filas']} filas) en {destino}")
+        for columna in meta['columnas']:
+            print(f"   {columna['nombre']:<16} {columna['tipo']:<10} {columna['dtype']}")
@@ -0,0 +1,155 @@
+#=====================
+#   GRÁFICOS
+#=====================
+# Construcción de las figuras de la sección de análisis de app.py:
+#   - caché LRU de figuras por (gráfico, tipo, filtros), válida mientras no
+#     cambien los datos cargados (ver datos.py), para no rehacerlas en cada
+#     rerun de Streamlit cuando cambia otro widget;
+#   - presupuesto de puntos: por encima de PRESUPUESTO_PUNTOS las series se
+#     reducen con LTTB (Largest-Triangle-Three-Buckets) y el boxplot deja de
+#     enviar todos los puntos y pasa a cuartiles precalculados, de modo que el
+#     JSON que Streamlit manda al navegador no crece con los días cargados.
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from instrumentacion import medir, registrar_fuente
+from cache_lru import CacheLRU
+
+PRESUPUESTO_PUNTOS = 5000
+ETIQUETAS_HORA = {"Valor": "Flujo Vehicular", "HoraInicio": "Hora"}
+ETIQUETAS_ZONA = {"FlujoVehicular": "Flujo Vehicular Promedio", "Zona": "Zona"}
+TITULO_HORA = "Flujo Vehicular por Hora por Zona"
+TITULO_ZONA = "Flujo Vehicular Promedio por Zona"
+
+
+# 1. LTTB: índices de los `n` puntos que mejor conservan la forma de la serie
+def lttb(x, y, n):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    largo = len(x)
+    if n >= largo or n < 3:
+        return np.arange(largo)
+
+    indices = np.empty(n, dtype=np.intp)
+    indices[0], indices[-1] = 0, largo - 1
+    limites = np.linspace(1, largo - 1, n - 1).astype(int)  # n - 2 cubetas entre el primero y el último
+    anterior = 0
+    for k in range(n - 2):
+        inicio, fin = limites[k], limites[k + 1]
+        # Promedio de la cubeta siguiente (o el último punto)
+        siguiente_fin = limites[k + 2] if k + 2 < len(limites) else largo
+        siguiente_inicio = fin if k + 2 < len(limites) else largo - 1
+        x_sig = x[siguiente_inicio:siguiente_fin].mean()
+        y_sig = y[siguiente_inicio:siguiente_fin].mean()
+        # Punto de la cubeta que forma el triángulo de mayor área
+        areas = np.abs((x[anterior] - x_sig) * (y[inicio:fin] - y[anterior])
+                       - (x[anterior] - x[inicio:fin]) * (y_sig - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[k + 1] = anterior
+    return indices
+
+
+# Reduce cada serie (una por color) a su parte del presupuesto; x puede ser categórica
+def reducir_series(df, x, y, color, presupuesto=PRESUPUESTO_PUNTOS):
+    if len(df) <= presupuesto:
+        return df
+    grupos = df.groupby(color, observed=True, sort=False)
+    por_serie = max(3, presupuesto // grupos.ngroups)
+    partes = []
+    for _, serie in grupos:
+        serie = serie.sort_values(x, kind="stable")
+        posicion = pd.factorize(serie[x], sort=True)[0] if not pd.api.types.is_numeric_dtype(serie[x]) else serie[x]
+        partes.append(serie.iloc[lttb(posicion, serie[y], por_serie)])
+    return pd.concat(partes)
+
+
+# Boxplot con cuartiles calculados aquí: envía 5 números por caja en vez de cada fila
+def boxplot_resumido(df, x, y, color, labels=None, title=None):
+    cuantiles = (df.groupby([color, x], observed=True)[y]
+                   .quantile([0, 0.25, 0.5, 0.75, 1]).unstack().reset_index())
+    cuantiles.columns = [color, x, "min", "q1", "mediana", "q3", "max"]
+    rango = cuantiles["q3"] - cuantiles["q1"]
+    cuantiles["inferior"] = np.maximum(cuantiles["min"], cuantiles["q1"] - 1.5 * rango)
+    cuantiles["superior"] = np.minimum(cuantiles["max"], cuantiles["q3"] + 1.5 * rango)
+
+    fig = go.Figure()
+    colores = px.colors.qualitative.Plotly
+    for i, (nombre, grupo) in enumerate(cuantiles.groupby(color, observed=True, sort=True)):
+        fig.add_trace(go.Box(name=str(nombre), x=grupo[x], q1=grupo["q1"], median=grupo["mediana"], q3=grupo["q3"],
+                             lowerfence=grupo["inferior"], upperfence=grupo["superior"],
+                             marker_color=colores[i % len(colores)], legendgroup=str(nombre)))
+    labels = labels or {}
+    fig.update_layout(boxmode="group", title=title, legend_title_text=labels.get(color, color),
+                      xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    return fig
+
+
+# 2. Figuras de la sección "Flujo Vehicular por Hora"
+def figura_flujo_hora(tipo_grafico, df_long, df_filt, presupuesto=PRESUPUESTO_PUNTOS):
+    if tipo_grafico == "Boxplot":
+        # Usa las filas filtradas; con muchas filas, cuartiles precalculados sin puntos
+        df_puntos = df_filt.rename(columns={"FlujoVehicular": "Valor"})
+        titulo = TITULO_HORA + " (Boxplot)"
+        if len(df_puntos) > presupuesto:
+            return boxplot_resumido(df_puntos, "HoraInicio", "Valor", "Zona", labels=ETIQUETAS_HORA, title=titulo)
+        return px.box(df_puntos, x="HoraInicio", y="Valor", color="Zona", points="all", labels=ETIQUETAS_HORA, title=titulo)
+
+    df_long = reducir_series(df_long, "HoraInicio", "Valor", "Zona", presupuesto)
+    if tipo_grafico == "Área":
+        return px.area(df_long, x="HoraInicio", y="Valor", color="Zona", labels=ETIQUETAS_HORA, title=TITULO_HORA)
+    if tipo_grafico == "Línea":
+        return px.line(df_long, x="HoraInicio", y="Valor", color="Zona", labels=ETIQUETAS_HORA, title=TITULO_HORA)
+    if tipo_grafico == "Barra":
+        # Barras agrupadas por zona en cada hora
+        return px.bar(df_long, x="HoraInicio", y="Valor", color="Zona", barmode='group', labels=ETIQUETAS_HORA, title=TITULO_HORA)
+    # Línea con Marcadores
+    fig = px.scatter(df_long, x="HoraInicio", y="Valor", color="Zona", labels=ETIQUETAS_HORA, title=TITULO_HORA)
+    fig.update_traces(mode='lines+markers')
+    return fig
+
+
+
+# 3. Figuras de la sección "Flujo Vehicular Promedio por Zona"
+def figura_promedio_zona(tipo_grafico, promedio_zona):
+    if tipo_grafico == "Barras":
+        return px.bar(promedio_zona, x="Zona", y="FlujoVehicular", labels=ETIQUETAS_ZONA, color="Zona",
+                      color_continuous_scale="Viridis", title=TITULO_ZONA)
+    if tipo_grafico == "Torta":
+        return px.pie(promedio_zona, names="Zona", values="FlujoVehicular", title=TITULO_ZONA, color="Zona")
+    if tipo_grafico == "Barras Horizontales":
+        return px.bar(promedio_zona, x="FlujoVehicular", y="Zona", orientation='h', labels=ETIQUETAS_ZONA, color="Zona",
+                      color_continuous_scale="Viridis", title=TITULO_ZONA)
+    if tipo_grafico == "Rosquilla":
+        return px.pie(promedio_zona, names="Zona", values="FlujoVehicular", hole=0.4, title=TITULO_ZONA, color="Zona")
+    # Dispersión
+    return px.scatter(promedio_zona, x="Zona", y="FlujoVehicular", size="FlujoVehicular", color="Zona",
+                      labels=ETIQUETAS_ZONA, title=TITULO_ZONA)
+
+
+# 4. Caché de figuras (ver cache_lru.py). `origen` es el objeto de datos del que
+#    salió la figura (DatosTrafico): si datos.py publica uno nuevo, las entradas
+#    viejas no se usan. Streamlit serializa la figura en cada envío, así que el
+#    tamaño del JSON se calcula solo cuando se piden estadísticas.
+class CacheFiguras(CacheLRU):
+    def __init__(self, max_entradas=64):
+        super().__init__(max_entradas)
+
+    def figura(self, clave, origen, construir):
+        def construir_medido():
+            with medir(f'graficos.construir.{clave[0]}'):
+                return construir()
+        return self.obtener_o_calcular(clave, construir_medido, origen)
+
+    def estadisticas(self):
+        resultado = super().estadisticas()
+        resultado['bytes_json'] = sum(len(f.to_json()) for f in self.valores())
+        return resultado
+
+
+def clave_filtros(criterios):
+    return tuple(sorted((c, str(v)) for c, v in criterios.items()))
+
+
+cache_figuras = CacheFiguras()
+registrar_fuente('graficos', cache_figuras.estadisticas)
@@ -0,0 +1,172 @@
+#=====================
+#   INGESTA DE DATOS
+#=====================
+# Recibe conteos horarios nuevos sin recargar ni reentrenar todo:
+#   - valida las filas (esquema de dataset_trafico_limpio.csv) y las acumula;
+#   - cada `tamano_bloque` filas escribe un bloque CSV en "ingesta/";
+#   - actualiza el cubo y los filtros del tablero en memoria (datos.py);
+#   - cada `umbral_filas` filas nuevas, o cada `intervalo_segundos`, reentrena
+#     el modelo en segundo plano. El modelo actual sigue respondiendo hasta que
+#     el nuevo (con su motor y su tabla) está listo y se publica de una vez.
+#
+# Uso:
+#   ingestor = IngestorTrafico()
+#   ingestor.iniciar()                 # refresco programado (opcional)
+#   ingestor.agregar_filas(df_nuevas)  # DataFrame o lista de dicts
+import os
+import re
+import time
+import threading
+import pandas as pd
+import datos
+import modelo_prediccion
+from esquema import DIAS_SEMANA, catalogo_rutas
+from entrenar_modelo import cargar_modelo, huella_modelo, publicar_artefactos
+
+COLUMNAS_REQUERIDAS = ['Ruta', 'Fecha', 'Intervalo', 'Feriado', 'FlujoVehicular']
+COLUMNAS_ALMACEN = ['Ruta', 'Fecha', 'DiaSemana', 'Intervalo', 'Feriado', 'EventoEspecial', 'FlujoVehicular', 'Congestion']
+PATRON_INTERVALO = re.compile(r'^([01]\d|2[0-3]):00-([01]\d|2[0-3]):00$')
+
+
+# Valida y completa las filas; lanza ValueError describiendo las filas inválidas
+def validar_filas(filas):
+    df = pd.DataFrame(filas)
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+
+    df = df.copy()
+    # Rutas ya conocidas se guardan con el nombre del modelo ("Av. Abancay" -> "Av. abancay")
+    catalogo = catalogo_rutas()
+    df['Ruta'] = [catalogo.ruta_modelo(r, estricto=False) for r in df['Ruta'].astype(str)]
+    fechas = pd.to_datetime(df['Fecha'], format='%Y-%m-%d', errors='coerce')
+    df['Feriado'] = df['Feriado'].astype(str).str.strip().str.lower()
+    flujos = pd.to_numeric(df['FlujoVehicular'], errors='coerce')
+
+    errores = {
+        'Ruta vacía': df['Ruta'].eq('') | df['Ruta'].eq('nan'),
+        'Fecha inválida': fechas.isna(),
+        'Intervalo inválido': ~df['Intervalo'].astype(str).str.match(PATRON_INTERVALO),
+        'Feriado distinto de si/no': ~df['Feriado'].isin(['si', 'no']),
+        'FlujoVehicular no es un entero >= 0': flujos.isna() | (flujos < 0) | (flujos % 1 != 0),
+    }
+    problemas = [f"{motivo} (filas {list(df.index[mascara][:5])})" for motivo, mascara in errores.items() if mascara.any()]
+    if problemas:
+        raise ValueError("Filas inválidas: " + "; ".join(problemas))
+
+    df['Fecha'] = fechas.dt.strftime('%Y-%m-%d')
+    df['DiaSemana'] = DIAS_SEMANA[fechas.dt.dayofweek.to_numpy()]
+    df['FlujoVehicular'] = flujos.astype(int)
+    if 'EventoEspecial' not in df.columns:
+        df['EventoEspecial'] = 'ninguno'
+    if 'Congestion' not in df.columns:
+        df['Congestion'] = [c.lower() for c in modelo_prediccion.calcular_congestion_vectorizada(df['FlujoVehicular'].to_numpy())]
+    return df[COLUMNAS_ALMACEN].reset_index(drop=True)
+
+
+class IngestorTrafico:
+    def __init__(self, tamano_bloque=500, umbral_filas=1000, intervalo_segundos=3600):
+        self.tamano_bloque = tamano_bloque
+        self.umbral_filas = umbral_filas
+        self.intervalo_segundos = intervalo_segundos
+        self.filas_desde_refresco = 0
+        self.ultimo_refresco = None
+        self.ultimo_error = None
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._refrescando = threading.Lock()
+        self._detener = threading.Event()
+        self._programador = None
+
+    # 1. Agregar filas: validar, acumular/escribir bloques y actualizar el tablero
+    def agregar_filas(self, filas):
+        nuevas = validar_filas(filas)
+        if nuevas.empty:
+            return 0
+        with self._lock:
+            self._pendientes.append(nuevas)
+            lleno = sum(len(p) for p in self._pendientes) >= self.tamano_bloque
+            # Primero la memoria y después el bloque (ver datos.agregar_filas_trafico):
+            # con el bloque ya en disco, la carga lo leería y las filas quedarían dos veces
+            datos.agregar_filas_trafico(datos.a_esquema_tablero(nuevas),
+                                        persistir=self._escribir_bloque if lleno else None)
+            self.filas_desde_refresco += len(nuevas)
+            refrescar = self.filas_desde_refresco >= self.umbral_filas
+        if refrescar:
+            self.refrescar_modelo()
+        return len(nuevas)
+
+    def _escribir_bloque(self):
+        if not self._pendientes:
+            return None
+        bloque = pd.concat(self._pendientes, ignore_index=True)
+        os.makedirs(datos.DIRECTORIO_INGESTA, exist_ok=True)
+        ruta = os.path.join(datos.DIRECTORIO_INGESTA, f'bloque_{time.time_ns()}.csv')
+        bloque.to_csv(ruta + '.tmp', index=False)
+        os.replace(ruta + '.tmp', ruta)
+        self._pendientes = []
+        return ruta
+
+    # Escribe en disco las filas que todavía están en memoria
+    def vaciar(self):
+        with self._lock:
+            ruta = self._escribir_bloque()
+        if ruta is not None:
+            datos.marcar_vigente()
+        return ruta
+
+    # 2. Reentrenar en segundo plano y publicar el modelo nuevo de forma atómica
+    def refrescar_modelo(self, esperar=False):
+        if not self._refrescando.acquire(blocking=False):
+            return None  # ya hay un refresco en curso
+        self.vaciar()
+        with self._lock:
+            self.filas_desde_refresco = 0
+        hilo = threading.Thread(target=self._refrescar, name='refresco-modelo', daemon=True)
+        hilo.start()
+        if esperar:
+            hilo.join()
+        return hilo
+
+    def _refrescar(self):
+        try:
+            huella = huella_modelo()
+            model = cargar_modelo(huella=huella)  # la huella incluye los bloques nuevos: entrena y guarda
+            motor, tabla = publicar_artefactos(model, huella)
+            modelo_prediccion.reemplazar_modelo(model, motor, tabla)
+            self.ultimo_refresco = time.time()
+            self.ultimo_error = None
+        except Exception as e:
+            self.ultimo_error = e
+            print(f"⚠️ No se pudo refrescar el modelo ({e}); se mantiene el anterior.")
+        finally:
+            self._refrescando.release()
+
+    # 3. Refresco programado: cada `intervalo_segundos`, si llegaron filas nuevas
+    def iniciar(self):
+        if self._programador is not None:
+            return
+        self._detener.clear()
+
+        def programar():
+            while not self._detener.wait(self.intervalo_segundos):
+                if self.filas_desde_refresco:
+                    self.refrescar_modelo()
+
+        self._programador = threading.Thread(target=programar, name='programador-ingesta', daemon=True)
+        self._programador.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._programador is not None:
+            self._programador.join()
+            self._programador = None
+        self.vaciar()
+
+    def estadisticas(self):
+        with self._lock:
+            return {'filas_en_memoria': sum(len(p) for p in self._pendientes),
+                    'filas_desde_refresco': self.filas_desde_refresco,
+                    'bloques': len(datos.archivos_ingesta()),
+                    'ultimo_refresco': self.ultimo_refresco,
+                    'refrescando': self._refrescando.locked()}
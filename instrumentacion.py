@@ -0,0 +1,201 @@
+#========================
+#   INSTRUMENTACIÓN
+#========================
+# Tiempos y contadores livianos para saber en qué se va cada render de app.py
+# y cada predicción:
+#   - medir("nombre"): bloque `with` que acumula la duración del tramo;
+#   - Etapas("app"): marcas consecutivas dentro de una función larga (main())
+#     sin tener que reindentar cada sección;
+#   - contar("nombre", n): contadores; registrar_fuente(): funciones que
+#     devuelven valores actuales (tamaño de cachés, aciertos, memoria...).
+# Todo se exporta como líneas JSON o como texto de Prometheus.
+#
+# Uso:  python instrumentacion.py [--formato json|prometheus]   (muestra una predicción medida)
+import re
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+MUESTRAS_POR_TRAMO = 256
+CLAVES_NOMBRE = ('archivo', 'animacion')
+
+
+class _Tramo:
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.minimo = float('inf')
+        self.maximo = 0.0
+        self.ultimo = 0.0
+        self.muestras = deque(maxlen=MUESTRAS_POR_TRAMO)
+
+    def agregar(self, segundos):
+        self.llamadas += 1
+        self.total += segundos
+        self.minimo = min(self.minimo, segundos)
+        self.maximo = max(self.maximo, segundos)
+        self.ultimo = segundos
+        self.muestras.append(segundos)
+
+    def percentil(self, q):
+        muestras = sorted(self.muestras)
+        return muestras[min(len(muestras) - 1, int(q * len(muestras)))] if muestras else 0.0
+
+
+class Instrumentacion:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tramos = {}
+        self._contadores = {}
+        self._fuentes = {}
+        self.inicio = time.time()
+
+    # 1. Tiempos
+    def registrar(self, nombre, segundos):
+        with self._lock:
+            tramo = self._tramos.get(nombre)
+            if tramo is None:
+                tramo = self._tramos[nombre] = _Tramo()
+            tramo.agregar(segundos)
+
+    @contextmanager
+    def medir(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, time.perf_counter() - inicio)
+
+    # 2. Contadores y fuentes de valores actuales
+    def contar(self, nombre, n=1):
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    # funcion() devuelve un dict {nombre: número}; se consulta al exportar
+    def registrar_fuente(self, prefijo, funcion):
+        with self._lock:
+            self._fuentes[prefijo] = funcion
+
+    def _valores_fuentes(self):
+        with self._lock:
+            fuentes = list(self._fuentes.items())
+        valores = {}
+        for prefijo, funcion in fuentes:
+            try:
+                resultado = funcion()
+            except Exception:
+                continue
+            for clave, valor in _aplanar(resultado):
+                if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                    valores[f'{prefijo}.{clave}' if clave else prefijo] = valor
+        return valores
+
+    # 3. Resumen y exportación
+    def resumen(self):
+        with self._lock:
+            tramos = {
+                nombre: {'llamadas': t.llamadas, 'total_s': t.total, 'promedio_s': t.total / t.llamadas,
+                         'minimo_s': t.minimo, 'maximo_s': t.maximo, 'ultimo_s': t.ultimo,
+                         'p50_s': t.percentil(0.5), 'p95_s': t.percentil(0.95)}
+                for nombre, t in self._tramos.items()
+            }
+            contadores = dict(self._contadores)
+        return {'tramos': tramos, 'contadores': contadores, 'valores': self._valores_fuentes()}
+
+    def a_json_lineas(self):
+        marca = time.time()
+        resumen = self.resumen()
+        lineas = [json.dumps({'ts': marca, 'tipo': 'tramo', 'nombre': n, **v}) for n, v in sorted(resumen['tramos'].items())]
+        lineas += [json.dumps({'ts': marca, 'tipo': 'contador', 'nombre': n, 'valor': v}) for n, v in sorted(resumen['contadores'].items())]
+        lineas += [json.dumps({'ts': marca, 'tipo': 'valor', 'nombre': n, 'valor': v}) for n, v in sorted(resumen['valores'].items())]
+        return '\n'.join(lineas) + '\n'
+
+    def a_prometheus(self, prefijo='trafico'):
+        resumen = self.resumen()
+        lineas = []
+        if resumen['tramos']:
+            metrica = f'{prefijo}_tramo_segundos'
+            lineas += [f'# HELP {metrica} Duración de cada tramo medido', f'# TYPE {metrica} summary']
+            for nombre, t in sorted(resumen['tramos'].items()):
+                etiqueta = f'tramo="{nombre}"'
+                lineas += [f'{metrica}{{{etiqueta},quantile="0.5"}} {t["p50_s"]:.6f}',
+                           f'{metrica}{{{etiqueta},quantile="0.95"}} {t["p95_s"]:.6f}',
+                           f'{metrica}_sum{{{etiqueta}}} {t["total_s"]:.6f}',
+                           f'{metrica}_count{{{etiqueta}}} {t["llamadas"]}']
+        for nombre, valor in sorted(resumen['contadores'].items()):
+            metrica = f'{prefijo}_{_nombre_prometheus(nombre)}_total'
+            lineas += [f'# TYPE {metrica} counter', f'{metrica} {valor}']
+        for nombre, valor in sorted(resumen['valores'].items()):
+            metrica = f'{prefijo}_{_nombre_prometheus(nombre)}'
+            lineas += [f'# TYPE {metrica} gauge', f'{metrica} {valor}']
+        return '\n'.join(lineas) + '\n'
+
+    def limpiar(self):
+        with self._lock:
+            self._tramos.clear()
+            self._contadores.clear()
+
+
+def _aplanar(valor, clave=''):
+    if isinstance(valor, dict):
+        for k, v in valor.items():
+            yield from _aplanar(v, f'{clave}.{k}' if clave else str(k))
+    elif isinstance(valor, (list, tuple)):
+        for i, v in enumerate(valor):
+            # Listas de dicts (p. ej. estadisticas_datos()): se nombran por su archivo/animación
+            nombre = next((v[k] for k in CLAVES_NOMBRE if isinstance(v, dict) and k in v), i)
+            yield from _aplanar(v, f'{clave}.{nombre}' if clave else str(nombre))
+    else:
+        yield clave, valor
+
+
+def _nombre_prometheus(nombre):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', nombre).strip('_').lower()
+
+
+# Marcas consecutivas: cada marcar("x") registra el tiempo desde la marca anterior
+# como "<prefijo>.x"; terminar() registra el total como "<prefijo>.total"
+class Etapas:
+    def __init__(self, prefijo, registro=None):
+        self.prefijo = prefijo
+        self.registro = registro or instrumentacion
+        self.inicio = self._anterior = time.perf_counter()
+        self.duraciones = {}
+
+    def marcar(self, etapa):
+        ahora = time.perf_counter()
+        self.duraciones[etapa] = ahora - self._anterior
+        self.registro.registrar(f'{self.prefijo}.{etapa}', self.duraciones[etapa])
+        self._anterior = ahora
+
+    def terminar(self):
+        total = time.perf_counter() - self.inicio
+        self.duraciones['total'] = total
+        self.registro.registrar(f'{self.prefijo}.total', total)
+        return self.duraciones
+
+
+instrumentacion = Instrumentacion()
+medir = instrumentacion.medir
+contar = instrumentacion.contar
+registrar_fuente = instrumentacion.registrar_fuente
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Muestra las métricas de una predicción de ejemplo.")
+    parser.add_argument('--formato', choices=['json', 'prometheus'], default='prometheus')
+    args = parser.parse_args()
+
+    # Se usa el módulo importado por nombre: es el que comparten datos.py y modelo_prediccion.py
+    import instrumentacion as modulo
+    with modulo.medir('cli.importacion'):
+        import datos
+        import modelo_prediccion
+    datos.cargar_datos_trafico()
+    for _ in range(3):
+        modelo_prediccion.predecir_trafico_diario('Av. Abancay', '2025-05-03', 'no')
+    registro = modulo.instrumentacion
+    print(registro.a_json_lineas() if args.formato == 'json' else registro.a_prometheus(), end='')
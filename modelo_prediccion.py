@@ -1,52 +1,77 @@
 #===================
 #   CREAR MODELO
 #===================
+import threading
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-import matplotlib.pyplot as plt
-
-# 1. Cargar el CSV limpio
-df = pd.read_csv('dataset_trafico_limpio.csv')
-
-# 2. Convertir fecha a datetime y extraer componentes
-df['Fecha'] = pd.to_datetime(df['Fecha'])
-df['Dia'] = df['Fecha'].dt.day
-df['Mes'] = df['Fecha'].dt.month
-df['DiaSemana'] = df['Fecha'].dt.dayofweek  # 0 = lunes
-
-# 3. Features y target
-features = ['Ruta', 'Feriado', 'Intervalo', 'Dia', 'Mes', 'DiaSemana']
-target = 'FlujoVehicular'
-
-# 4. Separar X e y
-X = df[features]
-y = df[target]
-
-# 5. Preprocesamiento (OneHot para las categóricas)
-cat_features = ['Ruta', 'Feriado', 'Intervalo']
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('cat', OneHotEncoder(handle_unknown='ignore'), cat_features)
-    ],
-    remainder='passthrough'  # dejar Dia, Mes, DiaSemana como están
-)
-
-# 6. Pipeline de entrenamiento
-model = Pipeline(steps=[
-    ('preprocessor', preprocessor),
-    ('regressor', RandomForestRegressor(n_estimators=100, random_state=42))
-])
-
-# 7. Entrenamiento
-model.fit(X, y)
-print("✅ Modelo entrenado correctamente.")
-
-# 8. Función para asignar categoría de congestión
+from entrenar_modelo import INTERVALOS, cat_features, cargar_modelo, construir_features, huella_modelo
+from esquema import DIAS_SEMANA, FERIADOS, CatalogoRutas
+from tabla_pronosticos import cargar_tabla
+from motor_bosque import MotorBosque, cargar_motor
+from instrumentacion import contar, medir, registrar_fuente
+from cache_lru import CacheLRU
+
+# 1. Tabla precalculada (ver tabla_pronosticos.py), motor NumPy exportado y
+#    modelo entrenado. El modelo de sklearn se carga solo cuando hace falta
+#    (y se entrena solo si el artefacto falta o quedó desactualizado).
+#    Las tres piezas viajan juntas en una VersionModelo para poder
+#    reemplazarlas de una sola vez cuando se reentrena en segundo plano.
+class VersionModelo:
+    def __init__(self, tabla, motor, model=None):
+        self.tabla = tabla
+        self.motor = motor
+        self.model = model
+        self._catalogo = None
+
+    # Rutas que conoce esta versión del modelo, con sus claves normalizadas (esquema.py)
+    @property
+    def catalogo(self):
+        if self._catalogo is None:
+            if self.motor is not None:
+                rutas = self.motor.vocabularios[cat_features.index('Ruta')]
+            elif self.tabla is not None:
+                rutas = self.tabla.rutas
+            else:
+                encoder = obtener_modelo(self).named_steps['preprocessor'].named_transformers_['cat']
+                rutas = encoder.categories_[cat_features.index('Ruta')]
+            self._catalogo = CatalogoRutas(rutas)
+        return self._catalogo
+
+# La huella relee el CSV y los bloques de ingesta: se calcula una sola vez para ambas piezas
+with medir('modelo.carga_artefactos'):
+    _huella = huella_modelo()
+    _vigente = VersionModelo(cargar_tabla(huella=_huella), cargar_motor(huella=_huella))
+_lock_modelo = threading.Lock()
+
+def obtener_version():
+    return _vigente
+
+def obtener_modelo(version=None):
+    version = version or _vigente
+    if version.model is None:
+        with _lock_modelo:
+            if version.model is None:
+                with medir('modelo.carga_sklearn'):
+                    version.model = cargar_modelo()
+    return version.model
+
+# Publica un modelo nuevo (y su motor/tabla) de forma atómica; las consultas
+# en curso terminan con la versión anterior
+def reemplazar_modelo(model, motor=None, tabla=None):
+    global _vigente
+    _vigente = VersionModelo(tabla, motor, model)
+    cache_predicciones.limpiar()
+
+# El motor NumPy (motor_bosque.py) da el mismo resultado que el pipeline y gana en
+# lotes chicos; en lotes grandes el recorrido compilado de sklearn es más rápido
+LIMITE_FILAS_MOTOR = 240
+
+def _predecir_modelo(X, version):
+    if version.motor is not None and len(X) <= LIMITE_FILAS_MOTOR:
+        return version.motor.predict(X)
+    return obtener_modelo(version).predict(X)
+
+# 2. Función para asignar categoría de congestión
 def calcular_congestion(flujo):
     if flujo <= 50:
         return 'Muy Bajo'
@@ -75,34 +100,222 @@ def calcular_dia_semana(dia_semana):
     elif dia_semana == 6:
         return 'Domingo'
 
-# 9. Función de predicción
-def predecir_trafico_diario(ruta, fecha, feriado):
-    # Generar los 24 intervalos horarios del día
-    intervalos = [f"{str(h).zfill(2)}:00-{str((h+1)%24).zfill(2)}:00" for h in range(24)]
-    fecha_dt = pd.to_datetime(fecha)
-    dia = fecha_dt.day
-    mes = fecha_dt.month
-    dia_semana = fecha_dt.dayofweek
-
-
-    # Construir DataFrame de entrada
-    input_df = pd.DataFrame({
-        'Ruta': [ruta] * 24,
-        'Feriado': [feriado.lower()] * 24,
-        'Intervalo': intervalos,
-        'Dia': [dia] * 24,
-        'Mes': [mes] * 24,
-        'DiaSemana': [dia_semana] * 24
-    })
-
-    # Predicción
-    predicciones = model.predict(input_df)
-    input_df['FlujoVehicular'] = predicciones.astype(int)
-
-    # Agregar columnas extra
-    input_df['Fecha'] = fecha_dt
-    input_df['Congestion'] = input_df['FlujoVehicular'].apply(calcular_congestion)
-    input_df['DiaSemana'] = calcular_dia_semana(dia_semana)
-
-    # Reordenar columnas para mejor visualización
-    return input_df[['Ruta', 'Fecha', 'DiaSemana', 'Intervalo', 'Feriado', 'FlujoVehicular', 'Congestion']]
\ No newline at end of file
+# Versión vectorizada de calcular_congestion (mismos umbrales, inclusivos)
+UMBRALES_CONGESTION = np.array([50, 120, 180, 250])
+NIVELES_CONGESTION = np.array(['Muy Bajo', 'Bajo', 'Regular', 'Alto', 'Muy Alto'], dtype=object)
+
+def calcular_congestion_vectorizada(flujos):
+    return NIVELES_CONGESTION[np.searchsorted(UMBRALES_CONGESTION, flujos, side='left')]
+
+COLUMNAS_SALIDA = ['Ruta', 'Fecha', 'DiaSemana', 'Intervalo', 'Feriado', 'FlujoVehicular', 'Congestion']
+
+# 3. Caché LRU con TTL para las predicciones (ver cache_lru.py); al limpiarla
+#    (modelo nuevo) también se reinician los contadores
+class CachePredicciones(CacheLRU):
+    def __init__(self, max_entradas=512, ttl_segundos=3600):
+        super().__init__(max_entradas, ttl_segundos)
+
+    def limpiar(self):
+        super().limpiar(contadores=True)
+
+cache_predicciones = CachePredicciones()
+
+def estadisticas_cache():
+    return cache_predicciones.estadisticas()
+
+registrar_fuente('prediccion.cache', estadisticas_cache)
+
+# Clave normalizada: (ruta con el nombre que usa el modelo, fecha ISO, feriado en minúsculas).
+# Acepta nombres de cualquiera de los dos datasets; una ruta que el modelo no
+# conoce lanza RutaDesconocida en vez de predecir con la ruta en cero
+def normalizar_consulta(ruta, fecha, feriado, version=None):
+    version = version or _vigente
+    try:
+        fecha = pd.Timestamp(fecha).strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        raise ValueError(f"Fecha inválida: {fecha}")
+    feriado = str(feriado).strip().lower()
+    if feriado not in FERIADOS:
+        raise ValueError(f"Feriado debe ser si/no, no {feriado}")
+    return (version.catalogo.ruta_modelo(ruta), fecha, feriado)
+
+# 4. Predicción por lotes: primero la tabla precalculada y, para lo que falte,
+#    una sola pasada del bosque con todas las consultas restantes
+def _predecir_flujos(claves, version):
+    flujos = np.empty((len(claves), 24), dtype=int)
+    faltantes = []
+    for i, (ruta, fecha, feriado) in enumerate(claves):
+        perfil = version.tabla.buscar(ruta, fecha, feriado) if version.tabla is not None else None
+        if perfil is None:
+            faltantes.append(i)
+        else:
+            flujos[i] = perfil
+
+    contar('prediccion.desde_tabla', len(claves) - len(faltantes))
+    if faltantes:
+        with medir('prediccion.modelo'):
+            X = construir_features([claves[i][0] for i in faltantes],
+                                   [claves[i][1] for i in faltantes],
+                                   [claves[i][2] for i in faltantes])
+            flujos[faltantes] = _predecir_modelo(X, version).astype(int).reshape(len(faltantes), 24)
+        contar('prediccion.filas_modelo', len(X))
+    return flujos
+
+def _predecir_sin_cache(claves, version, con_incertidumbre=False):
+    n = len(claves)
+    fechas = pd.to_datetime([c[1] for c in claves])
+    extra = {}
+    if con_incertidumbre:
+        flujos, extra = _predecir_distribucion(claves, version)
+    else:
+        flujos = _predecir_flujos(claves, version).ravel()
+
+    salida = pd.DataFrame({
+        'Ruta': np.repeat(np.array([c[0] for c in claves], dtype=object), 24),
+        'Fecha': np.repeat(fechas.to_numpy(), 24),
+        'DiaSemana': np.repeat(DIAS_SEMANA[fechas.dayofweek.to_numpy()], 24),
+        'Intervalo': np.tile(np.array(INTERVALOS, dtype=object), n),
+        'Feriado': np.repeat(np.array([c[2] for c in claves], dtype=object), 24),
+        'FlujoVehicular': flujos,
+        'Congestion': calcular_congestion_vectorizada(flujos),
+        **extra
+    }, columns=COLUMNAS_SALIDA + list(extra))
+    return [salida.iloc[i * 24:(i + 1) * 24].reset_index(drop=True) for i in range(n)]
+
+# Recibe tripletas (ruta, fecha, feriado) y devuelve una lista de DataFrames de
+# 24 filas en el mismo orden; solo las consultas que no están en caché pasan por el bosque.
+# Con con_incertidumbre=True se agregan cuantiles y probabilidades (sección 7)
+def predecir_trafico_lote(consultas, con_incertidumbre=False):
+    with medir('prediccion.lote'):
+        return _predecir_lote(consultas, con_incertidumbre)
+
+def _predecir_lote(consultas, con_incertidumbre=False):
+    version = _vigente
+    contar('prediccion.consultas', len(consultas))
+    claves = [normalizar_consulta(*c, version=version) for c in consultas]
+    resultados = {}
+    pendientes = []
+    for clave in dict.fromkeys(claves):
+        # Las predicciones con incertidumbre se guardan aparte (tienen más columnas)
+        encontrado = cache_predicciones.obtener(clave + ('incertidumbre',) if con_incertidumbre else clave)
+        if encontrado is None:
+            pendientes.append(clave)
+        else:
+            resultados[clave] = encontrado
+
+    if pendientes:
+        for clave, df in zip(pendientes, _predecir_sin_cache(pendientes, version, con_incertidumbre)):
+            # Si el modelo se reemplazó mientras tanto, no guardar resultados viejos
+            if version is _vigente:
+                cache_predicciones.guardar(clave + ('incertidumbre',) if con_incertidumbre else clave, df)
+            resultados[clave] = df
+
+    # Copias, para que quien llame pueda modificarlas sin tocar la caché
+    return [resultados[clave].copy() for clave in claves]
+
+# 5. Función de predicción
+def predecir_trafico_diario(ruta, fecha, feriado, con_incertidumbre=False):
+    with medir('prediccion.diaria'):
+        return predecir_trafico_lote([(ruta, fecha, feriado)], con_incertidumbre)[0]
+
+# 6. Pronóstico por rango: varias rutas x varios días en una sola pasada.
+#    Las rutas y fechas forman una grilla; si la tabla precalculada la cubre
+#    entera se corta de ella, si no se arma una sola matriz de features y se
+#    llama una vez al modelo. fechas_feriado: días del rango que son feriado.
+def _flujos_rango(rutas, fechas, feriados, version):
+    if version.tabla is not None:
+        flujos = version.tabla.buscar_rango(rutas, fechas.to_numpy(), feriados)
+        if flujos is not None:
+            return flujos.astype(int)
+
+    X = construir_features(np.repeat(np.asarray(rutas, dtype=object), len(fechas)),
+                           np.tile(fechas, len(rutas)),
+                           np.tile(np.asarray(feriados, dtype=object), len(rutas)))
+    return _predecir_modelo(X, version).astype(int).reshape(len(rutas), len(fechas), 24)
+
+def predecir_rango(rutas, fecha_inicio, fecha_fin, fechas_feriado=()):
+    version = _vigente
+    fechas = pd.date_range(pd.Timestamp(fecha_inicio).normalize(), pd.Timestamp(fecha_fin).normalize(), freq='D')
+    if len(fechas) == 0:
+        raise ValueError(f"Rango de fechas vacío: {fecha_inicio} a {fecha_fin}")
+    rutas = list(dict.fromkeys(version.catalogo.ruta_modelo(r) for r in rutas))
+    es_feriado = fechas.isin(pd.DatetimeIndex(pd.to_datetime(list(fechas_feriado))).normalize())
+    feriados = np.where(es_feriado, 'si', 'no').astype(object)
+
+    with medir('prediccion.rango'):
+        flujos = _flujos_rango(rutas, fechas, feriados, version).ravel()  # (rutas, días, 24)
+    contar('prediccion.rango_filas', len(flujos))
+    n_rutas, n_dias = len(rutas), len(fechas)
+    return pd.DataFrame({
+        'Ruta': np.repeat(np.asarray(rutas, dtype=object), n_dias * 24),
+        'Fecha': np.tile(np.repeat(fechas.to_numpy(), 24), n_rutas),
+        'DiaSemana': np.tile(np.repeat(DIAS_SEMANA[fechas.dayofweek.to_numpy()], 24), n_rutas),
+        'Intervalo': np.tile(np.array(INTERVALOS, dtype=object), n_rutas * n_dias),
+        'Feriado': np.tile(np.repeat(feriados, 24), n_rutas),
+        'FlujoVehicular': flujos,
+        'Congestion': calcular_congestion_vectorizada(flujos)
+    }, columns=COLUMNAS_SALIDA)
+
+# Hora de salida con menos flujo por ruta y día, dentro de la franja [hora_desde, hora_hasta]
+def mejores_salidas(pronostico, hora_desde=0, hora_hasta=23):
+    horas = pronostico['Intervalo'].str[:2].astype(int)
+    franja = pronostico[(horas >= hora_desde) & (horas <= hora_hasta)]
+    mejores = franja.loc[franja.groupby(['Ruta', 'Fecha'], sort=False)['FlujoVehicular'].idxmin()]
+    promedio = franja.groupby(['Ruta', 'Fecha'], sort=False)['FlujoVehicular'].mean().round().astype(int)
+    mejores = mejores.assign(FlujoPromedio=promedio.loc[list(zip(mejores['Ruta'], mejores['Fecha']))].to_numpy())
+    return (mejores.rename(columns={'Intervalo': 'MejorSalida'})
+                   [['Ruta', 'Fecha', 'DiaSemana', 'Feriado', 'MejorSalida', 'FlujoVehicular', 'Congestion', 'FlujoPromedio']]
+                   .reset_index(drop=True))
+
+# 7. Incertidumbre a partir de los árboles del bosque. Las predicciones de cada
+#    árbol se apilan en (n_arboles, n_filas), por bloques de filas; de ahí salen
+#    la media (idéntica a model.predict), los cuantiles y la probabilidad de cada
+#    nivel de congestión (fracción de árboles que caen en él). Es la dispersión
+#    entre árboles, no un intervalo de predicción calibrado.
+CUANTILES = [0.1, 0.5, 0.9]
+COLUMNAS_CUANTILES = ['FlujoP10', 'FlujoP50', 'FlujoP90']
+COLUMNAS_PROBABILIDAD = ['Prob' + nivel.replace(' ', '') for nivel in NIVELES_CONGESTION]
+
+# Filas por pasada: acota la matriz (n_arboles, filas) a ~4 MB por bloque (200 consultas)
+BLOQUE_FILAS_INCERTIDUMBRE = 4800
+
+# Predicción de cada árbol, forma (n_arboles, n_filas). Igual que _predecir_modelo: motor
+# NumPy en lotes chicos; en los grandes (o sin motor exportado) los árboles de sklearn,
+# que dan los mismos valores. La entrada se valida una vez por bloque, como en
+# RandomForestRegressor.predict, y no en cada árbol
+def _predecir_arboles(X, version):
+    if version.motor is not None and len(X) <= LIMITE_FILAS_MOTOR:
+        return version.motor.predecir_arboles_matriz(version.motor.codificar(X))
+    # sklearn se importa aquí: quien sirve desde la tabla o el motor no lo necesita
+    from sklearn.utils import check_array
+    model = obtener_modelo(version)
+    Xt = check_array(model.named_steps['preprocessor'].transform(X), dtype=np.float32, accept_sparse='csr')
+    return np.stack([arbol.predict(Xt, check_input=False) for arbol in model.named_steps['regressor'].estimators_])
+
+def _distribucion(por_arbol):
+    n = por_arbol.shape[1]
+    # Mismo corte a entero y mismos umbrales que la etiqueta de Congestion
+    niveles = np.searchsorted(UMBRALES_CONGESTION, por_arbol.astype(int), side='left')
+    conteos = np.bincount((niveles * n + np.arange(n)).ravel(), minlength=len(NIVELES_CONGESTION) * n)
+    return (MotorBosque.promediar(por_arbol),
+            np.quantile(por_arbol, CUANTILES, axis=0),
+            conteos.reshape(len(NIVELES_CONGESTION), n) / len(por_arbol))
+
+# Media, cuantiles (len(CUANTILES), n) y probabilidades (len(NIVELES_CONGESTION), n),
+# calculados por bloques de BLOQUE_FILAS_INCERTIDUMBRE filas
+def distribucion_flujos(X, version=None):
+    version = version or _vigente
+    bloques = [_distribucion(_predecir_arboles(X.iloc[i:i + BLOQUE_FILAS_INCERTIDUMBRE], version))
+               for i in range(0, len(X), BLOQUE_FILAS_INCERTIDUMBRE)]
+    return tuple(np.concatenate(partes, axis=-1) for partes in zip(*bloques))
+
+# La tabla precalculada solo guarda la media: con incertidumbre todo pasa por los
+# árboles (motor NumPy o sklearn, ver _predecir_arboles)
+def _predecir_distribucion(claves, version):
+    with medir('prediccion.incertidumbre'):
+        X = construir_features([c[0] for c in claves], [c[1] for c in claves], [c[2] for c in claves])
+        media, cuantiles, probabilidades = distribucion_flujos(X, version)
+    contar('prediccion.filas_incertidumbre', len(X))
+    extra = dict(zip(COLUMNAS_CUANTILES, cuantiles.astype(int)))
+    extra.update(zip(COLUMNAS_PROBABILIDAD, probabilidades))
+    return media.astype(int), extra
@@ -0,0 +1,185 @@
+#=========================
+#   MOTOR DEL BOSQUE
+#=========================
+# Exporta el pipeline entrenado (OneHotEncoder + RandomForestRegressor) a
+# arreglos NumPy empaquetados y lo evalúa sin scikit-learn ni pandas en el
+# camino de la predicción. Reproduce model.predict exactamente.
+#
+# Uso:  python motor_bosque.py    (exporta, verifica la equivalencia con el
+#                                  modelo de sklearn y mide la latencia de ambos;
+#                                  python entrenar_modelo.py ya lo publica junto al modelo)
+import os
+import time
+import numpy as np
+from entrenar_modelo import DIRECTORIO_MODELOS, limpiar_artefactos, cat_features, features, huella_modelo
+
+
+def ruta_motor(huella):
+    return os.path.join(DIRECTORIO_MODELOS, f'motor_{huella}.npz')
+
+
+class MotorBosque:
+    # vocabularios: categorías del OneHotEncoder por cada columna de cat_features
+    # feature/umbral/izquierdo/derecho/valor: nodos de todos los árboles, uno tras otro;
+    # (las hojas apuntan a sí mismas)
+    def __init__(self, vocabularios, numericas, feature, umbral, izquierdo, derecho, valor, raices):
+        self.vocabularios = [np.asarray(v, dtype=object) for v in vocabularios]
+        self.numericas = list(numericas)
+        self.feature = feature
+        self.umbral = umbral
+        self.izquierdo = izquierdo
+        self.derecho = derecho
+        self.valor = valor
+        self.raices = raices
+        self._hoja = izquierdo == np.arange(len(izquierdo))
+        self._indices = [{v: i for i, v in enumerate(voc)} for voc in self.vocabularios]
+        self._desplazamientos = np.cumsum([0] + [len(v) for v in self.vocabularios])
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    # Matriz densa igual a la salida del ColumnTransformer (categorías desconocidas -> ceros)
+    def codificar(self, columnas):
+        n = len(columnas[self.numericas[0]])
+        X = np.zeros((n, self._desplazamientos[-1] + len(self.numericas)), dtype=np.float32)
+        filas = np.arange(n)
+        for k, nombre in enumerate(cat_features):
+            indice = self._indices[k]
+            posiciones = np.fromiter((indice.get(v, -1) for v in columnas[nombre]), dtype=np.int64, count=n)
+            conocidas = posiciones >= 0
+            X[filas[conocidas], self._desplazamientos[k] + posiciones[conocidas]] = 1
+        for k, nombre in enumerate(self.numericas):
+            X[:, self._desplazamientos[-1] + k] = np.asarray(columnas[nombre], dtype=np.float32)
+        return X
+
+    # Predicción de cada árbol, forma (n_arboles, n_filas)
+    # Se bajan todos los pares (árbol, fila) un nivel por vez, descartando los que ya llegaron a una hoja
+    def predecir_arboles_matriz(self, X):
+        n, columnas = X.shape
+        X = np.ascontiguousarray(X).ravel()
+        nodos = np.repeat(self.raices, n)
+        base = np.tile(np.arange(n) * columnas, self.n_arboles)
+        activos = np.flatnonzero(~self._hoja[nodos])
+        while activos.size:
+            actuales = nodos[activos]
+            izquierda = X[base[activos] + self.feature[actuales]] <= self.umbral[actuales]
+            siguientes = np.where(izquierda, self.izquierdo[actuales], self.derecho[actuales])
+            nodos[activos] = siguientes
+            activos = activos[~self._hoja[siguientes]]
+        return self.valor[nodos].reshape(self.n_arboles, n)
+
+    # Misma suma secuencial que RandomForestRegressor.predict, para obtener los mismos bits
+    # (estático: sirve también para predicciones por árbol hechas con sklearn)
+    @staticmethod
+    def promediar(por_arbol):
+        salida = np.zeros(por_arbol.shape[1], dtype=np.float64)
+        for fila in por_arbol:
+            salida += fila
+        salida /= len(por_arbol)
+        return salida
+
+    def predecir_matriz(self, X):
+        return self.promediar(self.predecir_arboles_matriz(X))
+
+    # Acepta lo mismo que model.predict: un DataFrame (o dict) con las columnas de `features`
+    def predict(self, entrada):
+        return self.predecir_matriz(self.codificar(entrada))
+
+    def guardar(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = ruta + '.tmp.npz'
+        vocabularios = {f'vocabulario_{k}': np.asarray(v, dtype=str) for k, v in enumerate(self.vocabularios)}
+        np.savez(temporal, numericas=np.asarray(self.numericas), feature=self.feature, umbral=self.umbral,
+                 izquierdo=self.izquierdo, derecho=self.derecho, valor=self.valor, raices=self.raices,
+                 **vocabularios)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as npz:
+            vocabularios = [npz[f'vocabulario_{k}'].tolist() for k in range(len(cat_features))]
+            return cls(vocabularios, npz['numericas'].tolist(), npz['feature'], npz['umbral'],
+                       npz['izquierdo'], npz['derecho'], npz['valor'], npz['raices'])
+
+
+# Aplana el pipeline entrenado en un MotorBosque
+def exportar_motor(model):
+    preprocessor = model.named_steps['preprocessor']
+    regressor = model.named_steps['regressor']
+    encoder = preprocessor.named_transformers_['cat']
+    numericas = [c for c in features if c not in cat_features]
+
+    feature, umbral, izquierdo, derecho, valor, raices = [], [], [], [], [], []
+    inicio = 0
+    for estimador in regressor.estimators_:
+        arbol = estimador.tree_
+        nodos = np.arange(arbol.node_count)
+        hoja = arbol.children_left == -1
+        raices.append(inicio)
+        feature.append(np.where(hoja, 0, arbol.feature).astype(np.int32))
+        umbral.append(np.where(hoja, 0.0, arbol.threshold))
+        izquierdo.append((np.where(hoja, nodos, arbol.children_left) + inicio).astype(np.int32))
+        derecho.append((np.where(hoja, nodos, arbol.children_right) + inicio).astype(np.int32))
+        valor.append(arbol.value[:, 0, 0])
+        inicio += arbol.node_count
+
+    return MotorBosque(encoder.categories_, numericas, np.concatenate(feature), np.concatenate(umbral),
+                       np.concatenate(izquierdo), np.concatenate(derecho), np.concatenate(valor),
+                       np.array(raices, dtype=np.int32))
+
+
+# Motor correspondiente al modelo vigente, o None si todavía no se exportó
+def cargar_motor(huella=None):
+    ruta = ruta_motor(huella or huella_modelo())
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return MotorBosque.cargar(ruta)
+    except Exception as e:
+        print(f"⚠️ No se pudo leer {ruta} ({e}); se usará el modelo de sklearn.")
+        return None
+
+
+# Diferencia máxima entre sklearn y el motor (debe ser exactamente 0)
+def verificar_equivalencia(model, motor, X):
+    return float(np.max(np.abs(model.predict(X) - motor.predict(X))))
+
+
+# Latencia media en milisegundos de una función de predicción
+def medir_latencia(predecir, X, repeticiones=50):
+    predecir(X)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        predecir(X)
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from entrenar_modelo import cargar_datos_entrenamiento, cargar_modelo, construir_features
+
+    huella = huella_modelo()
+    model = cargar_modelo(huella=huella)
+    motor = exportar_motor(model)
+    destino = ruta_motor(huella)
+    motor.guardar(destino)
+    limpiar_artefactos('motor_', destino)
+    print(f"📦 Motor de {motor.n_arboles} árboles ({len(motor.valor)} nodos) guardado en {destino}")
+
+    # Equivalencia: datos de entrenamiento + una grilla con una ruta desconocida
+    df = cargar_datos_entrenamiento()
+    rutas = sorted(df['Ruta'].unique()) + ['Ruta desconocida']
+    fechas = pd.date_range('2025-01-01', '2025-12-31', freq='7D')
+    grilla = construir_features(np.repeat(rutas, len(fechas) * 2),
+                                np.tile(np.repeat(fechas, 2), len(rutas)),
+                                np.tile(['no', 'si'], len(rutas) * len(fechas)))
+    for nombre, X in [('entrenamiento', df[features]), ('grilla', grilla)]:
+        diferencia = verificar_equivalencia(model, motor, X)
+        print(f"{'✅' if diferencia == 0 else '❌'} Equivalencia en {nombre} ({len(X)} filas): diferencia máxima {diferencia}")
+
+    # Micro-benchmark: un día (24 filas) y una semana de todas las rutas
+    for nombre, X, repeticiones in [('24 filas', grilla.iloc[:24], 50), (f'{len(grilla)} filas', grilla, 5)]:
+        t_sklearn = medir_latencia(model.predict, X, repeticiones)
+        t_motor = medir_latencia(motor.predict, X, repeticiones)
+        print(f"⏱️ {nombre}: sklearn {t_sklearn:.2f} ms | motor {t_motor:.2f} ms | x{t_sklearn / t_motor:.1f}")
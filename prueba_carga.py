@@ -0,0 +1,89 @@
+#=======================
+#   PRUEBA DE CARGA
+#=======================
+# Genera consultas aleatorias (rutas del dataset x fechas de 2025) y las envía
+# al servicio de predicción desde varios hilos, cada uno con su conexión.
+# Reporta rendimiento, latencias (p50/p95/p99) y errores.
+#
+# Uso:
+#   python prueba_carga.py [--url http://127.0.0.1:8502] [--concurrencia 32]
+#                          [--peticiones 2000] [--lote 1] [--local]
+#   (--local usa ClienteLocal, sin servicio, como referencia)
+import time
+import random
+import argparse
+import datetime
+import threading
+import numpy as np
+from datos import cargar_datos_rutas
+from cliente_prediccion import ClienteLocal, ClientePrediccion
+
+
+def generar_consultas(n, semilla=42):
+    azar = random.Random(semilla)
+    rutas = sorted(cargar_datos_rutas()['Ruta'].unique())
+    inicio = datetime.date(2025, 1, 1)
+    return [(azar.choice(rutas), inicio + datetime.timedelta(days=azar.randrange(365)), azar.choice(['si', 'no']))
+            for _ in range(n)]
+
+
+def ejecutar(crear_cliente, consultas, concurrencia, lote):
+    latencias = []
+    errores = []
+    lock = threading.Lock()
+    grupos = [consultas[i:i + lote] for i in range(0, len(consultas), lote)]
+    siguiente = iter(range(len(grupos)))
+
+    def trabajador():
+        cliente = crear_cliente()
+        try:
+            while True:
+                with lock:
+                    i = next(siguiente, None)
+                if i is None:
+                    return
+                inicio = time.perf_counter()
+                try:
+                    if lote == 1:
+                        cliente.predecir(*grupos[i][0])
+                    else:
+                        cliente.predecir_lote(grupos[i])
+                    with lock:
+                        latencias.append(time.perf_counter() - inicio)
+                except Exception as e:
+                    with lock:
+                        errores.append(e)
+        finally:
+            cliente.cerrar()
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return time.perf_counter() - inicio, np.array(latencias) * 1000, errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de predicción.")
+    parser.add_argument('--url', default='http://127.0.0.1:8502')
+    parser.add_argument('--concurrencia', type=int, default=32)
+    parser.add_argument('--peticiones', type=int, default=2000, help="Cantidad total de consultas")
+    parser.add_argument('--lote', type=int, default=1, help="Consultas por petición (1 = /prediccion)")
+    parser.add_argument('--local', action='store_true', help="Usar ClienteLocal en vez del servicio HTTP")
+    args = parser.parse_args()
+
+    consultas = generar_consultas(args.peticiones)
+    crear_cliente = ClienteLocal if args.local else (lambda: ClientePrediccion(args.url))
+    total, latencias, errores = ejecutar(crear_cliente, consultas, args.concurrencia, args.lote)
+
+    print(f"🚦 {len(consultas)} consultas en {total:.2f} s -> {len(consultas) / total:.0f} consultas/s "
+          f"({len(latencias)} peticiones, {args.concurrencia} hilos, lote {args.lote})")
+    if len(latencias):
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+        print(f"⏱️ latencia por petición: p50 {p50:.1f} ms | p95 {p95:.1f} ms | p99 {p99:.1f} ms | máx {latencias.max():.1f} ms")
+    if errores:
+        print(f"❌ {len(errores)} errores, p. ej.: {errores[0]}")
+    if not args.local:
+        print(f"📊 servidor: {ClientePrediccion(args.url).estadisticas()}")
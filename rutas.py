@@ -0,0 +1,222 @@
+#=====================
+#   RUTAS LOCALES
+#=====================
+# Recomendaciones de ruta sin llamar a servicios externos:
+#   - grafo sobre las zonas de COORDENADAS: cada zona se une con sus
+#     VECINOS_POR_ZONA más cercanas (distancia en línea recta x factor de desvío);
+#   - costo de cada tramo según la hora: tiempo a flujo libre corregido con la
+#     función BPR, t = t0 * (1 + ALFA * (flujo / CAPACIDAD) ** BETA), donde el
+#     flujo es el promedio pronosticado (modelo_prediccion) de las dos zonas;
+#   - Dijkstra dependiente del tiempo: el costo de cada tramo se evalúa en la
+#     hora a la que se llega a su zona de origen;
+#   - tablas de todos los pares (origen x destino) por hora de salida,
+#     calculadas una vez por fecha/feriado/modelo y guardadas en memoria.
+#
+# Uso:  python rutas.py ["Av. Abancay" "Av. Universitaria" 2025-05-05 8 [si|no]]
+import sys
+import math
+import heapq
+import numpy as np
+import pandas as pd
+import modelo_prediccion
+from instrumentacion import registrar_fuente
+from cache_lru import CacheLRU
+
+# Coordenadas de las zonas para el mapa (antes en app.py)
+COORDENADAS = {
+    "Av. Paseo de la Republica": {"lat": -12.113697, "lon": -77.025533},
+    "Av. Alfredo Benavides": {"lat": -12.128233, "lon": -77.005189},
+    "Av. Universitaria": {"lat": -12.001329, "lon": -77.083796},
+    "Av. de la Marina": {"lat": -12.0600, "lon": -77.0800},
+    "Av. Abancay": {"lat": -12.050864, "lon": -77.028302},
+    "Av. Mexico": {"lat": -12.072974, "lon": -77.015255},
+    "Av. Argentina": {"lat": -12.050587, "lon": -77.122449},
+    "Av. Venezuela": {"lat": -12.060980, "lon": -77.083312},
+}
+
+VECINOS_POR_ZONA = 3
+FACTOR_DESVIO = 1.3         # las calles no van en línea recta
+VELOCIDAD_LIBRE_KMH = 40
+CAPACIDAD = 250             # veh/h: límite de "Muy Alto" en calcular_congestion
+ALFA = 0.15
+BETA = 4
+MAX_TABLAS = 32             # días (fecha, feriado) guardados en memoria
+
+
+def distancia_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (a["lat"], a["lon"], b["lat"], b["lon"]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(h))
+
+
+# 1. Grafo: zonas, tramos (i, j, km) y tiempo de cada tramo por hora
+class GrafoRutas:
+    def __init__(self, coordenadas=COORDENADAS, vecinos=VECINOS_POR_ZONA):
+        self.zonas = list(coordenadas)
+        self._indice = {z: i for i, z in enumerate(self.zonas)}
+        n = len(self.zonas)
+        km = np.array([[distancia_km(coordenadas[a], coordenadas[b]) for b in self.zonas] for a in self.zonas])
+
+        adyacencia = np.zeros((n, n), dtype=bool)
+        for i in range(n):
+            for j in np.argsort(km[i])[1:vecinos + 1]:
+                adyacencia[i, j] = adyacencia[j, i] = True
+        self.km = np.where(adyacencia, km * FACTOR_DESVIO, np.inf)
+        self.vecinos = [np.flatnonzero(adyacencia[i]) for i in range(n)]
+
+    def indice(self, zona):
+        if zona not in self._indice:
+            raise KeyError(f"Zona sin coordenadas: {zona}")
+        return self._indice[zona]
+
+    # Minutos por tramo para cada hora: (24, n, n), inf donde no hay tramo
+    def minutos_por_hora(self, flujos):
+        flujo_tramo = (flujos[:, :, None] + flujos[:, None, :]) / 2          # (24, n, n)
+        libre = self.km / VELOCIDAD_LIBRE_KMH * 60
+        return libre[None, :, :] * (1 + ALFA * (flujo_tramo / CAPACIDAD) ** BETA)
+
+    # 2. Dijkstra dependiente del tiempo desde un origen, saliendo a `salida` (minutos desde 00:00)
+    def dijkstra(self, minutos, origen, salida):
+        n = len(self.zonas)
+        llegada = np.full(n, np.inf)
+        previo = np.full(n, -1)
+        llegada[origen] = salida
+        pendientes = [(salida, origen)]
+        while pendientes:
+            t, i = heapq.heappop(pendientes)
+            if t > llegada[i]:
+                continue
+            hora = int(t // 60) % 24
+            for j in self.vecinos[i]:
+                t_j = t + minutos[hora, i, j]
+                if t_j < llegada[j]:
+                    llegada[j], previo[j] = t_j, i
+                    heapq.heappush(pendientes, (t_j, j))
+        return llegada - salida, previo
+
+    # Todos los pares para cada hora de salida: duración (24, n, n) y predecesor (24, n, n)
+    def todos_los_pares(self, minutos):
+        n = len(self.zonas)
+        duracion = np.empty((24, n, n))
+        previo = np.empty((24, n, n), dtype=np.int16)
+        for hora in range(24):
+            for origen in range(n):
+                duracion[hora, origen], previo[hora, origen] = self.dijkstra(minutos, origen, hora * 60)
+        return duracion, previo
+
+
+def _camino(previo, origen, destino):
+    camino = [destino]
+    while camino[-1] != origen:
+        anterior = previo[camino[-1]]
+        if anterior < 0:
+            return []
+        camino.append(anterior)
+    return camino[::-1]
+
+
+class TablaRutas:
+    def __init__(self, grafo, minutos, duracion, previo):
+        self.grafo = grafo
+        self.minutos = minutos
+        self.duracion = duracion
+        self.previo = previo
+
+
+# 3. Motor con caché de tablas por (fecha, feriado); se invalida si cambia el modelo
+class MotorRutas:
+    def __init__(self, grafo=None, max_tablas=MAX_TABLAS):
+        self.grafo = grafo or GrafoRutas()
+        self._tablas = CacheLRU(max_tablas)  # (fecha, feriado) -> TablaRutas; origen: versión del modelo
+
+    def tabla(self, fecha, feriado='no'):
+        fecha = pd.Timestamp(fecha).strftime('%Y-%m-%d')
+        feriado = str(feriado).strip().lower()
+        clave = (fecha, feriado)
+        version = modelo_prediccion.obtener_version()
+        tabla = self._tablas.obtener(clave, version)
+        if tabla is not None:
+            return tabla
+
+        # Un solo pronóstico (zonas x 24 horas) para todo el día
+        pronostico = modelo_prediccion.predecir_rango(self.grafo.zonas, fecha, fecha,
+                                                      [fecha] if feriado == 'si' else [])
+        flujos = pronostico['FlujoVehicular'].to_numpy().reshape(len(self.grafo.zonas), 24).T  # (24, n)
+        minutos = self.grafo.minutos_por_hora(flujos.astype(float))
+        tabla = TablaRutas(self.grafo, minutos, *self.grafo.todos_los_pares(minutos))
+        self._tablas.guardar(clave, tabla, version)
+        return tabla
+
+    # Ruta más rápida saliendo a una hora entera
+    def ruta_optima(self, origen, destino, fecha, hora, feriado='no'):
+        tabla = self.tabla(fecha, feriado)
+        o, d = self.grafo.indice(origen), self.grafo.indice(destino)
+        hora = int(hora) % 24
+        camino = _camino(tabla.previo[hora, o], o, d)
+        tramos = []
+        t = hora * 60.0
+        for i, j in zip(camino, camino[1:]):
+            minutos = tabla.minutos[int(t // 60) % 24, i, j]
+            tramos.append({'Desde': self.grafo.zonas[i], 'Hasta': self.grafo.zonas[j],
+                           'Km': round(float(self.grafo.km[i, j]), 2), 'Minutos': round(float(minutos), 1)})
+            t += minutos
+        duracion = float(tabla.duracion[hora, o, d])
+        return {
+            'camino': [self.grafo.zonas[i] for i in camino],
+            'tramos': tramos,
+            'minutos': round(duracion, 1),
+            'km': round(sum(tr['Km'] for tr in tramos), 2),
+            'salida': f"{hora:02d}:00",
+            'llegada': _hora_texto(hora * 60 + duracion),
+        }
+
+    # Duración del viaje para cada hora de salida de la franja, de menor a mayor
+    def mejores_salidas(self, origen, destino, fecha, feriado='no', hora_desde=0, hora_hasta=23):
+        tabla = self.tabla(fecha, feriado)
+        o, d = self.grafo.indice(origen), self.grafo.indice(destino)
+        horas = np.arange(hora_desde, hora_hasta + 1)
+        duracion = tabla.duracion[horas, o, d]
+        return (pd.DataFrame({
+                    'Salida': [f"{h:02d}:00" for h in horas],
+                    'Minutos': duracion.round(1),
+                    'Llegada': [_hora_texto(h * 60 + m) for h, m in zip(horas, duracion)],
+                })
+                .sort_values('Minutos', kind='stable')
+                .reset_index(drop=True))
+
+    def estadisticas(self):
+        cache = self._tablas.estadisticas()
+        return {'tablas': cache['entradas'], 'max_tablas': cache['max_entradas'],
+                'aciertos': cache['aciertos'], 'fallos': cache['fallos']}
+
+
+def _hora_texto(minutos):
+    minutos = int(round(minutos)) % (24 * 60)
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+motor_rutas = MotorRutas()
+registrar_fuente('rutas', motor_rutas.estadisticas)
+
+
+if __name__ == "__main__":
+    import time
+    origen, destino, fecha, hora, feriado = (sys.argv[1:] + [None] * 5)[:5]
+    origen = origen or "Av. Universitaria"
+    destino = destino or "Av. Alfredo Benavides"
+    fecha = fecha or "2025-05-05"
+    hora = int(hora or 8)
+    feriado = feriado or "no"
+
+    inicio = time.perf_counter()
+    motor_rutas.tabla(fecha, feriado)
+    construccion = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    ruta = motor_rutas.ruta_optima(origen, destino, fecha, hora, feriado)
+    consulta = time.perf_counter() - inicio
+
+    print(f"🧭 {' -> '.join(ruta['camino'])}")
+    print(f"   {ruta['km']} km, {ruta['minutos']} min (salida {ruta['salida']}, llegada {ruta['llegada']})")
+    print(pd.DataFrame(ruta['tramos']).to_string(index=False))
+    print(motor_rutas.mejores_salidas(origen, destino, fecha, feriado, 5, 22).head(5).to_string(index=False))
+    print(f"⏱️ tabla de {len(motor_rutas.grafo.zonas)} zonas x 24 horas: {construccion * 1000:.1f} ms; consulta: {consulta * 1000:.3f} ms")
@@ -0,0 +1,304 @@
+#==============================
+#   SERVICIO DE PREDICCIÓN
+#==============================
+# Servidor HTTP (asyncio, sin dependencias extra) que expone el modelo fuera
+# de Streamlit. Las consultas que llegan juntas dentro de una ventana corta se
+# agrupan y se resuelven con una sola llamada a predecir_trafico_lote.
+#
+# Endpoints (JSON):
+#   GET  /salud
+#   GET  /estadisticas
+#   GET  /metricas          (texto de Prometheus, ver instrumentacion.py)
+#   GET  /prediccion?ruta=...&fecha=YYYY-MM-DD&feriado=si|no[&incertidumbre=1]
+#   POST /prediccion        {"ruta": ..., "fecha": ..., "feriado": ..., ["incertidumbre": true]}
+#   POST /prediccion/lote   {"consultas": [{"ruta": ..., "fecha": ..., "feriado": ...}, ...], ["incertidumbre": true]}
+#
+# Con incertidumbre se agregan P10/P50/P90 y la probabilidad de cada nivel de
+# congestión (ver modelo_prediccion.py, sección 7); esas consultas no se agrupan
+# y un lote admite hasta MAX_CONSULTAS_INCERTIDUMBRE.
+#
+# Uso:  python servicio_prediccion.py [--host 127.0.0.1] [--puerto 8502] [--ventana-ms 5]
+import json
+import time
+import asyncio
+import argparse
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+from entrenar_modelo import INTERVALOS
+from esquema import RutaDesconocida
+from instrumentacion import instrumentacion
+from modelo_prediccion import (COLUMNAS_CUANTILES, COLUMNAS_PROBABILIDAD, NIVELES_CONGESTION,
+                               estadisticas_cache, normalizar_consulta, predecir_trafico_lote)
+
+MAX_CUERPO = 8 * 1024 * 1024
+MAX_CONSULTAS_LOTE = 10000
+# Con incertidumbre cada consulta pasa por los 100 árboles (sin tabla ni agrupador)
+MAX_CONSULTAS_INCERTIDUMBRE = 1000
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# 1. Agrupador: junta las consultas de peticiones concurrentes en un solo lote
+class AgrupadorPredicciones:
+    def __init__(self, ventana_ms=5, max_consultas=2048):
+        self.ventana = ventana_ms / 1000
+        self.max_consultas = max_consultas
+        self.lotes = 0
+        self.consultas = 0
+        self._cola = None
+        self._tarea = None
+
+    def iniciar(self):
+        self._cola = asyncio.Queue()
+        self._tarea = asyncio.create_task(self._procesar())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+
+    # Encola una lista de consultas normalizadas y espera sus resultados
+    async def predecir(self, claves):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((claves, futuro))
+        return await futuro
+
+    async def _procesar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self._cola.get()]
+            total = len(pendientes[0][0])
+            limite = loop.time() + self.ventana
+            while total < self.max_consultas:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    pendientes.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+                total += len(pendientes[-1][0])
+
+            claves = [c for lista, _ in pendientes for c in lista]
+            try:
+                # El bosque corre en un hilo para no bloquear el bucle de eventos
+                resultados = await loop.run_in_executor(None, predecir_trafico_lote, claves)
+            except Exception as e:
+                for _, futuro in pendientes:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+            self.lotes += 1
+            self.consultas += len(claves)
+            inicio = 0
+            for lista, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_result(resultados[inicio:inicio + len(lista)])
+                inicio += len(lista)
+
+
+# Perfil de 24 horas de una consulta, como dict serializable
+def prediccion_a_json(clave, df):
+    ruta, fecha, feriado = clave
+    return {
+        'ruta': ruta,
+        'fecha': fecha,
+        'feriado': feriado,
+        'dia_semana': df['DiaSemana'].iloc[0],
+        'intervalos': INTERVALOS,
+        'flujo': df['FlujoVehicular'].tolist(),
+        'congestion': df['Congestion'].tolist(),
+        **_incertidumbre_a_json(df),
+    }
+
+
+def _incertidumbre_a_json(df):
+    if COLUMNAS_CUANTILES[0] not in df:
+        return {}
+    return {
+        'cuantiles': {c[5:].lower(): df[c].tolist() for c in COLUMNAS_CUANTILES},
+        'probabilidades': {nivel: df[c].round(4).tolist() for nivel, c in zip(NIVELES_CONGESTION, COLUMNAS_PROBABILIDAD)},
+    }
+
+
+def _pide_incertidumbre(valor):
+    return valor is True or str(valor).strip().lower() in ('1', 'true', 'si')
+
+
+# Content-Length: entero no negativo (sin la cabecera, cuerpo vacío)
+def _largo_cuerpo(valor):
+    if valor is None or valor == '':
+        return 0
+    if not (valor.isascii() and valor.isdigit()):
+        raise ErrorPeticion(400, f"Content-Length inválido: {valor!r}")
+    return int(valor)
+
+
+def _normalizar(consulta):
+    if not isinstance(consulta, dict):
+        raise ErrorPeticion(400, "Cada consulta debe ser un objeto con ruta, fecha y feriado")
+    faltantes = [c for c in ('ruta', 'fecha', 'feriado') if not consulta.get(c)]
+    if faltantes:
+        raise ErrorPeticion(400, f"Faltan campos: {', '.join(faltantes)}")
+    try:
+        return normalizar_consulta(consulta['ruta'], consulta['fecha'], consulta['feriado'])
+    except RutaDesconocida as e:
+        raise ErrorPeticion(404, str(e))
+    except ValueError as e:
+        raise ErrorPeticion(400, str(e))
+
+
+# 2. Servidor HTTP/1.1 mínimo con conexiones persistentes
+class ServicioPrediccion:
+    def __init__(self, host='127.0.0.1', puerto=8502, ventana_ms=5):
+        self.host = host
+        self.puerto = puerto
+        self.agrupador = AgrupadorPredicciones(ventana_ms)
+        self.peticiones = 0
+        self.inicio = time.time()
+        self._servidor = None
+
+    async def iniciar(self):
+        self.agrupador.iniciar()
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        await self.agrupador.detener()
+
+    async def servir(self):
+        await self.iniciar()
+        print(f"🚦 Servicio de predicción en http://{self.host}:{self.puerto}")
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, destino, version_http = linea.decode('latin-1').split()
+                except ValueError:
+                    await self._responder(writer, 400, {'error': 'Petición mal formada'}, False)
+                    break
+
+                cabeceras = {}
+                while True:
+                    cabecera = await reader.readline()
+                    if cabecera in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+
+                try:
+                    largo = _largo_cuerpo(cabeceras.get('content-length'))
+                except ErrorPeticion as e:
+                    await self._responder(writer, e.estado, {'error': str(e)}, False)
+                    break
+                if largo > MAX_CUERPO:
+                    await self._responder(writer, 413, {'error': 'Cuerpo demasiado grande'}, False)
+                    break
+                cuerpo = await reader.readexactly(largo) if largo else b''
+                mantener = (cabeceras.get('connection', '').lower() != 'close'
+                            and version_http.upper() == 'HTTP/1.1')
+
+                self.peticiones += 1
+                try:
+                    estado, respuesta = 200, await self._despachar(metodo.upper(), destino, cuerpo)
+                except ErrorPeticion as e:
+                    estado, respuesta = e.estado, {'error': str(e)}
+                except Exception as e:
+                    estado, respuesta = 500, {'error': f'Error interno: {e}'}
+                await self._responder(writer, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _despachar(self, metodo, destino, cuerpo):
+        url = urlsplit(destino)
+        if url.path == '/salud' and metodo == 'GET':
+            return {'estado': 'ok'}
+        if url.path == '/estadisticas' and metodo == 'GET':
+            return {'peticiones': self.peticiones, 'lotes': self.agrupador.lotes,
+                    'consultas': self.agrupador.consultas, 'segundos_activo': round(time.time() - self.inicio, 1),
+                    'cache': estadisticas_cache()}
+        if url.path == '/metricas' and metodo == 'GET':
+            return instrumentacion.a_prometheus()
+        if url.path == '/prediccion' and metodo == 'GET':
+            parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+            clave = _normalizar(parametros)
+            return prediccion_a_json(clave, (await self._predecir([clave], parametros.get('incertidumbre')))[0])
+        if url.path == '/prediccion' and metodo == 'POST':
+            consulta = self._leer_json(cuerpo)
+            clave = _normalizar(consulta)
+            return prediccion_a_json(clave, (await self._predecir([clave], consulta.get('incertidumbre')))[0])
+        if url.path == '/prediccion/lote' and metodo == 'POST':
+            peticion = self._leer_json(cuerpo)
+            consultas = peticion.get('consultas')
+            if not isinstance(consultas, list) or not consultas:
+                raise ErrorPeticion(400, "Se esperaba una lista no vacía en 'consultas'")
+            if len(consultas) > MAX_CONSULTAS_LOTE:
+                raise ErrorPeticion(413, f"Máximo {MAX_CONSULTAS_LOTE} consultas por lote")
+            if _pide_incertidumbre(peticion.get('incertidumbre')) and len(consultas) > MAX_CONSULTAS_INCERTIDUMBRE:
+                raise ErrorPeticion(413, f"Máximo {MAX_CONSULTAS_INCERTIDUMBRE} consultas por lote con incertidumbre")
+            claves = [_normalizar(c) for c in consultas]
+            resultados = await self._predecir(claves, peticion.get('incertidumbre'))
+            return {'resultados': [prediccion_a_json(c, df) for c, df in zip(claves, resultados)]}
+        raise ErrorPeticion(404, f"No existe {metodo} {url.path}")
+
+    # Las consultas con incertidumbre van directo al bosque (en un hilo), sin agrupar
+    async def _predecir(self, claves, incertidumbre=None):
+        if not _pide_incertidumbre(incertidumbre):
+            return await self.agrupador.predecir(claves)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(predecir_trafico_lote, claves, True))
+
+    def _leer_json(self, cuerpo):
+        try:
+            datos = json.loads(cuerpo or b'{}')
+        except json.JSONDecodeError:
+            raise ErrorPeticion(400, "El cuerpo no es JSON válido")
+        if not isinstance(datos, dict):
+            raise ErrorPeticion(400, "Se esperaba un objeto JSON")
+        return datos
+
+    # Los dict se envían como JSON y los str como texto plano
+    async def _responder(self, writer, estado, respuesta, mantener):
+        if isinstance(respuesta, str):
+            cuerpo, tipo = respuesta.encode(), 'text/plain; version=0.0.4'
+        else:
+            cuerpo, tipo = json.dumps(respuesta, ensure_ascii=False).encode(), 'application/json'
+        razones = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+        writer.write((f"HTTP/1.1 {estado} {razones.get(estado, '')}\r\n"
+                      f"Content-Type: {tipo}; charset=utf-8\r\n"
+                      f"Content-Length: {len(cuerpo)}\r\n"
+                      f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n").encode() + cuerpo)
+        await writer.drain()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP de predicción de tráfico.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8502)
+    parser.add_argument('--ventana-ms', type=float, default=5, help="Ventana para agrupar consultas concurrentes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(ServicioPrediccion(args.host, args.puerto, args.ventana_ms).servir())
+    except KeyboardInterrupt:
+        pass
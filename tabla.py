@@ -0,0 +1,136 @@
+#=====================
+#   TABLA DE DATOS
+#=====================
+# Vista paginada del dataset de rutas para el final de app.py:
+#   - filtros y orden se resuelven aquí, sobre el DataFrame ya cargado por
+#     datos.py (sin copiarlo), y dan un arreglo de posiciones de fila;
+#   - las vistas (filtros + orden) se guardan en una caché LRU válida mientras
+#     no cambie el DataFrame de origen;
+#   - al navegador solo se envía la página visible;
+#   - la exportación (CSV, o Parquet si está pyarrow) se arma por bloques y
+#     recién cuando se pide la descarga.
+#
+# Uso:  python tabla.py [pagina] [filas_por_pagina]
+import io
+import sys
+import importlib.util
+import numpy as np
+import pandas as pd
+from instrumentacion import medir, registrar_fuente
+from cache_lru import CacheLRU
+
+FILAS_POR_PAGINA = [25, 50, 100, 250]
+BLOQUE_EXPORTACION = 50_000
+MAX_VISTAS = 32
+
+
+def parquet_disponible():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+# 1. Posiciones de las filas que cumplen los filtros, en el orden pedido.
+#    filtros: {columna: lista de valores} o {columna: (desde, hasta)} para fechas
+def indices_vista(df, filtros=None, orden=None, descendente=False):
+    mascara = np.ones(len(df), dtype=bool)
+    for columna, valores in (filtros or {}).items():
+        if isinstance(valores, tuple):
+            desde, hasta = valores
+            mascara &= df[columna].between(pd.Timestamp(desde), pd.Timestamp(hasta)).to_numpy()
+        elif valores:
+            mascara &= df[columna].isin(valores).to_numpy()
+    indices = np.flatnonzero(mascara)
+
+    if orden:
+        columna = df[orden].iloc[indices].reset_index(drop=True)
+        indices = indices[columna.sort_values(ascending=not descendente, kind="stable").index.to_numpy()]
+    return indices
+
+
+class VistaTabla:
+    def __init__(self, df, indices):
+        self.df = df
+        self.indices = indices
+
+    @property
+    def total(self):
+        return len(self.indices)
+
+    def paginas(self, filas_por_pagina):
+        return max(1, -(-self.total // filas_por_pagina))
+
+    # 2. Una página (numerada desde 1): solo esas filas se copian
+    def pagina(self, numero, filas_por_pagina):
+        numero = min(max(1, int(numero)), self.paginas(filas_por_pagina))
+        inicio = (numero - 1) * filas_por_pagina
+        return self.df.iloc[self.indices[inicio:inicio + filas_por_pagina]]
+
+    # 3. Exportación de toda la selección, por bloques
+    def bloques(self, tamano=BLOQUE_EXPORTACION):
+        for inicio in range(0, self.total, tamano):
+            yield self.df.iloc[self.indices[inicio:inicio + tamano]]
+
+    def a_csv(self):
+        with medir("tabla.exportar_csv"):
+            salida = io.BytesIO()
+            for i, bloque in enumerate(self.bloques()):
+                salida.write(bloque.to_csv(index=False, header=(i == 0), date_format="%Y-%m-%d").encode("utf-8"))
+            if self.total == 0:
+                salida.write(self.df.iloc[:0].to_csv(index=False).encode("utf-8"))
+            return salida.getvalue()
+
+    def a_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        with medir("tabla.exportar_parquet"):
+            salida = io.BytesIO()
+            escritor = None
+            for bloque in self.bloques():
+                lote = pa.Table.from_pandas(bloque, preserve_index=False)
+                escritor = escritor or pq.ParquetWriter(salida, lote.schema)
+                escritor.write_table(lote)
+            if escritor is None:
+                pq.write_table(pa.Table.from_pandas(self.df.iloc[:0], preserve_index=False), salida)
+            else:
+                escritor.close()
+            return salida.getvalue()
+
+
+# 4. Caché de vistas (ver cache_lru.py). El origen es el DataFrame del que
+#    salen: si datos.py lo vuelve a cargar, las vistas viejas no se usan.
+class CacheVistas(CacheLRU):
+    def __init__(self, max_vistas=MAX_VISTAS):
+        super().__init__(max_vistas)
+
+    def vista(self, df, filtros=None, orden=None, descendente=False):
+        def construir():
+            with medir("tabla.vista"):
+                return VistaTabla(df, indices_vista(df, filtros, orden, descendente))
+        return self.obtener_o_calcular((_clave_filtros(filtros), orden, bool(descendente)), construir, df)
+
+    def estadisticas(self):
+        resultado = super().estadisticas()
+        resultado['bytes_indices'] = sum(v.indices.nbytes for v in self.valores())
+        return resultado
+
+
+def _clave_filtros(filtros):
+    return tuple(sorted((c, tuple(str(v) for v in valores)) for c, valores in (filtros or {}).items() if valores))
+
+
+cache_vistas = CacheVistas()
+registrar_fuente('tabla', cache_vistas.estadisticas)
+
+
+if __name__ == "__main__":
+    import time
+    from datos import cargar_datos_rutas
+    pagina = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    filas = int(sys.argv[2]) if len(sys.argv) > 2 else FILAS_POR_PAGINA[0]
+
+    df = cargar_datos_rutas()
+    inicio = time.perf_counter()
+    vista = cache_vistas.vista(df, {"Congestion": ["alto", "muy alto"]}, orden="FlujoVehicular", descendente=True)
+    construccion = time.perf_counter() - inicio
+    print(vista.pagina(pagina, filas).to_string(index=False))
+    print(f"📄 página {pagina} de {vista.paginas(filas)} ({vista.total} de {len(df)} filas); vista: {construccion * 1000:.2f} ms")
+    print(f"💾 CSV: {len(vista.a_csv()) / 1024:.1f} KB; Parquet: {'sí' if parquet_disponible() else 'no (falta pyarrow)'}")
@@ -0,0 +1,107 @@
+#=============================
+#   TABLA DE PRONÓSTICOS
+#=============================
+# Precalcula con el modelo entrenado el perfil de 24 horas de todas las rutas
+# x feriado (si/no) x fechas de 2025 (el rango que permite app.py) y lo guarda
+# como un arreglo int16 comprimido en "modelos/pronosticos_<huella>.npz".
+# modelo_prediccion responde desde esta tabla y solo usa el modelo para
+# consultas que no están en ella.
+#
+# Uso:  python tabla_pronosticos.py   (python entrenar_modelo.py ya la publica junto al modelo)
+import os
+import datetime
+import numpy as np
+import pandas as pd
+from entrenar_modelo import DIRECTORIO_MODELOS, limpiar_artefactos, construir_features, cargar_datos_entrenamiento, cargar_modelo, huella_modelo
+
+FECHA_INICIO = datetime.date(2025, 1, 1)
+FECHA_FIN = datetime.date(2025, 12, 31)
+FERIADOS = ['no', 'si']
+
+
+def ruta_tabla(huella):
+    return os.path.join(DIRECTORIO_MODELOS, f'pronosticos_{huella}.npz')
+
+
+class TablaPronosticos:
+    # flujos: int16 con forma (rutas, feriados, días, 24)
+    def __init__(self, rutas, feriados, fecha_inicio, flujos):
+        self.rutas = list(rutas)
+        self.feriados = list(feriados)
+        self.fecha_inicio = np.datetime64(fecha_inicio, 'D')
+        self.flujos = flujos
+        self._indice_ruta = {r: i for i, r in enumerate(self.rutas)}
+        self._indice_feriado = {f: i for i, f in enumerate(self.feriados)}
+
+    # Perfil de 24 horas para una consulta normalizada, o None si no está en la tabla
+    def buscar(self, ruta, fecha, feriado):
+        i = self._indice_ruta.get(ruta)
+        j = self._indice_feriado.get(feriado)
+        if i is None or j is None:
+            return None
+        d = int((np.datetime64(fecha, 'D') - self.fecha_inicio).astype(int))
+        if d < 0 or d >= self.flujos.shape[2]:
+            return None
+        return self.flujos[i, j, d]
+
+    # Grilla rutas x fechas (con el feriado de cada fecha) como arreglo (rutas, días, 24),
+    # o None si alguna combinación queda fuera de la tabla
+    def buscar_rango(self, rutas, fechas, feriados):
+        i_ruta = [self._indice_ruta.get(r) for r in rutas]
+        i_feriado = [self._indice_feriado.get(f) for f in feriados]
+        if None in i_ruta or None in i_feriado:
+            return None
+        d = (np.asarray(fechas, dtype='datetime64[D]') - self.fecha_inicio).astype(int)
+        if d.min() < 0 or d.max() >= self.flujos.shape[2]:
+            return None
+        return self.flujos[np.asarray(i_ruta)[:, None], np.asarray(i_feriado)[None, :], d[None, :]]
+
+    def guardar(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = ruta + '.tmp.npz'
+        np.savez_compressed(temporal, rutas=np.array(self.rutas), feriados=np.array(self.feriados),
+                            fecha_inicio=np.array(str(self.fecha_inicio)), flujos=self.flujos)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as npz:
+            return cls(npz['rutas'].tolist(), npz['feriados'].tolist(), str(npz['fecha_inicio']), npz['flujos'])
+
+
+# Pasa toda la grilla por el modelo en una sola llamada a predict
+def precalcular_tabla(model, rutas, fecha_inicio=FECHA_INICIO, fecha_fin=FECHA_FIN, feriados=FERIADOS):
+    fechas = pd.date_range(fecha_inicio, fecha_fin, freq='D')
+    i_ruta, i_feriado, i_fecha = np.meshgrid(np.arange(len(rutas)), np.arange(len(feriados)),
+                                             np.arange(len(fechas)), indexing='ij')
+    X = construir_features(np.asarray(rutas, dtype=object)[i_ruta.ravel()],
+                           fechas[i_fecha.ravel()],
+                           np.asarray(feriados, dtype=object)[i_feriado.ravel()])
+    flujos = model.predict(X).astype(int).astype(np.int16)
+    return TablaPronosticos(rutas, feriados, fecha_inicio,
+                            flujos.reshape(len(rutas), len(feriados), len(fechas), 24))
+
+
+# Tabla correspondiente al modelo vigente, o None si todavía no se generó
+def cargar_tabla(huella=None):
+    ruta = ruta_tabla(huella or huella_modelo())
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return TablaPronosticos.cargar(ruta)
+    except Exception as e:
+        print(f"⚠️ No se pudo leer {ruta} ({e}); se usará el modelo directamente.")
+        return None
+
+
+if __name__ == "__main__":
+    huella = huella_modelo()
+    model = cargar_modelo(huella=huella)
+    rutas = sorted(cargar_datos_entrenamiento()['Ruta'].unique())
+    tabla = precalcular_tabla(model, rutas)
+    destino = ruta_tabla(huella)
+    tabla.guardar(destino)
+
+    # Borrar tablas de modelos anteriores
+    limpiar_artefactos('pronosticos_', destino)
+    print(f"📦 Tabla de {tabla.flujos.shape[0]} rutas x {tabla.flujos.shape[2]} días guardada en {destino}")
@@ -0,0 +1,47 @@
+import operator
+from cache_lru import CacheLRU
+
+
+def test_descarta_la_menos_usada():
+    cache = CacheLRU(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obtener('a') == 1
+    cache.guardar('c', 3)
+    assert cache.obtener('b') is None
+    assert [clave for clave, _ in cache.elementos()] == ['a', 'c']
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_origen_distinto_cuenta_como_fallo():
+    cache = CacheLRU()
+    datos, otros = object(), object()
+    assert cache.obtener_o_calcular('x', lambda: 'viejo', datos) == 'viejo'
+    assert cache.obtener_o_calcular('x', lambda: 'nuevo', datos) == 'viejo'
+    assert cache.obtener_o_calcular('x', lambda: 'nuevo', otros) == 'nuevo'
+    assert cache.estadisticas() == {'entradas': 1, 'max_entradas': 128, 'aciertos': 1, 'fallos': 2}
+
+
+def test_origen_por_igualdad_y_limite_de_peso():
+    cache = CacheLRU(max_entradas=None, max_peso=10, peso=len, mismo_origen=operator.eq)
+    cache.guardar('a', 'x' * 6, (1, 6))
+    assert cache.obtener('a', (1, 6)) == 'x' * 6
+    assert cache.obtener('a', (2, 6)) is None
+    cache.guardar('a', 'x' * 6, (2, 6))
+    cache.guardar('b', 'y' * 6, (1, 6))
+    assert [clave for clave, _ in cache.elementos()] == ['b']
+    # La recién guardada se conserva aunque sola supere el límite
+    cache.guardar('c', 'z' * 20)
+    assert len(cache) == 1 and cache.estadisticas()['peso'] == 20
+
+
+def test_ttl_vencido(monkeypatch):
+    import cache_lru
+    ahora = [100.0]
+    monkeypatch.setattr(cache_lru.time, 'monotonic', lambda: ahora[0])
+    cache = CacheLRU(ttl_segundos=10)
+    cache.guardar('a', 1)
+    ahora[0] += 5
+    assert cache.obtener('a') == 1
+    ahora[0] += 6
+    assert cache.obtener('a') is None and len(cache) == 0
@@ -0,0 +1,39 @@
+# Consultas del cubo contra un groupby de pandas sobre las filas filtradas
+import numpy as np
+import pandas as pd
+import pytest
+from filtros import TODAS
+from test_filtros import DATOS, combinaciones, filtrar_con_mascara
+
+CUBO = DATOS.cubo
+
+
+@pytest.mark.parametrize("fecha", DATOS.fechas)
+def test_maximo_y_promedio_iguales_a_pandas(fecha):
+    for criterios in combinaciones(DATOS, fecha):
+        flujo = DATOS.df["FlujoVehicular"].iloc[filtrar_con_mascara(**criterios)]
+        if flujo.empty:
+            assert np.isnan(CUBO.maximo(**criterios)) and np.isnan(CUBO.promedio(**criterios))
+        else:
+            assert CUBO.maximo(**criterios) == flujo.max(), criterios
+            assert CUBO.promedio(**criterios) == pytest.approx(flujo.mean()), criterios
+
+
+def test_promedios_por_zona_y_hora_iguales_a_pandas():
+    for criterios in combinaciones(DATOS, DATOS.fechas[0]):
+        if criterios["Zona"] != TODAS:
+            continue
+        filas = DATOS.df.iloc[filtrar_con_mascara(**criterios)].astype({"Zona": str})
+        por_zona = filas.groupby("Zona")["FlujoVehicular"].mean().reset_index()
+        pd.testing.assert_frame_equal(CUBO.promedio_por_zona(**criterios).astype({"Zona": str}), por_zona)
+
+        por_hora = (filas.groupby(["Zona", "HoraInicio"])["FlujoVehicular"].mean()
+                         .reset_index(name="Valor"))
+        obtenido = CUBO.flujo_por_zona_hora(**criterios).astype({"Zona": str, "HoraInicio": str})
+        pd.testing.assert_frame_equal(obtenido, por_hora.astype({"HoraInicio": str}))
+
+
+def test_sin_filtros_igual_al_dataset():
+    assert CUBO.maximo() == DATOS.df["FlujoVehicular"].max()
+    assert CUBO.promedio() == pytest.approx(DATOS.df["FlujoVehicular"].mean())
+    assert CUBO.celdas["cantidad"].sum() == len(DATOS.df)
@@ -0,0 +1,55 @@
+# Esquema común: claves de ruta y equivalencias entre los nombres de los dos datasets
+import pandas as pd
+import pytest
+import datos
+from esquema import CatalogoRutas, RutaDesconocida, catalogo_rutas, clave_ruta, normalizar_calendario
+
+
+@pytest.mark.parametrize('modelo, tablero', [
+    ('Av. paseo de la república', 'Av. Paseo de la Republica'),
+    ('Av. la marina', 'Av. de la Marina'),
+    ('Av. mexico', 'Av. Mexico'),
+    ('Av. abancay', '  Av.   Abancay '),
+])
+def test_clave_ruta_une_los_dos_nombres(modelo, tablero):
+    assert clave_ruta(modelo) == clave_ruta(tablero)
+
+
+def test_catalogo_de_los_datasets():
+    catalogo = catalogo_rutas()
+    rutas = datos.cargar_datos_rutas()['Ruta'].astype(str).unique()
+    zonas = datos.cargar_datos_trafico().zonas
+
+    # Cada ruta del modelo tiene su zona en el tablero y viceversa, con el mismo código
+    assert len(catalogo.claves) == len(rutas) == len(zonas)
+    for ruta in rutas:
+        zona = catalogo.zona_tablero(ruta)
+        assert zona in zonas
+        assert catalogo.ruta_modelo(zona) == ruta
+        assert catalogo.codigo(zona) == catalogo.codigo(ruta) >= 0
+    assert catalogo.tabla['RutaModelo'].notna().all() and catalogo.tabla['ZonaTablero'].notna().all()
+
+
+def test_ruta_desconocida():
+    catalogo = CatalogoRutas(['Av. abancay', 'Av. la marina'], ['Av. Abancay', 'Av. de la Marina'])
+    assert catalogo.codigo('Av. Inexistente') == -1
+    with pytest.raises(RutaDesconocida) as error:
+        catalogo.ruta_modelo('Av. Inexistente')
+    assert error.value.ruta == 'Av. Inexistente'
+    assert 'Av. abancay' in str(error.value)
+    assert isinstance(error.value, ValueError)
+
+    # Sin estricto (rutas nuevas en la ingesta) y en el tablero, el nombre pasa tal cual
+    assert catalogo.ruta_modelo(' Av. Inexistente ', estricto=False) == 'Av. Inexistente'
+    assert catalogo.zona_tablero('Av. Inexistente') == 'Av. Inexistente'
+
+
+def test_ruta_solo_en_el_modelo():
+    catalogo = CatalogoRutas(['Av. abancay', 'Av. nueva'], ['Av. Abancay'])
+    assert catalogo.zona_tablero('AV. NUEVA') == 'Av. nueva'
+    assert catalogo.ruta_modelo('Av. Abancay') == 'Av. abancay'
+
+
+def test_dia_de_la_semana_desde_la_fecha():
+    df = normalizar_calendario(pd.DataFrame({'Fecha': ['2025-05-01', '2025-05-03'], 'DiaSemana': ['Saturday', 'x']}))
+    assert list(df['DiaSemana']) == ['Jueves', 'Sabado']
@@ -0,0 +1,54 @@
+# Índices invertidos de MotorFiltros contra la máscara booleana del app.py original
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+import datos
+from filtros import TODAS
+
+DATOS = datos.cargar_datos_trafico()
+
+
+# Columnas como las comparaba el app.py original (la conversión se hace una sola vez)
+TEXTO = {"Fecha": DATOS.df["Fecha"].dt.date.to_numpy(),
+         **{c: DATOS.df[c].astype(str).to_numpy() for c in ("Zona", "Feriado", "Evento", "Congestion")}}
+
+
+# Filtro del app.py original: una máscara booleana por columna
+def filtrar_con_mascara(Fecha, Zona=TODAS, Feriado=TODAS, Evento=TODAS, Congestion=TODAS):
+    mascara = TEXTO["Fecha"] == Fecha
+    for columna, valor in (("Zona", Zona), ("Feriado", Feriado), ("Evento", Evento), ("Congestion", Congestion)):
+        if valor != TODAS:
+            mascara &= TEXTO[columna] == valor
+    return np.flatnonzero(mascara)
+
+
+# Todas las combinaciones de zona, feriado, evento y congestión (con "Todas") para una fecha
+def combinaciones(datos_trafico, fecha):
+    for zona, feriado, evento, congestion in itertools.product(
+            [TODAS] + datos_trafico.zonas, [TODAS] + datos_trafico.opciones_feriado,
+            [TODAS] + datos_trafico.opciones_eventos, [TODAS] + datos_trafico.opciones_congestion):
+        yield dict(Fecha=fecha, Zona=zona, Feriado=feriado, Evento=evento, Congestion=congestion)
+
+
+@pytest.mark.parametrize("fecha", DATOS.fechas)
+def test_posiciones_iguales_a_la_mascara(fecha):
+    for criterios in combinaciones(DATOS, fecha):
+        esperadas = filtrar_con_mascara(**criterios)
+        assert np.array_equal(DATOS.filtros.posiciones(**criterios), esperadas), criterios
+
+
+def test_filtrar_y_promedio_por_zona_memorizados():
+    criterios = dict(Fecha=DATOS.fechas[0], Zona=TODAS, Feriado=TODAS, Evento=TODAS, Congestion=TODAS)
+    esperado = DATOS.df.iloc[filtrar_con_mascara(**criterios)]
+    vista = DATOS.filtros.filtrar(**criterios)
+    pd.testing.assert_frame_equal(vista, esperado)
+    assert DATOS.filtros.filtrar(**criterios) is vista
+
+    promedio = DATOS.filtros.promedio_por_zona(**criterios)
+    pd.testing.assert_frame_equal(promedio, esperado.groupby("Zona")["FlujoVehicular"].mean().reset_index())
+
+
+def test_opciones_ordenadas():
+    assert DATOS.filtros.opciones("Zona") == sorted(DATOS.df["Zona"].astype(str).unique())
+    assert DATOS.filtros.opciones("Fecha") == sorted(DATOS.fechas)
@@ -0,0 +1,75 @@
+# Formato compacto: ida y vuelta CSV -> columnas binarias -> DataFrame, y lectura sin disco
+import os
+import pandas as pd
+import pytest
+import formato_compacto
+from formato_compacto import convertir_csv, esta_al_dia, leer_csv, leer_dataset, ruta_compacta
+
+DATASETS = ['Dataset_limpio.csv', 'dataset_trafico_limpio.csv']
+
+
+@pytest.fixture
+def compacto_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(formato_compacto, 'DIRECTORIO_COMPACTO', str(tmp_path / 'compacto'))
+    return tmp_path / 'compacto'
+
+
+# Mismos valores que read_csv, escritos como en el CSV
+def como_texto(df):
+    return pd.DataFrame({c: df[c].dt.strftime('%Y-%m-%d') if pd.api.types.is_datetime64_dtype(df[c])
+                         else df[c].astype(str) for c in df.columns})
+
+
+@pytest.mark.parametrize('archivo', DATASETS)
+def test_ida_y_vuelta(compacto_temporal, archivo):
+    ruta_csv = os.path.join(formato_compacto.BASE_DIR, archivo)
+    df = leer_dataset(ruta_csv)
+    assert esta_al_dia(ruta_csv)
+    pd.testing.assert_frame_equal(como_texto(df), pd.read_csv(ruta_csv).astype(str))
+    assert df['Fecha'].dtype == 'datetime64[ns]'
+    assert df['FlujoVehicular'].dtype == 'int16'
+    assert all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in df.columns if c not in ('Fecha', 'FlujoVehicular'))
+
+    # Segunda lectura: desde la carpeta ya escrita, igual a la primera
+    pd.testing.assert_frame_equal(leer_dataset(ruta_csv, mmap=False), df)
+
+
+# Sin poder escribir la carpeta compacta: el CSV con los mismos tipos (app.py usa
+# .cat.categories y Fecha.min().date())
+@pytest.mark.parametrize('archivo', DATASETS)
+def test_respaldo_sin_disco_con_los_mismos_tipos(tmp_path, monkeypatch, archivo):
+    no_es_carpeta = tmp_path / 'archivo'
+    no_es_carpeta.write_text('')
+    monkeypatch.setattr(formato_compacto, 'DIRECTORIO_COMPACTO', str(no_es_carpeta))
+    ruta_csv = os.path.join(formato_compacto.BASE_DIR, archivo)
+
+    df = leer_dataset(ruta_csv)
+    pd.testing.assert_frame_equal(df, leer_csv(ruta_csv))
+    compacto = formato_compacto.leer_compacto(convertir_csv(ruta_csv, str(tmp_path / 'compacto' / 'destino')))
+    pd.testing.assert_series_equal(df.dtypes, compacto.dtypes)
+    assert len(df.iloc[:, 0].cat.categories) > 0
+    assert df['Fecha'].min().date() == pd.Timestamp(pd.read_csv(ruta_csv)['Fecha'].min()).date()
+
+
+# Dos procesos convirtiendo el mismo CSV: el segundo encuentra la carpeta ya
+# escrita, la acepta y no deja temporales
+def test_conversion_concurrente(compacto_temporal):
+    ruta_csv = os.path.join(formato_compacto.BASE_DIR, DATASETS[1])
+    destino = ruta_compacta(ruta_csv)
+    assert convertir_csv(ruta_csv) == destino
+    assert convertir_csv(ruta_csv, destino) == destino
+    assert os.listdir(compacto_temporal) == [os.path.basename(destino)]
+    assert esta_al_dia(ruta_csv, destino)
+
+
+# Una versión nueva del CSV tiene su propia carpeta y la anterior se borra
+def test_version_nueva_del_csv(compacto_temporal, tmp_path):
+    ruta_csv = tmp_path / 'datos.csv'
+    pd.read_csv(os.path.join(formato_compacto.BASE_DIR, DATASETS[1])).head(50).to_csv(ruta_csv, index=False)
+    anterior = ruta_compacta(str(ruta_csv))
+    assert len(leer_dataset(str(ruta_csv))) == 50
+
+    pd.read_csv(os.path.join(formato_compacto.BASE_DIR, DATASETS[1])).head(80).to_csv(ruta_csv, index=False)
+    assert len(leer_dataset(str(ruta_csv))) == 80
+    assert ruta_compacta(str(ruta_csv)) != anterior
+    assert os.listdir(compacto_temporal) == [os.path.basename(ruta_compacta(str(ruta_csv)))]
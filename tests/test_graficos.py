@@ -0,0 +1,63 @@
+# Presupuesto de puntos de las figuras: LTTB y boxplot con cuartiles precalculados
+import numpy as np
+import pandas as pd
+import pytest
+from graficos import boxplot_resumido, figura_flujo_hora, lttb, reducir_series
+
+
+@pytest.mark.parametrize("largo, n", [(1000, 50), (1000, 3), (101, 100), (24, 24), (10, 50)])
+def test_lttb_extremos_y_presupuesto(largo, n):
+    rng = np.random.default_rng(largo + n)
+    x = np.arange(largo)
+    indices = lttb(x, rng.normal(size=largo).cumsum(), n)
+
+    assert len(indices) == min(n, largo)
+    assert indices[0] == 0 and indices[-1] == largo - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+# Un pico aislado es el triángulo de mayor área de su cubeta: no se pierde
+def test_lttb_conserva_un_pico():
+    y = np.zeros(1000)
+    y[537] = 100
+    assert 537 in lttb(np.arange(1000), y, 40)
+
+
+def serie_larga(zonas=4, horas=24, dias=60):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Zona": np.repeat([f"Zona {z}" for z in range(zonas)], horas * dias),
+        "HoraInicio": np.tile(np.repeat([f"{h:02d}:00" for h in range(horas)], dias), zonas),
+        "Valor": rng.integers(0, 300, size=zonas * horas * dias),
+    })
+
+
+def test_reducir_series_respeta_el_presupuesto():
+    df = serie_larga()
+    reducido = reducir_series(df, "HoraInicio", "Valor", "Zona", presupuesto=400)
+    assert len(reducido) <= 400
+    assert set(reducido["Zona"]) == set(df["Zona"])
+    for _, serie in reducido.groupby("Zona"):
+        # Cada serie conserva la primera y la última hora
+        assert serie["HoraInicio"].iloc[0] == "00:00" and serie["HoraInicio"].iloc[-1] == "23:00"
+    assert reducir_series(df.head(100), "HoraInicio", "Valor", "Zona", presupuesto=400).equals(df.head(100))
+
+
+def test_boxplot_resumido_igual_a_los_cuartiles_de_pandas():
+    df = serie_larga(zonas=2, horas=3)
+    fig = boxplot_resumido(df, "HoraInicio", "Valor", "Zona")
+    cuartiles = df.groupby(["Zona", "HoraInicio"])["Valor"].quantile([0.25, 0.5, 0.75]).unstack()
+    for traza in fig.data:
+        esperado = cuartiles.loc[traza.name]
+        np.testing.assert_allclose(traza.q1, esperado[0.25])
+        np.testing.assert_allclose(traza.median, esperado[0.5])
+        np.testing.assert_allclose(traza.q3, esperado[0.75])
+        assert traza.y is None  # sin puntos
+
+
+@pytest.mark.parametrize("tipo", ["Línea", "Área", "Barra", "Línea con Marcadores", "Boxplot"])
+def test_figura_dentro_del_presupuesto(tipo):
+    df = serie_larga()
+    fig = figura_flujo_hora(tipo, df, df.rename(columns={"Valor": "FlujoVehicular"}), presupuesto=400)
+    puntos = sum(len(t.x) for t in fig.data)
+    assert puntos <= 400 if tipo != "Boxplot" else puntos == 4 * 24
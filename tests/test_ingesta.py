@@ -0,0 +1,94 @@
+# Ingesta incremental: las filas nuevas entran una sola vez en memoria y en disco
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+import datos
+import entrenar_modelo
+from entrenar_modelo import INTERVALOS
+from ingesta import IngestorTrafico
+
+
+@pytest.fixture
+def ingesta_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(datos, 'DIRECTORIO_INGESTA', str(tmp_path / 'ingesta'))
+    datos.limpiar_cache_datos()
+    yield tmp_path / 'ingesta'
+    datos.limpiar_cache_datos()
+
+
+def filas_del_dia(fecha, rutas=('Av. Abancay', 'Av. Mexico')):
+    return pd.DataFrame([{'Ruta': ruta, 'Fecha': fecha, 'Intervalo': intervalo, 'Feriado': 'no', 'FlujoVehicular': 100 + h}
+                         for ruta in rutas for h, intervalo in enumerate(INTERVALOS)])
+
+
+def test_bloque_completo_no_duplica_filas(ingesta_temporal):
+    antes = datos.cargar_datos_trafico()
+    filas_antes, celdas_antes = len(antes.df), antes.cubo.celdas['cantidad'].sum()
+    ingestor = IngestorTrafico(tamano_bloque=48, umbral_filas=10 ** 9)
+
+    # 48 filas: justo llenan un bloque, que se escribe en disco
+    assert ingestor.agregar_filas(filas_del_dia('2025-06-02')) == 48
+    assert len(list(ingesta_temporal.glob('bloque_*.csv'))) == 1
+    despues = datos.cargar_datos_trafico()
+    assert len(despues.df) == filas_antes + 48
+    assert despues.cubo.celdas['cantidad'].sum() == celdas_antes + 48
+    assert (despues.df['Fecha'] == '2025-06-02').sum() == 48
+
+    # Una carga desde cero (CSV + bloques) ve lo mismo que la memoria
+    datos.limpiar_cache_datos()
+    assert len(datos.cargar_datos_trafico().df) == filas_antes + 48
+
+
+def test_filas_pendientes_y_vaciar(ingesta_temporal):
+    filas_antes = len(datos.cargar_datos_trafico().df)
+    ingestor = IngestorTrafico(tamano_bloque=48, umbral_filas=10 ** 9)
+
+    ingestor.agregar_filas(filas_del_dia('2025-06-03', rutas=('Av. Abancay',)))
+    assert not list(ingesta_temporal.glob('bloque_*.csv'))
+    assert len(datos.cargar_datos_trafico().df) == filas_antes + 24
+
+    ingestor.vaciar()
+    assert len(list(ingesta_temporal.glob('bloque_*.csv'))) == 1
+    assert len(datos.cargar_datos_trafico().df) == filas_antes + 24
+    datos.limpiar_cache_datos()
+    assert len(datos.cargar_datos_trafico().df) == filas_antes + 24
+
+
+def test_bloques_solo_entrenan_el_dataset_real(ingesta_temporal, tmp_path):
+    IngestorTrafico(tamano_bloque=24, umbral_filas=10 ** 9).agregar_filas(filas_del_dia('2025-06-04', rutas=('Av. Abancay',)))
+    base = len(entrenar_modelo.cargar_datos_entrenamiento())
+
+    # Otro CSV (p. ej. un dataset sintético de benchmark.py) no recibe los bloques
+    sintetico = tmp_path / 'sintetico.csv'
+    pd.read_csv(entrenar_modelo.RUTA_DATASET).head(100).to_csv(sintetico, index=False)
+    assert entrenar_modelo.archivos_entrenamiento(str(sintetico)) == [str(sintetico)]
+    assert len(entrenar_modelo.cargar_datos_entrenamiento(str(sintetico))) == 100
+    assert base == len(pd.read_csv(entrenar_modelo.RUTA_DATASET)) + 24
+
+
+# Agregados sucesivos (fecha existente, fecha nueva, misma celda otra vez, zona nueva)
+# contra un DatosTrafico construido desde cero con el DataFrame resultante
+def test_extender_igual_a_reconstruir(ingesta_temporal):
+    def filas(fecha, ruta, flujo_base=100):
+        return datos._preparar_filas_trafico(datos.a_esquema_tablero(
+            filas_del_dia(fecha, rutas=(ruta,)).assign(EventoEspecial='ninguno', Congestion='bajo',
+                                                       FlujoVehicular=lambda f: f['FlujoVehicular'] + flujo_base)))
+
+    extendido = datos.cargar_datos_trafico()
+    for nuevas in (filas(str(extendido.fechas[0]), 'Av. Abancay', 5), filas('2026-06-02', 'Av. Abancay'),
+                   filas('2026-06-02', 'Av. Abancay', 900), filas('2026-06-03', 'Av. Nueva Ruta')):
+        extendido = extendido.extender(nuevas)
+    reconstruido = datos.DatosTrafico(extendido.df.copy())
+
+    assert extendido.zonas == reconstruido.zonas and extendido.fechas == reconstruido.fechas
+    assert extendido.opciones_congestion == reconstruido.opciones_congestion
+    opciones = lambda valores: ['Todas'] + list(valores)
+    for fecha, zona, congestion in itertools.product(extendido.fechas[:3] + extendido.fechas[-1:],
+                                                     opciones(extendido.zonas), opciones(extendido.opciones_congestion)):
+        criterios = dict(Fecha=fecha, Zona=zona, Congestion=congestion)
+        assert np.array_equal(extendido.filtros.posiciones(**criterios), reconstruido.filtros.posiciones(**criterios))
+        np.testing.assert_allclose([extendido.cubo.maximo(**criterios), extendido.cubo.promedio(**criterios)],
+                                   [reconstruido.cubo.maximo(**criterios), reconstruido.cubo.promedio(**criterios)])
+        pd.testing.assert_frame_equal(extendido.cubo.flujo_por_zona_hora(**criterios).astype({'Zona': str}),
+                                      reconstruido.cubo.flujo_por_zona_hora(**criterios).astype({'Zona': str}))
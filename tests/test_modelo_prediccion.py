@@ -0,0 +1,120 @@
+# Predicción: lotes con caché (iguales a las consultas una por una), pronóstico por rango
+# e incertidumbre por bloques (mismo resultado con el motor NumPy y con los árboles de sklearn)
+import numpy as np
+import pandas as pd
+import pytest
+import modelo_prediccion
+from esquema import RutaDesconocida
+from modelo_prediccion import (CUANTILES, cache_predicciones, calcular_congestion, distribucion_flujos, mejores_salidas,
+                               predecir_rango, predecir_trafico_diario, predecir_trafico_lote)
+from test_motor_bosque import grilla_con_ruta_desconocida
+
+CONSULTAS = [('Av. abancay', '2025-06-02', 'no'), ('Av. mexico', '2025-06-03', 'si'),
+             ('Av. abancay', '2025-06-02', 'no'), ('Av. argentina', '2026-01-15', 'no')]
+
+
+@pytest.fixture
+def cache_vacia():
+    cache_predicciones.limpiar()
+    yield cache_predicciones
+    cache_predicciones.limpiar()
+
+
+def test_lote_igual_a_consultas_individuales(cache_vacia):
+    lote = predecir_trafico_lote(CONSULTAS)
+    cache_vacia.limpiar()
+    individuales = []
+    for consulta in CONSULTAS:
+        cache_vacia.limpiar()
+        individuales.append(predecir_trafico_diario(*consulta))
+
+    assert len(lote) == len(CONSULTAS)
+    for df, esperado in zip(lote, individuales):
+        pd.testing.assert_frame_equal(df, esperado)
+        assert len(df) == 24
+        assert list(df['Congestion']) == [calcular_congestion(f) for f in df['FlujoVehicular']]
+
+
+def test_cache_por_consulta_normalizada(cache_vacia):
+    predecir_trafico_lote(CONSULTAS)
+    assert cache_vacia.estadisticas()['entradas'] == 3
+    aciertos = cache_vacia.aciertos
+
+    # Misma consulta escrita de otra forma: acierto, sin pasar por el modelo
+    df = predecir_trafico_diario('Av. abancay', pd.Timestamp('2025-06-02 08:30'), ' NO ')
+    assert cache_vacia.aciertos == aciertos + 1
+    pd.testing.assert_frame_equal(df, predecir_trafico_lote(CONSULTAS[:1])[0])
+
+
+def test_devuelve_copias(cache_vacia):
+    df = predecir_trafico_diario(*CONSULTAS[0])
+    original = df['FlujoVehicular'].copy()
+    df['FlujoVehicular'] = -1
+    pd.testing.assert_series_equal(predecir_trafico_diario(*CONSULTAS[0])['FlujoVehicular'], original)
+
+
+# Pronóstico por rango: la grilla rutas x días, en el orden (ruta, día, intervalo),
+# igual a las consultas diarias, tanto cortando la tabla precalculada como con el modelo
+@pytest.mark.parametrize('con_tabla', [True, False])
+def test_rango_igual_a_consultas_diarias(cache_vacia, monkeypatch, con_tabla):
+    if not con_tabla:
+        monkeypatch.setattr(modelo_prediccion.obtener_version(), 'tabla', None)
+    rutas = ['Av. abancay', 'Av. Paseo de la Republica']
+    rango = predecir_rango(rutas, '2025-07-27', '2025-07-30', fechas_feriado=['2025-07-28'])
+
+    fechas = pd.date_range('2025-07-27', '2025-07-30')
+    feriado = {pd.Timestamp('2025-07-28'): 'si'}
+    diarias = pd.concat(predecir_trafico_lote([(ruta, fecha, feriado.get(fecha, 'no'))
+                                               for ruta in rutas for fecha in fechas]), ignore_index=True)
+    assert len(rango) == len(rutas) * len(fechas) * 24
+    pd.testing.assert_frame_equal(rango, diarias, check_dtype=False)
+
+
+def test_rango_vacio_o_ruta_desconocida():
+    with pytest.raises(ValueError):
+        predecir_rango(['Av. abancay'], '2025-07-30', '2025-07-27')
+    with pytest.raises(RutaDesconocida):
+        predecir_rango(['Av. Inexistente'], '2025-07-27', '2025-07-30')
+
+
+# Mejor hora de salida contra un recorrido directo de cada (ruta, día)
+@pytest.mark.parametrize('hora_desde, hora_hasta', [(0, 23), (6, 9), (18, 18)])
+def test_mejores_salidas(hora_desde, hora_hasta):
+    pronostico = predecir_rango(['Av. abancay', 'Av. mexico'], '2025-07-27', '2025-07-29')
+    mejores = mejores_salidas(pronostico, hora_desde, hora_hasta)
+    assert len(mejores) == 2 * 3
+
+    for fila in mejores.itertuples():
+        dia = pronostico[(pronostico['Ruta'] == fila.Ruta) & (pronostico['Fecha'] == fila.Fecha)]
+        franja = dia.iloc[hora_desde:hora_hasta + 1]
+        minimo = franja.loc[franja['FlujoVehicular'].idxmin()]
+        assert (fila.MejorSalida, fila.FlujoVehicular, fila.Congestion) == (minimo['Intervalo'], minimo['FlujoVehicular'], minimo['Congestion'])
+        assert fila.FlujoPromedio == round(franja['FlujoVehicular'].mean())
+        assert int(fila.MejorSalida[:2]) in range(hora_desde, hora_hasta + 1)
+
+
+@pytest.fixture(scope="module")
+def version():
+    version = modelo_prediccion.obtener_version()
+    modelo_prediccion.obtener_modelo(version)
+    return version
+
+
+def test_distribucion_por_bloques_igual_a_una_pasada(version, monkeypatch):
+    X = grilla_con_ruta_desconocida().iloc[:1000]
+    assert len(X) > modelo_prediccion.LIMITE_FILAS_MOTOR
+    monkeypatch.setattr(modelo_prediccion, 'BLOQUE_FILAS_INCERTIDUMBRE', 384)  # último bloque incompleto
+    media, cuantiles, probabilidades = distribucion_flujos(X, version)
+
+    assert np.array_equal(media, version.model.predict(X))
+    por_arbol = version.motor.predecir_arboles_matriz(version.motor.codificar(X))
+    assert np.array_equal(cuantiles, np.quantile(por_arbol, CUANTILES, axis=0))
+    np.testing.assert_allclose(probabilidades.sum(0), 1)
+
+
+def test_lote_chico_usa_el_motor_con_los_mismos_valores(version):
+    X = grilla_con_ruta_desconocida().iloc[:24]
+    chico = distribucion_flujos(X, version)
+    grande = distribucion_flujos(grilla_con_ruta_desconocida().iloc[:480], version)
+    for parte_chica, parte_grande in zip(chico, grande):
+        assert np.array_equal(parte_chica, parte_grande[..., :24])
@@ -0,0 +1,49 @@
+# Equivalencia bit a bit entre el motor NumPy (motor_bosque.py) y el pipeline de sklearn
+import numpy as np
+import pandas as pd
+import pytest
+from entrenar_modelo import cargar_datos_entrenamiento, cargar_modelo, construir_features, features
+from motor_bosque import MotorBosque, exportar_motor
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    return cargar_modelo()
+
+
+@pytest.fixture(scope="module")
+def motor(modelo):
+    return exportar_motor(modelo)
+
+
+# Todas las rutas + una desconocida, un día por semana, con y sin feriado
+def grilla_con_ruta_desconocida():
+    rutas = sorted(cargar_datos_entrenamiento()['Ruta'].unique()) + ['Ruta desconocida']
+    fechas = pd.date_range('2025-01-01', '2025-12-31', freq='7D')
+    return construir_features(np.repeat(rutas, len(fechas) * 2),
+                              np.tile(np.repeat(fechas, 2), len(rutas)),
+                              np.tile(['no', 'si'], len(rutas) * len(fechas)))
+
+
+def test_igual_a_sklearn_en_entrenamiento(modelo, motor):
+    X = cargar_datos_entrenamiento()[features]
+    assert np.array_equal(modelo.predict(X), motor.predict(X))
+
+
+def test_igual_a_sklearn_en_grilla_con_ruta_desconocida(modelo, motor):
+    X = grilla_con_ruta_desconocida()
+    assert 'Ruta desconocida' in set(X['Ruta'])
+    assert np.array_equal(modelo.predict(X), motor.predict(X))
+
+
+def test_promediar_coincide_con_la_media_por_arbol(motor):
+    por_arbol = motor.predecir_arboles_matriz(motor.codificar(grilla_con_ruta_desconocida().iloc[:480]))
+    assert por_arbol.shape == (motor.n_arboles, 480)
+    np.testing.assert_allclose(por_arbol.mean(0), motor.promediar(por_arbol), rtol=1e-12)
+
+
+def test_guardar_y_cargar_conserva_las_predicciones(motor, tmp_path):
+    ruta = str(tmp_path / 'motor.npz')
+    motor.guardar(ruta)
+    X = grilla_con_ruta_desconocida().iloc[:240]
+    assert np.array_equal(MotorBosque.cargar(ruta).predict(X), motor.predict(X))
@@ -0,0 +1,79 @@
+# Dijkstra dependiente del tiempo contra una búsqueda exhaustiva en un grafo chico
+import itertools
+import numpy as np
+import pytest
+from rutas import COORDENADAS, GrafoRutas, MotorRutas, _camino
+
+ZONAS = ["Av. Abancay", "Av. Mexico", "Av. Paseo de la Republica", "Av. Alfredo Benavides", "Av. Venezuela"]
+
+
+@pytest.fixture(scope="module")
+def grafo():
+    return GrafoRutas({z: COORDENADAS[z] for z in ZONAS}, vecinos=2)
+
+
+# Flujos por hora (24, zonas) con una punta de mañana y otra de tarde
+def flujos_de_prueba(semilla):
+    rng = np.random.default_rng(semilla)
+    horas = np.arange(24)[:, None]
+    punta = 150 * np.exp(-(horas - 8) ** 2 / 8) + 180 * np.exp(-(horas - 18) ** 2 / 8)
+    return punta + rng.uniform(20, 120, size=(1, len(ZONAS)))
+
+
+# Todos los caminos simples, evaluando cada tramo en la hora de llegada a su origen
+def busqueda_exhaustiva(grafo, minutos, origen, destino, salida):
+    mejor = np.inf
+    intermedias = [i for i in range(len(grafo.zonas)) if i not in (origen, destino)]
+    for largo in range(len(intermedias) + 1):
+        for medio in itertools.permutations(intermedias, largo):
+            camino = (origen,) + medio + (destino,)
+            if any(np.isinf(grafo.km[i, j]) for i, j in zip(camino, camino[1:])):
+                continue
+            t = salida
+            for i, j in zip(camino, camino[1:]):
+                t += minutos[int(t // 60) % 24, i, j]
+            mejor = min(mejor, t - salida)
+    return mejor
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_dijkstra_igual_a_busqueda_exhaustiva(grafo, semilla):
+    minutos = grafo.minutos_por_hora(flujos_de_prueba(semilla))
+    duracion, previo = grafo.todos_los_pares(minutos)
+    n = len(grafo.zonas)
+    for hora, origen, destino in itertools.product(range(24), range(n), range(n)):
+        if origen == destino:
+            assert duracion[hora, origen, destino] == 0
+            continue
+        esperado = busqueda_exhaustiva(grafo, minutos, origen, destino, hora * 60)
+        assert duracion[hora, origen, destino] == pytest.approx(esperado)
+
+        # El camino reconstruido desde los predecesores dura lo mismo
+        camino = _camino(previo[hora, origen], origen, destino)
+        t = hora * 60
+        for i, j in zip(camino, camino[1:]):
+            t += minutos[int(t // 60) % 24, i, j]
+        assert t - hora * 60 == pytest.approx(esperado)
+
+
+def test_grafo_simetrico_y_conexo(grafo):
+    assert np.array_equal(np.isinf(grafo.km), np.isinf(grafo.km.T))
+    duracion, _ = grafo.todos_los_pares(grafo.minutos_por_hora(np.zeros((24, len(ZONAS)))))
+    assert np.isfinite(duracion).all()
+
+
+# Con el modelo real: la ruta óptima sale de la tabla, que se reutiliza mientras no cambie el modelo
+def test_ruta_optima_y_tabla_memorizada():
+    motor = MotorRutas()
+    ruta = motor.ruta_optima("Av. Universitaria", "Av. Alfredo Benavides", "2025-05-05", 8)
+    assert ruta['camino'][0] == "Av. Universitaria" and ruta['camino'][-1] == "Av. Alfredo Benavides"
+    assert ruta['minutos'] == pytest.approx(sum(t['Minutos'] for t in ruta['tramos']), abs=0.1 * len(ruta['tramos']))
+    assert ruta['salida'] == "08:00"
+
+    salidas = motor.mejores_salidas("Av. Universitaria", "Av. Alfredo Benavides", "2025-05-05", hora_desde=6, hora_hasta=9)
+    assert list(salidas['Minutos']) == sorted(salidas['Minutos'])
+    assert salidas.loc[salidas['Salida'] == "08:00", 'Minutos'].item() == ruta['minutos']
+    assert motor.estadisticas()['tablas'] == 1 and motor.estadisticas()['aciertos'] == 1
+
+    with pytest.raises(KeyError):
+        motor.ruta_optima("Av. Inexistente", "Av. Abancay", "2025-05-05", 8)
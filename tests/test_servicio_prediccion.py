@@ -0,0 +1,54 @@
+# Peticiones HTTP crudas contra el servicio, en un puerto libre
+import asyncio
+import json
+import pytest
+from servicio_prediccion import MAX_CONSULTAS_INCERTIDUMBRE, ServicioPrediccion
+
+
+async def _enviar(crudo):
+    servicio = ServicioPrediccion(puerto=0)
+    await servicio.iniciar()
+    try:
+        puerto = servicio._servidor.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+        writer.write(crudo)
+        await writer.drain()
+        respuesta = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        return respuesta
+    finally:
+        await servicio.detener()
+
+
+def post(ruta, cuerpo):
+    cuerpo = json.dumps(cuerpo).encode()
+    return b'POST %s HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s' % (ruta, len(cuerpo), cuerpo)
+
+
+def enviar(crudo):
+    cabecera, _, cuerpo = asyncio.run(_enviar(crudo)).partition(b'\r\n\r\n')
+    return int(cabecera.split()[1]), json.loads(cuerpo)
+
+
+@pytest.mark.parametrize('largo', ['abc', '-5', '1e3', '²'])
+def test_content_length_invalido_responde_400(largo):
+    estado, cuerpo = enviar(f'POST /prediccion HTTP/1.1\r\nContent-Length: {largo}\r\n\r\n'.encode())
+    assert estado == 400
+    assert 'Content-Length' in cuerpo['error']
+
+
+def test_peticion_valida_con_cuerpo():
+    consulta = json.dumps({'ruta': 'Av. Abancay', 'fecha': '2025-05-03', 'feriado': 'no'}).encode()
+    estado, cuerpo = enviar(b'POST /prediccion HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s' % (len(consulta), consulta))
+    assert estado == 200
+    assert len(cuerpo['flujo']) == 24
+
+
+def test_lote_con_incertidumbre_acotado():
+    consultas = [{'ruta': 'Av. Abancay', 'fecha': '2025-05-03', 'feriado': 'no'}] * (MAX_CONSULTAS_INCERTIDUMBRE + 1)
+    estado, cuerpo = enviar(post(b'/prediccion/lote', {'consultas': consultas, 'incertidumbre': True}))
+    assert estado == 413
+    # Sin incertidumbre el mismo lote se acepta
+    estado, cuerpo = enviar(post(b'/prediccion/lote', {'consultas': consultas}))
+    assert estado == 200
+    assert len(cuerpo['resultados']) == len(consultas)
@@ -0,0 +1,55 @@
+# Tabla paginada: las páginas cubren la vista completa y la exportación tiene las mismas filas
+import io
+import numpy as np
+import pandas as pd
+import pytest
+import datos
+from tabla import CacheVistas, VistaTabla, indices_vista, parquet_disponible
+
+DF = datos.cargar_datos_rutas()
+FILTROS = {"Congestion": ["alto", "muy alto"], "Fecha": ("2025-05-01", "2025-06-30")}
+
+
+def test_filtros_y_orden_iguales_a_pandas():
+    esperado = DF[DF["Congestion"].isin(FILTROS["Congestion"])
+                  & DF["Fecha"].between(pd.Timestamp("2025-05-01"), pd.Timestamp("2025-06-30"))]
+    esperado = esperado.sort_values("FlujoVehicular", ascending=False, kind="stable")
+    indices = indices_vista(DF, FILTROS, orden="FlujoVehicular", descendente=True)
+    pd.testing.assert_frame_equal(DF.iloc[indices], esperado)
+
+
+@pytest.mark.parametrize("filas_por_pagina", [25, 100, 7])
+def test_paginas_cubren_la_vista(filas_por_pagina):
+    vista = CacheVistas().vista(DF, FILTROS, orden="FlujoVehicular", descendente=True)
+    paginas = [vista.pagina(n, filas_por_pagina) for n in range(1, vista.paginas(filas_por_pagina) + 1)]
+
+    assert all(len(p) == filas_por_pagina for p in paginas[:-1]) and 0 < len(paginas[-1]) <= filas_por_pagina
+    pd.testing.assert_frame_equal(pd.concat(paginas), DF.iloc[vista.indices])
+    # Fuera de rango: primera o última página
+    pd.testing.assert_frame_equal(vista.pagina(0, filas_por_pagina), paginas[0])
+    pd.testing.assert_frame_equal(vista.pagina(10 ** 6, filas_por_pagina), paginas[-1])
+
+
+def test_exportacion_igual_a_las_paginas(monkeypatch):
+    monkeypatch.setattr(VistaTabla.bloques, "__defaults__", (100,))  # varios bloques
+    vista = CacheVistas().vista(DF, FILTROS, orden="FlujoVehicular")
+    paginas = pd.concat([vista.pagina(n, 250) for n in range(1, vista.paginas(250) + 1)], ignore_index=True)
+    assert vista.total > 100
+
+    # Un solo encabezado aunque se escriba por bloques
+    csv = vista.a_csv().decode("utf-8")
+    assert csv == paginas.to_csv(index=False, date_format="%Y-%m-%d")
+    if parquet_disponible():
+        pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(vista.a_parquet())), paginas, check_dtype=False,
+                                      check_categorical=False)
+
+
+def test_vista_vacia_y_cache():
+    cache = CacheVistas()
+    vacia = cache.vista(DF, {"Ruta": ["Av. Inexistente"]})
+    assert vacia.total == 0 and vacia.paginas(25) == 1 and vacia.pagina(1, 25).empty
+    assert list(pd.read_csv(io.BytesIO(vacia.a_csv())).columns) == list(DF.columns)
+
+    assert cache.vista(DF, {"Ruta": ["Av. Inexistente"]}) is vacia
+    assert cache.vista(DF.copy(), {"Ruta": ["Av. Inexistente"]}) is not vacia  # otro DataFrame: vista nueva
+    assert np.array_equal(cache.vista(DF).indices, np.arange(len(DF)))